@@ -0,0 +1,387 @@
+"""
+Analytics that relate school closures to covid cases for every country at once.
+
+The covid cases and school closures of all countries are joined on one date axis into two
+(country, date) arrays. From them we compute
+    - the correlation between the closure status and the growth of new cases some days later
+      (lagged correlations),
+    - the growth of new cases before and after every change of closure status (transitions),
+    - and the number of days every country spent in each closure status.
+
+Countries may be split into chunks that are analyzed by a pool of processes, and a ranked summary
+table is printed or written into a CSV file. For our data sets, one process analyzes all countries
+in about 10 milliseconds, faster than a pool could be started, so the pool is off by default.
+
+Usage:
+    python analytics.py [--max-lag 28] [--lag-step 7] [--window 7] [--workers 1]
+                        [--rank-by correlation|closure_effect|days_closed] [--top 20]
+                        [--csv summary.csv]
+"""
+# Future features
+from __future__ import annotations
+
+# Python built-ins
+import argparse
+import csv
+import datetime
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+# NumPy
+import numpy
+
+# Our modules
+import data
+import metrics
+import settings
+from resource_manager import Config, register_resources
+
+# Closure statuses in the order of the columns of AnalyticsResult.status_days.
+STATUSES = [data.ClosureStatus.FULLY_OPEN, data.ClosureStatus.PARTIALLY_OPEN,
+            data.ClosureStatus.CLOSED, data.ClosureStatus.ACADEMIC_BREAK]
+
+# Columns of the summary table, in order.
+SUMMARY_COLUMNS = ['rank', 'country', 'best_lag', 'correlation', 'closure_effect',
+                   'closures', 'days_open', 'days_partially_open', 'days_closed', 'days_break']
+
+# The ways to rank the summary table, mapping to the column and whether larger is better.
+RANKINGS = {
+    'correlation'   : ('correlation', False),
+    'closure_effect': ('closure_effect', False),
+    'days_closed'   : ('days_closed', True)
+}
+
+
+class AnalyticsResult:
+    """
+    The analytics of all countries.
+
+    Instance Attributes:
+        - countries: The names of the countries analyzed.
+        - dates: The shared date axis.
+        - lags: The lags of the correlations in days.
+        - correlations: The correlation between the closure status and the growth rate of new cases
+          lag days later, shape (countries, lags). NaN where there are too few data.
+        - status_days: The number of days every country spent in each status of STATUSES,
+          shape (countries, statuses).
+        - transition_countries: The country index of every transition.
+        - transition_days: The date index of every transition (the first day of the new status).
+        - transition_from and transition_to: The statuses before and after every transition.
+        - growth_before and growth_after: The daily growth rates of new cases in the window before
+          and after every transition.
+
+    Representation Invariants:
+        - self.correlations.shape == (len(self.countries), len(self.lags))
+        - all transition arrays have the same length
+    """
+    countries: List[str]
+    dates: numpy.ndarray
+    lags: List[int]
+    correlations: numpy.ndarray
+    status_days: numpy.ndarray
+    transition_countries: numpy.ndarray
+    transition_days: numpy.ndarray
+    transition_from: numpy.ndarray
+    transition_to: numpy.ndarray
+    growth_before: numpy.ndarray
+    growth_after: numpy.ndarray
+
+    def __init__(self, countries: List[str], dates: numpy.ndarray, lags: List[int],
+                 chunks: List[Dict[str, numpy.ndarray]], offsets: List[int]) -> None:
+        """
+        Initialize an AnalyticsResult by merging the results of analyze_chunk.
+
+        offsets are the index of the first country of every chunk.
+        """
+        self.countries = countries
+        self.dates = dates
+        self.lags = lags
+        self.correlations = numpy.concatenate([c['correlations'] for c in chunks])
+        self.status_days = numpy.concatenate([c['status_days'] for c in chunks])
+        self.transition_countries = numpy.concatenate(
+                [c['transition_countries'] + offset for c, offset in zip(chunks, offsets)])
+        for name in ('transition_days', 'transition_from', 'transition_to', 'growth_before',
+                     'growth_after'):
+            setattr(self, name, numpy.concatenate([c[name] for c in chunks]))
+
+
+# =================================================================================================
+# Vectorized functions
+# =================================================================================================
+
+def growth_rates(cases: numpy.ndarray, window: int) -> numpy.ndarray:
+    """
+    Return the daily growth rate of the window-day average of new cases over the last window days,
+    i.e. log(average today / average window days ago) / window. NaN where either average is not
+    positive.
+
+    >>> growth_rates(numpy.array([[1, 2, 4, 8, 16, 32]]), 1).round(4).tolist()
+    [[nan, 0.0, 0.6931, 0.6931, 0.6931, 0.6931]]
+    """
+    averages = metrics.rolling_mean(metrics.daily_new_cases(cases), window)
+    result = numpy.full(averages.shape, numpy.nan)
+    current, previous = averages[..., window:], averages[..., :-window]
+    valid = (current > 0) & (previous > 0)
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        result[..., window:] = numpy.where(valid, numpy.log(current / previous) / window, numpy.nan)
+    return result
+
+
+def row_correlations(x: numpy.ndarray, y: numpy.ndarray, min_count: int = 14) -> numpy.ndarray:
+    """
+    Return the Pearson correlation of every row of x with the same row of y, ignoring NaN pairs.
+    Rows with fewer than min_count pairs or without variance are NaN.
+
+    >>> row_correlations(numpy.array([[1.0, 2.0, 3.0, numpy.nan]]), \
+    numpy.array([[2.0, 4.0, 7.0, 1.0]]), 3).round(4)
+    array([0.9934])
+    """
+    valid = ~(numpy.isnan(x) | numpy.isnan(y))
+    counts = valid.sum(axis=-1)
+    x = numpy.where(valid, x, 0.0)
+    y = numpy.where(valid, y, 0.0)
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        x_mean = x.sum(axis=-1) / counts
+        y_mean = y.sum(axis=-1) / counts
+        x_centered = numpy.where(valid, x - x_mean[..., numpy.newaxis], 0.0)
+        y_centered = numpy.where(valid, y - y_mean[..., numpy.newaxis], 0.0)
+        covariance = (x_centered * y_centered).sum(axis=-1)
+        variance = (x_centered ** 2).sum(axis=-1) * (y_centered ** 2).sum(axis=-1)
+        result = covariance / numpy.sqrt(variance)
+    return numpy.where((counts >= min_count) & (variance > 0), result, numpy.nan)
+
+
+def lagged_correlations(statuses: numpy.ndarray, growth: numpy.ndarray,
+                        lags: List[int]) -> numpy.ndarray:
+    """
+    Return the correlation of the statuses with the growth rates lag days later for every lag,
+    shape (countries, lags).
+    """
+    length = statuses.shape[-1]
+    return numpy.stack([row_correlations(statuses[:, :length - lag], growth[:, lag:])
+                        for lag in lags], axis=-1)
+
+
+def count_status_days(statuses: numpy.ndarray) -> numpy.ndarray:
+    """
+    Return the number of days in each status of STATUSES, shape (countries, statuses).
+    """
+    return numpy.stack([(statuses == status.value).sum(axis=-1) for status in STATUSES], axis=-1)
+
+
+def find_transitions(statuses: numpy.ndarray) -> Tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    Return the country indices and the date indices of all changes of status, where the date is
+    the first day of the new status. Days without a status are neither a start nor an end.
+
+    >>> find_transitions(numpy.array([[1.0, 1.0, 3.0, numpy.nan, 1.0]]))
+    (array([0]), array([2]))
+    """
+    before, after = statuses[:, :-1], statuses[:, 1:]
+    changed = (before != after) & ~numpy.isnan(before) & ~numpy.isnan(after)
+    rows, columns = numpy.nonzero(changed)
+    return rows, columns + 1
+
+
+def analyze_chunk(chunk: Tuple[numpy.ndarray, numpy.ndarray, List[int], int]) \
+        -> Dict[str, numpy.ndarray]:
+    """
+    Analyze a chunk of countries, given as a tuple of their cases, their statuses (NaN where
+    missing), the lags, and the window of growth rates. Return a dict of arrays, see
+    AnalyticsResult.
+
+    This function is run by the worker processes.
+    """
+    cases, statuses, lags, window = chunk
+    growth = growth_rates(cases, window)
+    rows, days = find_transitions(statuses)
+    # The growth rate on day d covers days (d - window, d], so the window before a transition ends
+    # on the day before it, and the window after it ends window - 1 days after it.
+    before_days = days - 1
+    after_days = numpy.minimum(days + window - 1, growth.shape[-1] - 1)
+    growth_after = numpy.where(days + window - 1 < growth.shape[-1],
+                               growth[rows, after_days], numpy.nan)
+    return {
+        'correlations'        : lagged_correlations(statuses, growth, lags),
+        'status_days'         : count_status_days(statuses),
+        'transition_countries': rows,
+        'transition_days'     : days,
+        'transition_from'     : statuses[rows, days - 1].astype(numpy.int8),
+        'transition_to'       : statuses[rows, days].astype(numpy.int8),
+        'growth_before'       : growth[rows, before_days],
+        'growth_after'        : growth_after
+    }
+
+
+# =================================================================================================
+# Functions
+# =================================================================================================
+
+def join_data() -> Tuple[List[str], numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+    """
+    Join COUNTRIES_TO_COVID_CASES and COUNTRIES_TO_CLOSURE_TIMELINES on the dates covered by both,
+    and return a tuple of the countries in both, the dates, the cases of shape (countries, dates),
+    and the statuses of shape (countries, dates), which are NaN where missing.
+
+    Note:
+        - This function should only be called after data are initialized.
+    """
+    countries = [c for c in data.SORTED_COUNTRIES if c in data.COUNTRIES_TO_CLOSURE_TIMELINES]
+    first_date = max(data.ALL_COVID_CASES[0].date, data.ALL_SCHOOL_CLOSURES[0].date)
+    last_date = min(data.ALL_COVID_CASES[-1].date, data.ALL_SCHOOL_CLOSURES[-1].date)
+    length = (last_date - first_date).days + 1
+    dates = numpy.arange(numpy.datetime64(first_date, 'D'), numpy.datetime64(last_date, 'D')
+                         + numpy.timedelta64(1, 'D'))
+
+    cases = numpy.zeros((len(countries), length), dtype=numpy.int64)
+    statuses = numpy.full((len(countries), length), numpy.nan)
+    for i, country in enumerate(countries):
+        covid_cases = data.COUNTRIES_TO_COVID_CASES[country]
+        offset = (first_date - covid_cases[0].date).days
+        cases[i] = [c.cases for c in covid_cases[offset:offset + length]]
+        timeline = data.COUNTRIES_TO_CLOSURE_TIMELINES[country].clip(first_date, last_date)
+        for start, end, status in zip(timeline.starts, timeline.ends, timeline.statuses):
+            statuses[i, (start - first_date).days:(end - first_date).days + 1] = status.value
+    return [c.name for c in countries], dates, cases, statuses
+
+
+def analyze(countries: List[str], dates: numpy.ndarray, cases: numpy.ndarray,
+            statuses: numpy.ndarray, lags: List[int], window: int,
+            workers: int = 1) -> AnalyticsResult:
+    """
+    Analyze all countries. With more than one worker, countries are split into chunks that are
+    analyzed by a pool of processes.
+    """
+    if workers <= 1:
+        return AnalyticsResult(countries, dates, lags,
+                               [analyze_chunk((cases, statuses, lags, window))], [0])
+
+    chunk_size = max(1, -(-len(countries) // workers))
+    offsets = list(range(0, len(countries), chunk_size))
+    chunks = [(cases[offset:offset + chunk_size], statuses[offset:offset + chunk_size], lags,
+               window) for offset in offsets]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(analyze_chunk, chunks))
+    return AnalyticsResult(countries, dates, lags, results, offsets)
+
+
+def summary_table(result: AnalyticsResult, rank_by: str = 'correlation') -> List[Dict[str, Any]]:
+    """
+    Return a row of SUMMARY_COLUMNS for every country, ranked by the given ranking of RANKINGS.
+    Countries without a value of the ranking column are ranked last.
+
+        - best_lag and correlation are the lag with the strongest (absolute) correlation.
+        - closure_effect is the mean change of the growth rate after transitions to closed.
+        - closures is the number of transitions to closed.
+    """
+    closing = result.transition_to == data.ClosureStatus.CLOSED.value
+    effects = result.growth_after - result.growth_before
+    rows = []
+    for i, country in enumerate(result.countries):
+        correlations = result.correlations[i]
+        if numpy.all(numpy.isnan(correlations)):
+            best_lag, correlation = None, None
+        else:
+            best = int(numpy.nanargmax(numpy.abs(correlations)))
+            best_lag, correlation = result.lags[best], float(correlations[best])
+        country_effects = effects[closing & (result.transition_countries == i)]
+        country_effects = country_effects[~numpy.isnan(country_effects)]
+        days = result.status_days[i]
+        rows.append({
+            'country'            : country,
+            'best_lag'           : best_lag,
+            'correlation'        : correlation,
+            'closure_effect'     : float(country_effects.mean()) if len(country_effects) else None,
+            'closures'           : int((closing & (result.transition_countries == i)).sum()),
+            'days_open'          : int(days[0]),
+            'days_partially_open': int(days[1]),
+            'days_closed'        : int(days[2]),
+            'days_break'         : int(days[3])
+        })
+
+    column, is_descending = RANKINGS[rank_by]
+    present = [row for row in rows if row[column] is not None]
+    missing = [row for row in rows if row[column] is None]
+    present.sort(key=lambda row: row[column], reverse=is_descending)
+    for rank, row in enumerate(present + missing, 1):
+        row['rank'] = rank
+    return present + missing
+
+
+def format_value(value: Any) -> str:
+    """
+    Format a value of the summary table.
+
+    >>> format_value(0.123456), format_value(None), format_value(7)
+    ('0.1235', '-', '7')
+    """
+    if value is None:
+        return '-'
+    elif isinstance(value, float):
+        return f'{value:.4f}'
+    return str(value)
+
+
+def print_table(rows: List[Dict[str, Any]]) -> None:
+    """
+    Print the rows of a summary table with aligned columns.
+    """
+    cells = [SUMMARY_COLUMNS] + [[format_value(row[c]) for c in SUMMARY_COLUMNS] for row in rows]
+    widths = [max(len(line[i]) for line in cells) for i in range(len(SUMMARY_COLUMNS))]
+    for line in cells:
+        print('  '.join(cell.ljust(width) if i == 1 else cell.rjust(width)
+                        for i, (cell, width) in enumerate(zip(line, widths))))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    The entry of the analytics. Return the exit code.
+    """
+    parser = argparse.ArgumentParser(description='Relate school closures to covid cases.')
+    parser.add_argument('--max-lag', type=int, default=28, help='the maximum lag in days')
+    parser.add_argument('--lag-step', type=int, default=7, help='the step between lags in days')
+    parser.add_argument('--window', type=int, default=7,
+                        help='the window of the growth rates of new cases in days')
+    parser.add_argument('--workers', type=int, default=1,
+                        help=f'the number of worker processes (at most {os.cpu_count()} helps)')
+    parser.add_argument('--rank-by', choices=list(RANKINGS), default='correlation',
+                        help='the column to rank countries by')
+    parser.add_argument('--top', type=int, help='only print the first TOP countries')
+    parser.add_argument('--csv', help='write the whole summary table into this CSV file')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(stream=sys.stdout, level=settings.LOG_LEVEL, format=settings.LOG_FORMAT)
+
+    config = Config('config.json')
+    settings.init_setting(config['setting'])
+    register_resources(config['resource'])
+    data.init_data()
+    if 'Failed to' in data.progress_description:
+        logging.critical(data.progress_description)
+        return 1
+
+    timestamp1 = time.time()
+    countries, dates, cases, statuses = join_data()
+    result = analyze(countries, dates, cases, statuses,
+                     list(range(0, args.max_lag + 1, args.lag_step)), args.window, args.workers)
+    rows = summary_table(result, args.rank_by)
+    seconds_elapsed = round(time.time() - timestamp1, 3)
+    logging.info(f'Analyzed {len(countries)} countries from '
+                 f'{dates[0].astype(datetime.date)} to {dates[-1].astype(datetime.date)} '
+                 f'in {seconds_elapsed} seconds!')
+
+    print_table(rows if args.top is None else rows[:args.top])
+    if args.csv is not None:
+        with open(args.csv, 'w', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=SUMMARY_COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,437 @@
+"""
+A performance regression benchmark of our program.
+
+It runs these benchmarks headlessly (on an offscreen Qt platform), each several times, and reports
+the median seconds of each:
+    - verify_deep and verify_manifest: verifying all resources, by hashing every file, and by
+      trusting the verification manifest for unchanged files,
+    - init_data[Nx]: data.init_data on our data sets (1x), and on synthetic data sets scaled up N
+      times, see scale_covid_file and scale_closure_file,
+    - update_plot: MainWindow.update_plot for every country, one after another,
+    - render: drawing the whole plot,
+    - pan: one mouse move of dragging the plot,
+    - zoom: one scroll of zooming the plot.
+
+The results could be written as JSON, and compared with a baseline (the JSON of an earlier run on
+the same machine): the run fails if any benchmark is slower than its baseline by more than the
+threshold.
+
+A synthetic data set N times as large has ceil(sqrt(N)) times the locations, and the rest of the
+factor as more dates. Scaling up 100 times needs several GB of memory, so only 10 times is run
+by default.
+
+Usage:
+    python benchmark.py [--repeat 3] [--scales 10] [--only init_data update_plot ...]
+                        [--json output.json] [--baseline baseline.json] [--threshold 0.25]
+"""
+# Python built-ins
+import argparse
+import csv
+import datetime
+import json
+import logging
+import math
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+# Our modules
+import data
+import settings
+from resource_manager import *
+
+# All benchmarks, in the order they run. init_data runs once for every scale.
+BENCHMARKS = ['verify_deep', 'verify_manifest', 'init_data', 'update_plot', 'render', 'pan',
+              'zoom']
+
+# Number of mouse moves of a pan, and scrolls of a zoom, in one run
+PAN_STEPS = 20
+ZOOM_STEPS = 10
+
+# The size of the main window, so the plot has the same number of pixels on every machine
+WINDOW_SIZE = (1200, 742)
+
+# The default fraction a benchmark may be slower than its baseline
+DEFAULT_THRESHOLD = 0.25
+
+
+# =================================================================================================
+# Synthetic data sets
+# =================================================================================================
+
+def scale_factors(scale: int) -> tuple[int, float]:
+    """
+    Return the factors of the locations and the dates of a data set scaled up the given times.
+
+    >>> scale_factors(10), scale_factors(100)
+    ((4, 2.5), (10, 10.0))
+    """
+    location_factor = math.ceil(math.sqrt(scale))
+    return location_factor, scale / location_factor
+
+
+def scale_covid_file(source: str, destination: str, scale: int) -> None:
+    """
+    Write a JHU time series file scaled up the given times from source into destination.
+
+    Every country is copied as new countries with the same provinces (named like the copies in
+    scale_closure_file), and the dates continue day by day after the last date, with the cases of
+    the first dates again (plus the last cases, so the cases stay cumulative).
+    """
+    location_factor, date_factor = scale_factors(scale)
+    with open(source, newline='') as file:
+        reader = csv.reader(file)
+        header = next(reader)
+        rows = list(reader)
+
+    month, day, year = header[4].split('/')
+    first_date = datetime.date(2000 + int(year), int(month), int(day))
+    date_count = len(header) - 4
+    total_dates = round(date_count * date_factor)
+    dates = [first_date + datetime.timedelta(days=i) for i in range(total_dates)]
+
+    with open(destination, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(header[:4] + [f'{d.month}/{d.day}/{d.year % 100}' for d in dates])
+        for copy in range(location_factor):
+            for row in rows:
+                country = row[1] if copy == 0 else f'{row[1]} {copy}'
+                cases = [int(value) for value in row[4:]]
+                writer.writerow([row[0], country] + row[2:4] +
+                                [cases[i % date_count] + (i // date_count) * cases[-1]
+                                 for i in range(total_dates)])
+
+
+def scale_closure_file(source: str, destination: str, scale: int) -> None:
+    """
+    Write a school closure file scaled up the given times from source into destination.
+
+    Every country is copied as new countries with the same statuses (named like the copies in
+    scale_covid_file), and the dates continue after the last date with the statuses of the first
+    dates again. The rows stay sorted by date.
+    """
+    location_factor, date_factor = scale_factors(scale)
+    with open(source, newline='') as file:
+        reader = csv.reader(file)
+        header = next(reader)
+        rows_by_date: Dict[datetime.date, List[List[str]]] = {}
+        for row in reader:
+            day, month, year = row[0].split('/')
+            rows_by_date.setdefault(datetime.date(int(year), int(month), int(day)), []).append(row)
+
+    dates = sorted(rows_by_date)
+    span = (dates[-1] - dates[0]).days + 1
+    with open(destination, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(header)
+        for i in range(round(len(dates) * date_factor)):
+            repeat, index = divmod(i, len(dates))
+            date = (dates[index] + datetime.timedelta(days=repeat * span)).strftime('%d/%m/%Y')
+            for row in rows_by_date[dates[index]]:
+                writer.writerow([date] + row[1:])
+                # Copies of the countries that data.py removes would not be removed.
+                if data.is_in_ascii(row[2]) and row[2] not in data.CLOSURE_COUNTRIES_DELETE:
+                    name = data.CLOSURE_COUNTRY_NAMES_FIX.get(row[2], row[2])
+                    writer.writerows([date, row[1], f'{name} {copy}'] + row[3:]
+                                     for copy in range(1, location_factor))
+
+
+def register_data_sets(covid_path: str, closure_path: str) -> Dict[str, Resource]:
+    """
+    Register the given files as our data sets (trusting their current contents), and return the
+    resources they replaced, see restore_data_sets.
+    """
+    replaced = {}
+    for name, path in ((COVID19_RESOURCE_NAME, covid_path),
+                       (SCHOOL_CLOSURE_RESOURCE_NAME, closure_path)):
+        replaced[name] = RESOURCES_DICT[name]
+        RESOURCES_DICT[name] = Resource(os.path.basename(path), path, replaced[name].remote_path,
+                                        compute_identifier(path), name)
+    return replaced
+
+
+def restore_data_sets(replaced: Dict[str, Resource]) -> None:
+    """Register the resources replaced by register_data_sets again."""
+    RESOURCES_DICT.update(replaced)
+
+
+# =================================================================================================
+# Benchmarks
+# =================================================================================================
+
+def measure(function: Callable[[], None], repeat: int, operations: int = 1) -> Dict:
+    """
+    Call function repeat times, and return the median and the minimum seconds of one of the given
+    number of operations that every call does.
+    """
+    runs = []
+    for _ in range(repeat):
+        timestamp1 = time.perf_counter()
+        function()
+        runs.append((time.perf_counter() - timestamp1) / operations)
+    return {'seconds': statistics.median(runs), 'min_seconds': min(runs), 'runs': runs}
+
+
+def benchmark_verification(repeat: int) -> Dict[str, Dict]:
+    """Return the results of verify_deep and verify_manifest."""
+    def verify(deep: bool) -> None:
+        """Verify all resources again."""
+        for resource in RESOURCES_DICT.values():
+            resource.reset()
+        verify_resources(deep)
+
+    return {'verify_deep'    : measure(lambda: verify(True), repeat),
+            'verify_manifest': measure(lambda: verify(False), repeat)}
+
+
+def init_data() -> None:
+    """
+    Initialize all data again.
+
+    Raise FailedToDownloadResourceException if our data sets could not be initialized.
+    """
+    data.reset_data()
+    data.init_data()
+    if not data.progress_description.startswith('Ready'):
+        raise FailedToDownloadResourceException(data.progress_description)
+
+
+def benchmark_init_data(repeat: int) -> Dict:
+    """
+    Return the result of init_data on the registered data sets, with the median seconds of every
+    stage (see data.INIT_DATA_RECORDER).
+
+    Raise FailedToDownloadResourceException if the data sets could not be initialized.
+    """
+    stages: Dict[str, List[float]] = {}
+
+    def init_data_and_record() -> None:
+        """Initialize all data again, and record the seconds of every stage."""
+        init_data()
+        for span in data.INIT_DATA_RECORDER.spans:
+            stages.setdefault(span.name, []).append(span.wall_seconds)
+
+    result = measure(init_data_and_record, repeat)
+    result['records'] = len(data.ALL_COVID_CASES) + len(data.ALL_SCHOOL_CLOSURES)
+    result['stages'] = {name: statistics.median(seconds) for name, seconds in stages.items()}
+    return result
+
+
+def benchmark_scaled_init_data(repeat: int, scale: int, directory: str) -> Dict:
+    """
+    Return the result of init_data on our data sets scaled up the given times, whose files are
+    written into directory.
+    """
+    covid_path = os.path.join(directory, f'covid_{scale}x.csv')
+    closure_path = os.path.join(directory, f'closures_{scale}x.csv')
+    scale_covid_file(RESOURCES_DICT[COVID19_RESOURCE_NAME].local_path, covid_path, scale)
+    scale_closure_file(RESOURCES_DICT[SCHOOL_CLOSURE_RESOURCE_NAME].local_path, closure_path,
+                       scale)
+    replaced = register_data_sets(covid_path, closure_path)
+    try:
+        return benchmark_init_data(repeat)
+    finally:
+        restore_data_sets(replaced)
+        data.reset_data()
+
+
+def benchmark_gui(names: List[str], repeat: int) -> Dict[str, Dict]:
+    """
+    Return the results of the given GUI benchmarks (update_plot, render, pan, zoom) on an
+    offscreen main window.
+
+    Note:
+        - This function should only be called after data are initialized.
+    """
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    # PyQt and matplotlib are only imported if a GUI benchmark runs.
+    import matplotlib.backend_bases
+    from PyQt5.QtWidgets import QApplication
+    import gui_main
+    import snapshot
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    window = gui_main.MainWindow()
+    window.resize(*WINDOW_SIZE)
+    window.show()
+    window.init_plot()
+    app.processEvents()
+    window.on_data_initialized(snapshot.DataSnapshot.from_data())
+    canvas = window.plot_canvas
+    results = {}
+
+    if 'update_plot' in names:
+        country_names = window.data_snapshot.country_names
+        window.global_radio_button.setChecked(False)
+
+        def plot_every_country() -> None:
+            """Plot every country one after another."""
+            for name in country_names:
+                window.country_selection_combo_box.blockSignals(True)
+                window.country_selection_combo_box.setCurrentText(name)
+                window.country_selection_combo_box.blockSignals(False)
+                window.update_plot()
+
+        results['update_plot'] = measure(plot_every_country, repeat, len(country_names))
+
+    # The mouse events are sent through matplotlib, like the events of the Qt canvas.
+    window.global_radio_button.setChecked(True)
+    x, y = canvas.covid_axes.transAxes.transform((0.5, 0.5))
+
+    def send(name: str, event_x: float, **kwargs) -> None:
+        """Send the mouse event of the given name at (event_x, y) to canvas."""
+        canvas.callbacks.process(name, matplotlib.backend_bases.MouseEvent(
+                name, canvas, event_x, y, **kwargs))
+
+    def restore_limits(function: Callable[[], None]) -> Callable[[], None]:
+        """Return a function that calls function, and then restores the limits of both axes."""
+        def restored() -> None:
+            """Call function, see restore_limits."""
+            limits = [(axes.get_xlim(), axes.get_ylim())
+                      for axes in (canvas.covid_axes, canvas.closure_axes)]
+            function()
+            for axes, (x_limits, y_limits) in zip((canvas.covid_axes, canvas.closure_axes), limits):
+                axes.set_xlim(x_limits)
+                axes.set_ylim(y_limits)
+
+        return restored
+
+    @restore_limits
+    def pan() -> None:
+        """Drag the covid plot PAN_STEPS pixels to the right."""
+        send('button_press_event', x, button=1)
+        for step in range(1, PAN_STEPS + 1):
+            send('motion_notify_event', x + step, button=1)
+        send('button_release_event', x + PAN_STEPS, button=1)
+
+    @restore_limits
+    def zoom() -> None:
+        """Scroll up and then down ZOOM_STEPS times in total on the covid plot."""
+        for step in range(ZOOM_STEPS):
+            send('scroll_event', x, button='up' if step < ZOOM_STEPS // 2 else 'down',
+                 step=1 if step < ZOOM_STEPS // 2 else -1)
+
+    if 'render' in names:
+        results['render'] = measure(canvas.draw, repeat)
+    if 'pan' in names:
+        results['pan'] = measure(pan, repeat, PAN_STEPS)
+    if 'zoom' in names:
+        results['zoom'] = measure(zoom, repeat, ZOOM_STEPS)
+
+    window.close()
+    app.processEvents()
+    return results
+
+
+def run_benchmarks(names: List[str], repeat: int, scales: List[int]) -> Dict[str, Dict]:
+    """
+    Run the benchmarks of the given names, and return a dict mapping the names of all their results
+    to the results, see measure.
+
+    Raise FailedToDownloadResourceException if our data sets could not be initialized.
+    """
+    results = {}
+    if 'verify_deep' in names or 'verify_manifest' in names:
+        verification = benchmark_verification(repeat)
+        results.update({name: result for name, result in verification.items() if name in names})
+
+    if 'init_data' in names:
+        results['init_data[1x]'] = benchmark_init_data(repeat)
+        directory = tempfile.mkdtemp(prefix='csc110-benchmark-')
+        try:
+            for scale in scales:
+                logging.info(f'Benchmarking init_data on {scale}x data sets...')
+                results[f'init_data[{scale}x]'] = \
+                    benchmark_scaled_init_data(repeat, scale, directory)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    gui_names = [name for name in ('update_plot', 'render', 'pan', 'zoom') if name in names]
+    if gui_names != []:
+        if data.GLOBAL_COVID_CASES == []:
+            init_data()
+        results.update(benchmark_gui(gui_names, repeat))
+    return results
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    """
+    Print the results next to the baseline, and return the names of the benchmarks slower than
+    their baselines by more than threshold (a fraction).
+
+    >>> compare({'a': {'seconds': 1.5}, 'b': {'seconds': 1.0}}, {'a': {'seconds': 1.0}}, 0.25)
+    a                                   1.500000 s     1.000000 s   +50.0%  REGRESSION
+    b                                   1.000000 s              -        -  new
+    ['a']
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            print(f'{name:<32}{result["seconds"]:>12.6f} s{"-":>15}{"-":>9}  new')
+            continue
+        change = result['seconds'] / baseline[name]['seconds'] - 1
+        status = 'REGRESSION' if change > threshold else 'ok'
+        if change > threshold:
+            regressions.append(name)
+        print(f'{name:<32}{result["seconds"]:>12.6f} s{baseline[name]["seconds"]:>13.6f} s'
+              f'{change:>+9.1%}  {status}')
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    The entry of the benchmark. Return the exit code, 1 if a benchmark regressed or could not run.
+    """
+    parser = argparse.ArgumentParser(description='Benchmark our program for regressions.')
+    parser.add_argument('--repeat', type=int, default=3, help='number of runs of each benchmark')
+    parser.add_argument('--scales', type=int, nargs='*', default=[10],
+                        help='the times the synthetic data sets of init_data are scaled up')
+    parser.add_argument('--only', nargs='+', choices=BENCHMARKS, default=BENCHMARKS,
+                        help='only run these benchmarks')
+    parser.add_argument('--json', help='write the results into this JSON file')
+    parser.add_argument('--baseline', help='compare the results with this JSON file')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='the fraction a benchmark may be slower than its baseline')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(stream=sys.stdout, level=logging.WARNING, format=settings.LOG_FORMAT)
+    config = Config('config.json')
+    settings.init_setting(config['setting'])
+    # The timings of init_data are part of our results instead.
+    settings.INIT_TIMINGS_PATH = ''
+    register_resources(config['resource'])
+
+    try:
+        results = run_benchmarks(args.only, args.repeat, args.scales)
+    except FailedToDownloadResourceException as e:
+        logging.critical(f'Failed to initialize our data sets: {e}')
+        return 1
+
+    baseline = {}
+    if args.baseline is not None:
+        with open(args.baseline) as file:
+            baseline = json.load(file)['benchmarks']
+    regressions = compare(results, baseline, args.threshold)
+
+    if args.json is not None:
+        with open(args.json, 'w') as file:
+            json.dump({'timestamp' : datetime.datetime.now().isoformat(timespec='seconds'),
+                       'python'    : platform.python_version(),
+                       'platform'  : platform.platform(),
+                       'repeat'    : args.repeat,
+                       'benchmarks': results}, file, indent=4)
+
+    if regressions != []:
+        print(f'{len(regressions)} benchmarks regressed by more than {args.threshold:.0%}: '
+              f'{", ".join(regressions)}')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,265 @@
+"""
+This module converts a dataset.Dataset to and from Apache Arrow tables, and writes and reads them
+as Parquet or Feather files, so pipelines that speak Arrow can use our data sets directly.
+
+Tables:
+    - covid_cases: country, province, date, cases. One row for every location on every date,
+      location by location in the order of Dataset.locations, then date by date. So the cases
+      column is exactly Dataset.location_cases, row by row, and reading it needs no copy. The
+      province is an empty string for country-wide rows.
+    - school_closures: country, date, status. One row for every closure status that is not
+      missing. Statuses are the values of data.ClosureStatus.
+
+Feather files are written uncompressed and memory-mapped when read, so the cases are never copied.
+Parquet files are smaller, but are always decoded.
+
+pyarrow is optional, only this module needs it.
+
+Usage:
+    python columnar.py DIRECTORY [--format parquet|feather]
+"""
+# Future features
+from __future__ import annotations
+
+# Python built-ins
+import argparse
+import logging
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+# NumPy
+import numpy
+
+# Our modules
+import data
+import settings
+from dataset import MISSING_STATUS, Dataset
+from resource_manager import Config, register_resources
+
+# Arrow is optional
+try:
+    import pyarrow
+    import pyarrow.feather
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# The names of the tables, also the names of their files.
+COVID_TABLE_NAME = 'covid_cases'
+CLOSURE_TABLE_NAME = 'school_closures'
+
+# The supported file formats, mapped to their extensions, in the order read_dataset looks for them.
+FORMATS = {
+    'feather': '.feather',
+    'parquet': '.parquet'
+}
+
+
+# =================================================================================================
+# Tables
+# =================================================================================================
+
+def covid_table(dataset: Dataset) -> pyarrow.Table:
+    """
+    Return the covid_cases table of the given dataset. The cases column shares the memory of
+    dataset.location_cases.
+    """
+    locations, dates = len(dataset.locations), len(dataset.dates)
+    provinces = sorted({province for _, province in dataset.locations})
+    province_indices = {province: i for i, province in enumerate(provinces)}
+    country_rows = numpy.array([dataset.country_indices[country]
+                                for country, _ in dataset.locations], dtype=numpy.int32)
+    province_rows = numpy.array([province_indices[province]
+                                 for _, province in dataset.locations], dtype=numpy.int32)
+    return pyarrow.table({
+        'country' : pyarrow.DictionaryArray.from_arrays(numpy.repeat(country_rows, dates),
+                                                        dataset.countries),
+        'province': pyarrow.DictionaryArray.from_arrays(numpy.repeat(province_rows, dates),
+                                                        provinces),
+        'date'    : pyarrow.array(numpy.tile(dataset.dates, locations)),
+        'cases'   : pyarrow.array(dataset.location_cases.reshape(-1))
+    })
+
+
+def closure_table(dataset: Dataset) -> pyarrow.Table:
+    """
+    Return the school_closures table of the given dataset.
+    """
+    present = dataset.closure_statuses != MISSING_STATUS
+    rows, columns = numpy.nonzero(present)
+    return pyarrow.table({
+        'country': pyarrow.DictionaryArray.from_arrays(rows.astype(numpy.int32),
+                                                       dataset.closure_countries),
+        'date'   : pyarrow.array(dataset.closure_dates[columns]),
+        'status' : pyarrow.array(dataset.closure_statuses[present])
+    })
+
+
+def dataset_from_tables(covid: pyarrow.Table, closures: Optional[pyarrow.Table] = None) \
+        -> Dataset:
+    """
+    Return a Dataset of the given covid_cases table and (optionally) school_closures table.
+
+    The cases are not copied if the cases column has a single chunk, like the tables read from
+    Feather files written by write_dataset.
+
+    Raise ValueError if the covid_cases table does not have one row for every location on every
+    date, ordered like covid_table.
+    """
+    cases = covid.column('cases')
+    cases = cases.chunk(0) if cases.num_chunks == 1 else cases.combine_chunks()
+    if cases.null_count != 0:
+        raise ValueError('The cases column has missing values')
+    location_cases = cases.to_numpy(zero_copy_only=False).astype(numpy.int64, copy=False)
+
+    # The dates of the first location, which all locations must have
+    all_dates = covid.column('date').to_numpy().astype('datetime64[D]')
+    backwards = numpy.flatnonzero(all_dates[1:] <= all_dates[:-1])
+    dates = all_dates[:backwards[0] + 1] if len(backwards) else all_dates
+    if len(dates) == 0 or len(all_dates) % len(dates) != 0 \
+            or not (all_dates.reshape((-1, len(dates))) == dates).all():
+        raise ValueError('Every location must have the same dates in the same order')
+    location_cases = location_cases.reshape((-1, len(dates)))
+
+    # Only the first row of every location is converted to Python objects
+    first_rows = pyarrow.array(numpy.arange(0, len(all_dates), len(dates)))
+    countries = covid.column('country').take(first_rows).to_pylist()
+    provinces = covid.column('province').take(first_rows).to_pylist()
+    locations = [(country, province or '') for country, province in zip(countries, provinces)]
+
+    if closures is None:
+        closure_dates = numpy.zeros(0, dtype='datetime64[D]')
+        closure_countries, closure_statuses = [], numpy.zeros((0, 0), dtype=numpy.int8)
+    else:
+        closure_dates, closure_countries, closure_statuses = group_closure_table(closures)
+    return Dataset(dates, locations, location_cases,
+                   closure_dates, closure_countries, closure_statuses)
+
+
+def group_closure_table(closures: pyarrow.Table) \
+        -> Tuple[numpy.ndarray, List[str], numpy.ndarray]:
+    """
+    Group the rows of a school_closures table into the dates, the sorted countries, and the
+    statuses array of shape (countries, dates), like dataset.group_closures, without converting
+    every row to Python objects.
+    """
+    encoded = closures.column('country')
+    encoded = encoded.chunk(0) if encoded.num_chunks == 1 else encoded.combine_chunks()
+    if not pyarrow.types.is_dictionary(encoded.type):
+        encoded = encoded.dictionary_encode()
+    names = encoded.dictionary.to_pylist()
+    countries = sorted(set(names))
+    # Map the dictionary to the sorted countries (a dictionary may repeat a value)
+    name_rows = numpy.array([countries.index(name) for name in names], dtype=numpy.int64)
+    rows = name_rows[encoded.indices.to_numpy(zero_copy_only=False)]
+
+    record_dates = closures.column('date').to_numpy().astype('datetime64[D]')
+    dates = numpy.unique(record_dates)
+    statuses = numpy.full((len(countries), len(dates)), MISSING_STATUS, dtype=numpy.int8)
+    statuses[rows, numpy.searchsorted(dates, record_dates)] = \
+        closures.column('status').to_numpy()
+    return dates, countries, statuses
+
+
+# =================================================================================================
+# Files
+# =================================================================================================
+
+def table_paths(directory: str, file_format: str) -> Dict[str, str]:
+    """
+    Return a dict mapping the names of the tables to their files of the given format in the given
+    directory.
+    """
+    return {name: os.path.join(directory, name + FORMATS[file_format])
+            for name in (COVID_TABLE_NAME, CLOSURE_TABLE_NAME)}
+
+
+def write_dataset(dataset: Dataset, directory: str, file_format: str = 'parquet') -> List[str]:
+    """
+    Write the tables of the given dataset into the given directory as files of the given format,
+    and return their paths.
+
+    Raise ValueError if the format is not supported, and RuntimeError if pyarrow is not installed.
+    """
+    if file_format not in FORMATS:
+        raise ValueError(f'Tables can only be written as {", ".join(FORMATS)}')
+    if pyarrow is None:
+        raise RuntimeError('Writing Parquet and Feather files needs pyarrow')
+
+    os.makedirs(directory, exist_ok=True)
+    paths = table_paths(directory, file_format)
+    for name, table in ((COVID_TABLE_NAME, covid_table(dataset)),
+                        (CLOSURE_TABLE_NAME, closure_table(dataset))):
+        if file_format == 'feather':
+            # One uncompressed chunk, so the cases could be memory-mapped as one array
+            pyarrow.feather.write_feather(table, paths[name], compression='uncompressed',
+                                          chunksize=max(1, table.num_rows))
+        else:
+            pyarrow.parquet.write_table(table, paths[name], row_group_size=max(1, table.num_rows))
+    return list(paths.values())
+
+
+def read_dataset(directory: str) -> Dataset:
+    """
+    Read a Dataset from the tables written by write_dataset into the given directory. Feather files
+    are preferred to Parquet files, since they are memory-mapped.
+
+    Raise FileNotFoundError if the directory has no covid_cases table, and RuntimeError if pyarrow
+    is not installed.
+    """
+    if pyarrow is None:
+        raise RuntimeError('Reading Parquet and Feather files needs pyarrow')
+    for file_format in FORMATS:
+        paths = table_paths(directory, file_format)
+        if os.path.exists(paths[COVID_TABLE_NAME]):
+            break
+    else:
+        raise FileNotFoundError(f'No {COVID_TABLE_NAME} table in {directory}')
+
+    if file_format == 'feather':
+        tables = {name: pyarrow.feather.read_table(path, memory_map=True)
+                  for name, path in paths.items() if os.path.exists(path)}
+    else:
+        tables = {name: pyarrow.parquet.read_table(path)
+                  for name, path in paths.items() if os.path.exists(path)}
+    return dataset_from_tables(tables[COVID_TABLE_NAME], tables.get(CLOSURE_TABLE_NAME))
+
+
+# =================================================================================================
+# Functions
+# =================================================================================================
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    The entry of the exporter. Return the exit code.
+    """
+    parser = argparse.ArgumentParser(description='Export our data sets as Parquet or Feather.')
+    parser.add_argument('directory', help='the directory of the exported files')
+    parser.add_argument('--format', choices=list(FORMATS), default='parquet',
+                        dest='file_format', help='the file format')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(stream=sys.stdout, level=settings.LOG_LEVEL, format=settings.LOG_FORMAT)
+    if pyarrow is None:
+        logging.critical('Exporting Parquet and Feather files needs pyarrow')
+        return 1
+
+    config = Config('config.json')
+    settings.init_setting(config['setting'])
+    register_resources(config['resource'])
+    data.init_data()
+    if 'Failed to' in data.progress_description:
+        logging.critical(data.progress_description)
+        return 1
+
+    timestamp1 = time.time()
+    paths = write_dataset(Dataset.from_data(), args.directory, args.file_format)
+    seconds_elapsed = round(time.time() - timestamp1, 3)
+    logging.info(f'Exported {", ".join(paths)} in {seconds_elapsed} seconds!')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
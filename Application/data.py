@@ -2,15 +2,18 @@
 This module contains all classes, functions, and constants for our data.
 """
 # Python built-ins
+import bisect
 import csv
 import datetime
 import math
+import re
 from enum import Enum
-from typing import Any, List, Set
+from typing import Any, List, Optional, Set, Tuple
 
 # Our modules
 import algorithms
 import settings
+from instrumentation import Recorder
 from resource_manager import *
 
 
@@ -205,6 +208,126 @@ class SchoolClosureData(TimeBasedData):
         return f'Schools {self.status} in {self.country} at {self.date}'
 
 
+class ClosureTimeline:
+    """
+    The school closure statuses of a location over time, stored as runs of consecutive days with
+    the same status.
+
+    Closure statuses change rarely, so a timeline holds a few dozen runs instead of one
+    SchoolClosureData per day.
+
+    Instance Attributes:
+        - starts: The first date of every run.
+        - ends: The last date of every run.
+        - statuses: The closure status of every run.
+
+    Representation Invariants:
+        - len(self.starts) == len(self.ends) == len(self.statuses)
+        - all(self.starts[i] <= self.ends[i] for i in range(len(self.starts)))
+        - all(self.ends[i] < self.starts[i + 1] for i in range(len(self.starts) - 1))
+
+    >>> timeline = ClosureTimeline.from_closures([
+    ...     SchoolClosureData(datetime.date(2020, 3, 1), ClosureStatus.FULLY_OPEN),
+    ...     SchoolClosureData(datetime.date(2020, 3, 2), ClosureStatus.FULLY_OPEN),
+    ...     SchoolClosureData(datetime.date(2020, 3, 3), ClosureStatus.CLOSED)])
+    >>> len(timeline)
+    2
+    >>> timeline.status_on(datetime.date(2020, 3, 2))
+    <ClosureStatus.FULLY_OPEN: 1>
+    """
+    starts: List[datetime.date]
+    ends: List[datetime.date]
+    statuses: List[ClosureStatus]
+
+    def __init__(self) -> None:
+        """Initialize an empty ClosureTimeline object"""
+        self.starts = []
+        self.ends = []
+        self.statuses = []
+
+    @classmethod
+    def from_closures(cls, closures: List[SchoolClosureData]) -> 'ClosureTimeline':
+        """
+        Return the timeline of the given closures.
+
+        Preconditions:
+            - closures is sorted by date, with at most one closure on each date
+        """
+        timeline = cls()
+        for closure in closures:
+            timeline.append(closure.date, closure.status)
+        return timeline
+
+    def __len__(self) -> int:
+        """Return the number of runs"""
+        return len(self.starts)
+
+    def append(self, date: datetime.date, status: ClosureStatus) -> None:
+        """
+        Append the status on the given date, extending the last run if the date is the day after it
+        and the status is the same.
+
+        Preconditions:
+            - self.ends == [] or date > self.ends[-1]
+        """
+        if self.ends != [] and self.statuses[-1] == status \
+                and (date - self.ends[-1]).days == 1:
+            self.ends[-1] = date
+        else:
+            self.starts.append(date)
+            self.ends.append(date)
+            self.statuses.append(status)
+
+    def status_on(self, date: datetime.date) -> Optional[ClosureStatus]:
+        """
+        Return the status on the given date, or None if there is no status on that date.
+        """
+        index = bisect.bisect_right(self.starts, date) - 1
+        if index < 0 or date > self.ends[index]:
+            return None
+        return self.statuses[index]
+
+    def clip(self, start: datetime.date, end: datetime.date) -> 'ClosureTimeline':
+        """
+        Return the part of this timeline from start to end (inclusive).
+        """
+        timeline = ClosureTimeline()
+        first = bisect.bisect_left(self.ends, start)
+        last = bisect.bisect_right(self.starts, end)
+        timeline.starts = self.starts[first:last]
+        timeline.ends = self.ends[first:last]
+        timeline.statuses = self.statuses[first:last]
+        if first < last:
+            timeline.starts[0] = max(timeline.starts[0], start)
+            timeline.ends[-1] = min(timeline.ends[-1], end)
+        return timeline
+
+    def step_data(self) -> Tuple[List[datetime.date], List[float]]:
+        """
+        Return the x and y data that draw this timeline as steps (with drawstyle 'steps-post').
+        Each run is a horizontal segment to the start of the next run, and days without a status
+        are left blank.
+
+        >>> timeline = ClosureTimeline()
+        >>> timeline.append(datetime.date(2020, 3, 1), ClosureStatus.CLOSED)
+        >>> timeline.append(datetime.date(2020, 3, 2), ClosureStatus.CLOSED)
+        >>> timeline.step_data()
+        ([datetime.date(2020, 3, 1), datetime.date(2020, 3, 2)], [3, 3])
+        """
+        x_data, y_data = [], []
+        for i in range(len(self.starts)):
+            x_data.append(self.starts[i])
+            y_data.append(self.statuses[i].value)
+            if i + 1 == len(self.starts) or (self.starts[i + 1] - self.ends[i]).days > 1:
+                # The end of the last run, or of a run followed by days without a status
+                x_data.append(self.ends[i])
+                y_data.append(self.statuses[i].value)
+                if i + 1 < len(self.starts):
+                    x_data.append(self.ends[i])
+                    y_data.append(math.nan)
+        return x_data, y_data
+
+
 # =================================================================================================
 # Constants
 # =================================================================================================
@@ -221,14 +344,25 @@ COUNTRIES_TO_COVID_CASES: Dict[Country, List[CovidCaseData]] = {}
 # Global covid cases (whole earth)
 GLOBAL_COVID_CASES: List[CovidCaseData] = []
 
+# The header of the covid cases data set and the (province, country) names of its rows, as read by
+# read_covid_data_global. See refresh_covid_data.
+COVID_HEADER: List[str] = []
+COVID_ROW_NAMES: List[Tuple[str, str]] = []
+
+# The province and the country at the start of a row of the covid cases data set. Either may be
+# quoted, since names like "Korea, South" contain commas.
+COVID_NAMES_PATTERN = re.compile(r'(?:"(?:[^"]|"")*"|[^,"]*),(?:"(?:[^"]|"")*"|[^,"]*)')
+
 # =================================================================================================
 # School closures
 # All school closures from our datasets.
 ALL_SCHOOL_CLOSURES: List[SchoolClosureData] = []
 
-COUNTRIES_TO_SCHOOL_CLOSURES: Dict[Country, List[SchoolClosureData]] = {}
+# The school closures of every country and of the whole earth, as run-length encoded timelines
+# instead of one SchoolClosureData per day, see ClosureTimeline.
+COUNTRIES_TO_CLOSURE_TIMELINES: Dict[Country, ClosureTimeline] = {}
 
-GLOBAL_SCHOOL_CLOSURES: List[SchoolClosureData] = []
+GLOBAL_CLOSURE_TIMELINE: ClosureTimeline = ClosureTimeline()
 
 # =================================================================================================
 # Locations
@@ -266,6 +400,10 @@ ENUM_TO_STATUS_DICT = {
     ClosureStatus.CLOSED        : 'Closed due to COVID-19'
 }
 
+# The countries whose covid cases are only given by province, see
+# calculate_country_total_covid_cases.
+PROVINCE_TOTAL_COUNTRIES: List[str] = ['China', 'Canada', 'Australia']
+
 # Country names in the closure data set will be replaced by the value.
 CLOSURE_COUNTRY_NAMES_FIX: Dict[str, str] = {
     'Bolivia (Plurinational State of)'                    : 'Bolivia',
@@ -337,6 +475,9 @@ TOTAL_PROGRESS = TOTAL_NUMBER_DATA + \
 progress = 0
 progress_description = ''
 
+# The stages of the last data.init_data, see instrumentation.Recorder
+INIT_DATA_RECORDER = Recorder('init_data')
+
 
 # =================================================================================================
 # Functions
@@ -344,61 +485,89 @@ progress_description = ''
 # =================================================================================================
 
 def init_data() -> None:
-    """Read and process all data needed."""
+    """
+    Read and process all data needed.
+
+    Every stage is measured by INIT_DATA_RECORDER, see instrumentation.py. The slowest stages are
+    shown in progress_description, and all of them are written into settings.INIT_TIMINGS_PATH.
+    """
     global progress
     global progress_description
+    INIT_DATA_RECORDER.clear()
 
     progress_description = 'Checking and downloading resources...'
-    try:
-        init_resources()
-    except FailedToDownloadResourceException as e:
-        progress_description = str(e)
-        return
+    with INIT_DATA_RECORDER.span('resource check') as span:
+        try:
+            init_resources()
+        except FailedToDownloadResourceException as e:
+            progress_description = str(e)
+            return
+        span.rows = len(RESOURCES_DICT)
     progress += math.ceil(TOTAL_NUMBER_DATA * 0.01)
 
     logging.info('Initializing data...')
-    import time
-    timestamp1 = time.time()
 
     progress_description = 'Reading data...'
-    read_covid_data_global(RESOURCES_DICT[COVID19_RESOURCE_NAME].local_path)
-    read_closure_data(RESOURCES_DICT[SCHOOL_CLOSURE_RESOURCE_NAME].local_path)
+    with INIT_DATA_RECORDER.span('covid parse') as span:
+        read_covid_data_global(RESOURCES_DICT[COVID19_RESOURCE_NAME].local_path)
+        span.rows = len(ALL_COVID_CASES)
+    with INIT_DATA_RECORDER.span('closure parse') as span:
+        read_closure_data(RESOURCES_DICT[SCHOOL_CLOSURE_RESOURCE_NAME].local_path)
+        span.rows = len(ALL_SCHOOL_CLOSURES)
 
     progress_description = 'Manipulating data...'
     # Init locations
-    SORTED_COUNTRIES.extend(settings.sort(list(COUNTRIES),
-                                          compare=lambda c1, c2: 1 if c1.name > c2.name else -1))
-    SORTED_PROVINCES.extend(settings.sort(list(p for p in PROVINCES),
-                                          compare=lambda p1, p2: 1 if p1.name > p2.name else -1))
-
-    global COUNTRIES_TO_PROVINCES
-    COUNTRIES_TO_PROVINCES = algorithms.group(SORTED_PROVINCES, lambda p: p.country)
-
-    # Init covid cases
-    global COUNTRIES_TO_ALL_COVID_CASES
-    COUNTRIES_TO_ALL_COVID_CASES = algorithms.group(ALL_COVID_CASES, lambda c: c.country)
-    global COUNTRIES_TO_COVID_CASES
-    COUNTRIES_TO_COVID_CASES = {k: algorithms.linear_predicate(
-            COUNTRIES_TO_ALL_COVID_CASES[k], lambda c: c.province is None
-    ) for k in COUNTRIES_TO_ALL_COVID_CASES}
+    with INIT_DATA_RECORDER.span('sort') as span:
+        SORTED_COUNTRIES.extend(settings.sort(
+                list(COUNTRIES), compare=lambda c1, c2: 1 if c1.name > c2.name else -1))
+        SORTED_PROVINCES.extend(settings.sort(
+                list(p for p in PROVINCES), compare=lambda p1, p2: 1 if p1.name > p2.name else -1))
+        span.rows = len(SORTED_COUNTRIES) + len(SORTED_PROVINCES)
+
+    with INIT_DATA_RECORDER.span('group') as span:
+        global COUNTRIES_TO_PROVINCES
+        COUNTRIES_TO_PROVINCES = algorithms.group(SORTED_PROVINCES, lambda p: p.country)
+
+        # Init covid cases
+        global COUNTRIES_TO_ALL_COVID_CASES
+        COUNTRIES_TO_ALL_COVID_CASES = algorithms.group(ALL_COVID_CASES, lambda c: c.country)
+        global COUNTRIES_TO_COVID_CASES
+        COUNTRIES_TO_COVID_CASES = {k: algorithms.linear_predicate(
+                COUNTRIES_TO_ALL_COVID_CASES[k], lambda c: c.province is None
+        ) for k in COUNTRIES_TO_ALL_COVID_CASES}
+
+        # Init school closures, the groups are only kept as timelines
+        global COUNTRIES_TO_CLOSURE_TIMELINES
+        COUNTRIES_TO_CLOSURE_TIMELINES = {k: ClosureTimeline.from_closures(v) for k, v in
+                                          algorithms.group(ALL_SCHOOL_CLOSURES,
+                                                           lambda c: c.country).items()}
+        span.rows = len(SORTED_PROVINCES) + len(ALL_COVID_CASES) + len(ALL_SCHOOL_CLOSURES)
+
     # Special cases: Canada, China, and Australia
-    specials = ['China', 'Canada', 'Australia']
-    for country_name in specials:
-        country = Country(country_name)
-        COUNTRIES_TO_COVID_CASES[country] = calculate_country_total_covid_cases(country)
-    # Global covid cases (No country, whole earth)
-    init_global_total_covid_cases()
+    with INIT_DATA_RECORDER.span('province aggregation') as span:
+        for country_name in PROVINCE_TOTAL_COUNTRIES:
+            country = Country(country_name)
+            COUNTRIES_TO_COVID_CASES[country] = calculate_country_total_covid_cases(country)
+            span.rows += len(COUNTRIES_TO_ALL_COVID_CASES[country])
     progress += math.ceil(TOTAL_NUMBER_DATA * 0.01)
 
-    # Init school closures
-    global COUNTRIES_TO_SCHOOL_CLOSURES
-    COUNTRIES_TO_SCHOOL_CLOSURES = algorithms.group(ALL_SCHOOL_CLOSURES, lambda c: c.country)
-    init_global_school_closures()
+    # Global covid cases and school closures (No country, whole earth)
+    with INIT_DATA_RECORDER.span('global rollups') as span:
+        init_global_total_covid_cases()
+        init_global_school_closures()
+        span.rows = sum(len(cases) for cases in COUNTRIES_TO_COVID_CASES.values()) \
+            + len(ALL_SCHOOL_CLOSURES)
+
+    seconds_elapsed = round(INIT_DATA_RECORDER.total_seconds(), 3)
+    for span in INIT_DATA_RECORDER.spans:
+        logging.info(f'{span.name}: {round(span.wall_seconds, 3)} seconds, '
+                     f'{round(span.cpu_seconds, 3)} CPU seconds, {span.rows} rows')
+    if settings.INIT_TIMINGS_PATH != '':
+        INIT_DATA_RECORDER.write_json(settings.INIT_TIMINGS_PATH, sort=settings.sort.__name__)
+    progress_description = f'Ready in {seconds_elapsed} seconds with {settings.sort.__name__}! ' \
+                           f'Slowest: {INIT_DATA_RECORDER.summary()}'
+    # The progress is completed after the description, so the timings reach the status bar.
     progress += math.ceil(TOTAL_NUMBER_DATA * 0.01)
-
-    timestamp2 = time.time()
-    seconds_elapsed = round(timestamp2 - timestamp1, 3)
-    progress_description = f'Ready in {seconds_elapsed} seconds with {settings.sort.__name__}!'
     logging.info(f'Successfully initialized all data in '
                  f'{seconds_elapsed} seconds!')
 
@@ -415,9 +584,12 @@ def reset_data() -> None:
     COUNTRIES_TO_ALL_COVID_CASES.clear()
     COUNTRIES_TO_COVID_CASES.clear()
     GLOBAL_COVID_CASES.clear()
+    COVID_HEADER.clear()
+    COVID_ROW_NAMES.clear()
     ALL_SCHOOL_CLOSURES.clear()
-    COUNTRIES_TO_SCHOOL_CLOSURES.clear()
-    GLOBAL_SCHOOL_CLOSURES.clear()
+    COUNTRIES_TO_CLOSURE_TIMELINES.clear()
+    global GLOBAL_CLOSURE_TIMELINE
+    GLOBAL_CLOSURE_TIMELINE = ClosureTimeline()
     COUNTRIES.clear()
     SORTED_COUNTRIES.clear()
     PROVINCES.clear()
@@ -427,6 +599,7 @@ def reset_data() -> None:
     progress = 0
     global progress_description
     progress_description = ''
+    INIT_DATA_RECORDER.clear()
 
 
 def get_progress() -> tuple[float, str]:
@@ -436,12 +609,13 @@ def get_progress() -> tuple[float, str]:
 
 def init_global_school_closures() -> None:
     """
-    Initialize the global variable GLOBAL_SCHOOL_CLOSURES.
+    Initialize the global variable GLOBAL_CLOSURE_TIMELINE.
 
     Basically, this function calculates the total school closures for every country on a day
     and choose the status with the greatest number of schools as the status for that day.
     """
-    global GLOBAL_SCHOOL_CLOSURES
+    global GLOBAL_CLOSURE_TIMELINE
+    GLOBAL_CLOSURE_TIMELINE = ClosureTimeline()
     current_date = ALL_SCHOOL_CLOSURES[0].date
     num_of_status = {
         ClosureStatus.CLOSED        : 0,
@@ -456,7 +630,7 @@ def init_global_school_closures() -> None:
             keys = list(num_of_status.keys())
             values = list(num_of_status.values())
             index = values.index(max(values))
-            GLOBAL_SCHOOL_CLOSURES.append(SchoolClosureData(current_date, keys[index]))
+            GLOBAL_CLOSURE_TIMELINE.append(current_date, keys[index])
             current_date = closure.date
             for k in num_of_status:
                 num_of_status[k] = 0
@@ -508,16 +682,20 @@ def read_covid_data_global(filename: str) -> None:
     """
     Read the resources/covid_cases_datasets/time_series_covid19_confirmed_global.csv
     into ALL_COVID_CASES.
+
+    The file is read through a memory-mapped view, see resource_manager.open_lines.
     """
-    with open(filename) as file:
+    with open_lines(filename) as file:
         reader = csv.reader(file)
 
         # Reads the first line header of the given file
         header = next(reader)
+        COVID_HEADER.extend(header)
 
         for row in reader:
             country = Country(row[1])
             province = Province(row[0], country)
+            COVID_ROW_NAMES.append((row[0], row[1]))
 
             if not is_in_ascii(country.name) or country.name in COVID_COUNTRIES_DELETE:
                 continue
@@ -530,11 +708,7 @@ def read_covid_data_global(filename: str) -> None:
                 province = None
 
             for i in range(4, len(header)):
-                raw_date = header[i].split('/')
-                d = datetime.date(year=int(f'20{raw_date[2]}'),
-                                  month=int(raw_date[0]),
-                                  day=int(raw_date[1])
-                                  )
+                d = parse_covid_date(header[i])
 
                 ALL_COVID_CASES.append(CovidCaseData(date=d,
                                                      country=country,
@@ -544,12 +718,119 @@ def read_covid_data_global(filename: str) -> None:
                 progress += 1
 
 
+def refresh_covid_data(filename: str) -> Optional[int]:
+    """
+    Read the dates added to the covid cases data set since it was read by read_covid_data_global,
+    and return the number of dates added.
+
+    Only the new columns are converted into CovidCaseData, and the country and global rollups
+    (COUNTRIES_TO_COVID_CASES and GLOBAL_COVID_CASES) are only updated on the new dates, so a
+    daily refresh takes O(locations) time instead of O(locations * dates).
+
+    Return None and change nothing if the data set changed in another way, like its locations or
+    its earlier dates. Then it should be read again with reset_data and init_data.
+
+    Note:
+        - After a refresh, the cases of the new dates follow all earlier cases in
+          ALL_COVID_CASES and COUNTRIES_TO_ALL_COVID_CASES, instead of the cases of their
+          locations.
+        - This function should only be called after data are initialized.
+    """
+    start = len(COVID_HEADER)
+    header, row_names, columns = read_covid_columns(filename, start)
+    if len(header) < start or header[:start] != COVID_HEADER or row_names != COVID_ROW_NAMES:
+        return None
+
+    new_dates = [parse_covid_date(raw_date) for raw_date in header[start:]]
+    if new_dates == []:
+        return 0
+
+    # The new cases of every row of every country, in the order of the rows
+    countries_to_new_cases: Dict[Country, List[List[CovidCaseData]]] = {}
+    for (province_name, country_name), row in zip(row_names, columns):
+        country = Country(country_name)
+        if not is_in_ascii(country.name) or country.name in COVID_COUNTRIES_DELETE:
+            continue
+        province = Province(province_name, country) if province_name != '' else None
+        new_cases = [CovidCaseData(d, int(cases), country, province)
+                     for d, cases in zip(new_dates, row)]
+        ALL_COVID_CASES.extend(new_cases)
+        COUNTRIES_TO_ALL_COVID_CASES[country].extend(new_cases)
+        countries_to_new_cases.setdefault(country, []).append(new_cases)
+        if province is None and country.name not in PROVINCE_TOTAL_COUNTRIES:
+            COUNTRIES_TO_COVID_CASES[country].extend(new_cases)
+
+    # The same provinces as calculate_country_total_covid_cases
+    for country_name in PROVINCE_TOTAL_COUNTRIES:
+        country = Country(country_name)
+        province_rows = countries_to_new_cases[country]
+        province_rows = province_rows[:1] + province_rows[2:len(COUNTRIES_TO_PROVINCES[country])]
+        COUNTRIES_TO_COVID_CASES[country].extend(
+                CovidCaseData(d, sum(cases[i].cases for cases in province_rows), country)
+                for i, d in enumerate(new_dates))
+
+    # The same sums as init_global_total_covid_cases
+    new_total_cases = [0] * len(new_dates)
+    for country_cases in COUNTRIES_TO_COVID_CASES.values():
+        if len(country_cases) >= len(new_dates):
+            for i, case in enumerate(country_cases[-len(new_dates):]):
+                new_total_cases[i] += case.cases
+    GLOBAL_COVID_CASES.extend(CovidCaseData(d, cases)
+                              for d, cases in zip(new_dates, new_total_cases))
+
+    COVID_HEADER.extend(header[start:])
+    logging.info(f'Refreshed {len(new_dates)} new dates of covid cases, '
+                 f'up to {new_dates[-1]}.')
+    return len(new_dates)
+
+
+def read_covid_columns(filename: str, start: int) \
+        -> Tuple[List[str], List[Tuple[str, str]], List[List[str]]]:
+    """
+    Read the header of the covid cases data set, the (province, country) names of its rows, and
+    the columns of every row from the start-th column on.
+
+    Only the header and the names are parsed by csv, see COVID_NAMES_PATTERN. The columns are
+    split off the end of every line, so reading the few dates added since the data set was last
+    read does not split every column of every row.
+
+    Preconditions:
+        - start >= 2
+    """
+    with open_lines(filename) as file:
+        header = next(csv.reader([next(file, '')]))
+        num_columns = max(0, len(header) - start)
+        row_names = []
+        columns = []
+        for line in file:
+            line = line.rstrip('\r\n')
+            if line == '':
+                continue
+            province, country = next(csv.reader([COVID_NAMES_PATTERN.match(line).group()]))
+            row_names.append((province, country))
+            columns.append(line.rsplit(',', num_columns)[1:] if num_columns > 0 else [])
+    return header, row_names, columns
+
+
+def parse_covid_date(raw_date: str) -> datetime.date:
+    """
+    Parse a date of the header of the covid cases data set.
+
+    >>> parse_covid_date('1/22/20')
+    datetime.date(2020, 1, 22)
+    """
+    month, day, year = raw_date.split('/')
+    return datetime.date(year=int(f'20{year}'), month=int(month), day=int(day))
+
+
 def read_closure_data(filename: str) -> None:
     """
     Read the resources/school_closures_datasets/full_dataset_31_oct.csv
     into ALL_SCHOOL_CLOSURES
+
+    The file is read through a memory-mapped view, see resource_manager.open_lines.
     """
-    with open(filename) as file:
+    with open_lines(filename) as file:
         reader = csv.reader(file)
 
         next(reader)
@@ -597,9 +878,10 @@ if __name__ == '__main__':
     import python_ta
 
     python_ta.check_all(config={
-        'extra-imports'  : ['csv', 'datetime', 'math', 'enum', 'typing', 'algorithms', 'settings',
-                            'resource_manager', 'time'],
-        'allowed-io'     : ['init_data', 'read_covid_data_global', 'read_closure_data'],
+        'extra-imports'  : ['bisect', 'csv', 'datetime', 'math', 're', 'enum', 'typing',
+                            'algorithms', 'settings', 'instrumentation', 'resource_manager'],
+        'allowed-io'     : ['init_data', 'read_covid_data_global', 'read_covid_columns',
+                            'read_closure_data'],
         'max-line-length': 100,
         'disable'        : ['R1705', 'C0200', 'E9989', 'R1702', 'E9997', 'W0401', 'E9959', 'C0415']
     })
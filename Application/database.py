@@ -0,0 +1,371 @@
+"""
+This module contains CaseDatabase, an optional SQLite store of our data sets.
+
+A Dataset is written into the database once, and then the database answers the same range queries
+as Dataset with indexed SELECTs, without reading or parsing the CSV files. So a program that
+starts from the database (see server.py --database) needs no parsing at all, and only keeps the
+rows it asks for in memory.
+
+Tables:
+    - locations: The (country, province) pairs of the covid cases data set. counted is 1 if the
+      location counts towards the total of its country (see dataset.Dataset.counted_rows).
+    - covid_cases: The cases of every location on every day, keyed on (location_id, day).
+    - global_cases: The total cases of all countries on every day.
+    - closure_countries: The countries of the school closure data set.
+    - school_closures: The closure status of every country on every day it has one, keyed on
+      (country_id, day).
+    - global_closures: The most common closure status on every day.
+    - metadata: The identifiers of the data sets the database was built from.
+
+Days are stored as the number of days since 1970-01-01, like numpy.datetime64[D].
+
+>>> import datetime
+>>> ds = Dataset.load('resources/covid_cases_datasets/time_series_covid19_confirmed_global.csv')
+>>> database = CaseDatabase(':memory:')
+>>> database.store(ds, ['covid'])
+>>> dates, cases = database.cases('Canada', datetime.date(2021, 1, 1), datetime.date(2021, 1, 3))
+>>> [str(d) for d in dates]
+['2021-01-01', '2021-01-02', '2021-01-03']
+>>> cases.tolist() == ds.cases('Canada', '2021-01-01', '2021-01-03')[1].tolist()
+True
+>>> database.close()
+"""
+# Future features
+from __future__ import annotations
+
+# Python built-ins
+import datetime
+import itertools
+import json
+import sqlite3
+from typing import List, Optional, Tuple
+
+# NumPy
+import numpy
+
+# Our modules
+from dataset import MISSING_STATUS, Dataset, DateLike, group_closures
+
+# The version of the tables. A database of another version is built again.
+SCHEMA_VERSION = 2
+
+# The statements that create the tables and their indexes.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metadata (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS locations (
+    location_id INTEGER PRIMARY KEY,
+    country     TEXT    NOT NULL,
+    province    TEXT    NOT NULL,
+    counted     INTEGER NOT NULL,
+    UNIQUE (country, province)
+);
+CREATE INDEX IF NOT EXISTS locations_by_country ON locations (country, counted, location_id);
+CREATE TABLE IF NOT EXISTS covid_cases (
+    location_id INTEGER NOT NULL,
+    day         INTEGER NOT NULL,
+    cases       INTEGER NOT NULL,
+    PRIMARY KEY (location_id, day)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS covid_cases_by_day ON covid_cases (day, location_id, cases);
+CREATE TABLE IF NOT EXISTS global_cases (
+    day   INTEGER PRIMARY KEY,
+    cases INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS closure_countries (
+    country_id INTEGER PRIMARY KEY,
+    country    TEXT    NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS school_closures (
+    country_id INTEGER NOT NULL,
+    day        INTEGER NOT NULL,
+    status     INTEGER NOT NULL,
+    PRIMARY KEY (country_id, day)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS global_closures (
+    day    INTEGER PRIMARY KEY,
+    status INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+# The tables filled by CaseDatabase.store, in the order they are filled.
+DATA_TABLES = ['locations', 'covid_cases', 'global_cases', 'closure_countries', 'school_closures',
+               'global_closures']
+
+# The first and the last day that can be stored, used for open-ended date ranges.
+MIN_DAY = -(2 ** 31)
+MAX_DAY = 2 ** 31 - 1
+
+
+class CaseDatabase:
+    """
+    An SQLite database of a covid cases data set and a school closure data set, answering the same
+    queries as dataset.Dataset.
+
+    Every query returns a tuple of two arrays of the same length: the dates (numpy.datetime64[D])
+    and the values (int64 cases or int8 closure statuses, see data.ClosureStatus).
+
+    Instance Attributes:
+        - path: The path of the database file, or ':memory:'.
+        - connection: The connection to the database.
+        - countries: The sorted names of all countries in the covid cases data set.
+    """
+    path: str
+    connection: sqlite3.Connection
+    countries: List[str]
+
+    def __init__(self, path: str) -> None:
+        """
+        Open (or create) the database at the given path.
+
+        The database is in WAL mode, so other processes may read it while it is written.
+        """
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        if self.get_metadata('schema_version') not in (None, str(SCHEMA_VERSION)):
+            with self.connection:
+                for table in DATA_TABLES + ['metadata']:
+                    self.connection.execute(f'DROP TABLE IF EXISTS {table}')
+        self.connection.executescript(SCHEMA)
+        self.countries = self.select_countries()
+
+    def close(self) -> None:
+        """Close the connection to the database."""
+        self.connection.close()
+
+    # =============================================================================================
+    # Loading
+    # =============================================================================================
+
+    def get_metadata(self, key: str) -> Optional[str]:
+        """Return the value of the given metadata key, or None if it's not set."""
+        try:
+            row = self.connection.execute('SELECT value FROM metadata WHERE key = ?',
+                                          (key,)).fetchone()
+        except sqlite3.OperationalError:
+            # The table does not exist yet.
+            return None
+        return None if row is None else row[0]
+
+    def identifiers(self) -> List[str]:
+        """
+        Return the identifiers of the data sets this database was built from, or an empty list if
+        it's empty.
+        """
+        value = self.get_metadata('identifiers')
+        return [] if value is None else json.loads(value)
+
+    def store(self, dataset: Dataset, identifiers: List[str]) -> None:
+        """
+        Replace everything in this database with the given dataset, built from the data sets of the
+        given identifiers.
+
+        All rows are inserted with executemany in one transaction, so readers see either the old or
+        the new data sets, and a failure leaves the old data sets.
+        """
+        days = dataset.dates.astype(numpy.int64).tolist()
+        closure_days = dataset.closure_dates.astype(numpy.int64).tolist()
+        counted_rows = set(dataset.counted_rows())
+        present = dataset.closure_statuses != MISSING_STATUS
+        closure_rows, closure_columns = numpy.nonzero(present)
+
+        with self.connection:
+            for table in DATA_TABLES:
+                self.connection.execute(f'DELETE FROM {table}')
+            self.connection.executemany(
+                    'INSERT INTO locations VALUES (?, ?, ?, ?)',
+                    ((i, country, province, int(i in counted_rows))
+                     for i, (country, province) in enumerate(dataset.locations)))
+            self.connection.executemany(
+                    'INSERT INTO covid_cases VALUES (?, ?, ?)',
+                    zip(numpy.repeat(numpy.arange(len(dataset.locations)), len(days)).tolist(),
+                        itertools.cycle(days), dataset.location_cases.ravel().tolist()))
+            self.connection.executemany('INSERT INTO global_cases VALUES (?, ?)',
+                                        zip(days, dataset.global_cases.tolist()))
+            self.connection.executemany('INSERT INTO closure_countries VALUES (?, ?)',
+                                        enumerate(dataset.closure_countries))
+            self.connection.executemany(
+                    'INSERT INTO school_closures VALUES (?, ?, ?)',
+                    zip(closure_rows.tolist(),
+                        numpy.array(closure_days, dtype=numpy.int64)[closure_columns].tolist(),
+                        dataset.closure_statuses[present].tolist()))
+            self.connection.executemany('INSERT INTO global_closures VALUES (?, ?)',
+                                        zip(closure_days,
+                                            dataset.global_closure_statuses.tolist()))
+            self.connection.executemany('INSERT OR REPLACE INTO metadata VALUES (?, ?)',
+                                        [('schema_version', str(SCHEMA_VERSION)),
+                                         ('identifiers', json.dumps(identifiers))])
+        self.connection.execute('ANALYZE')
+        self.countries = self.select_countries()
+
+    def to_dataset(self) -> Dataset:
+        """
+        Return a Dataset of everything in this database, without reading the CSV files.
+
+        Preconditions:
+            - self.identifiers() != []
+        """
+        locations = self.connection.execute(
+                'SELECT country, province FROM locations ORDER BY location_id').fetchall()
+        days = self.connection.execute(
+                'SELECT day FROM global_cases ORDER BY day').fetchall()
+        dates = numpy.array(days, dtype=numpy.int64).reshape(-1).astype('datetime64[D]')
+        cursor = self.connection.execute(
+                'SELECT cases FROM covid_cases ORDER BY location_id, day')
+        location_cases = numpy.fromiter((row[0] for row in cursor), dtype=numpy.int64,
+                                        count=len(locations) * len(dates))
+        location_cases = location_cases.reshape((len(locations), len(dates)))
+
+        records = [(country, numpy.datetime64(day, 'D'), status) for country, day, status in
+                   self.connection.execute('SELECT country, day, status FROM school_closures '
+                                           'JOIN closure_countries USING (country_id)')]
+        closure_dates, closure_countries, closure_statuses, _ = group_closures(records)
+        # The records are not in the order of their file, so the global statuses are read back
+        global_closure_statuses = numpy.array(
+                [row[0] for row in self.connection.execute(
+                        'SELECT status FROM global_closures ORDER BY day')], dtype=numpy.int8)
+        return Dataset(dates, locations, location_cases, closure_dates, closure_countries,
+                       closure_statuses, global_closure_statuses)
+
+    # =============================================================================================
+    # Queries
+    # =============================================================================================
+
+    def select_countries(self) -> List[str]:
+        """Return the sorted names of all countries in this database."""
+        return [row[0] for row in self.connection.execute(
+                'SELECT DISTINCT country FROM locations ORDER BY country')]
+
+    def select_series(self, query: str, parameters: Tuple, dtype: type) \
+            -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Return the dates and the values of the (day, value) rows of the given query.
+        """
+        rows = self.connection.execute(query, parameters).fetchall()
+        array = numpy.array(rows, dtype=numpy.int64).reshape((len(rows), 2))
+        return array[:, 0].astype('datetime64[D]'), array[:, 1].astype(dtype)
+
+    def cases(self, country: str, start: Optional[DateLike] = None,
+              end: Optional[DateLike] = None) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Return the dates and the cumulative cases of the given country from start to end
+        (inclusive). A None start or end means the first or last date.
+
+        Raise KeyError if the country is not in this database.
+        """
+        if country not in self.countries:
+            raise KeyError(country)
+        # CROSS JOIN keeps locations as the outer loop, so every location of the country is a range
+        # of the primary key instead of all locations in a range of covid_cases_by_day.
+        return self.select_series(
+                'SELECT day, SUM(cases) FROM locations CROSS JOIN covid_cases USING (location_id) '
+                'WHERE country = ? AND counted = 1 AND day BETWEEN ? AND ? '
+                'GROUP BY day ORDER BY day', (country, *day_range(start, end)), numpy.int64)
+
+    def province_cases(self, country: str, province: str, start: Optional[DateLike] = None,
+                       end: Optional[DateLike] = None) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Return the dates and the cumulative cases of the given province from start to end.
+
+        Raise KeyError if the province is not in this database.
+        """
+        row = self.connection.execute(
+                'SELECT location_id FROM locations WHERE country = ? AND province = ?',
+                (country, province)).fetchone()
+        if row is None:
+            raise KeyError((country, province))
+        return self.select_series(
+                'SELECT day, cases FROM covid_cases WHERE location_id = ? AND day BETWEEN ? AND ? '
+                'ORDER BY day', (row[0], *day_range(start, end)), numpy.int64)
+
+    def global_total_cases(self, start: Optional[DateLike] = None,
+                           end: Optional[DateLike] = None) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Return the dates and the cumulative cases of the whole world from start to end.
+        """
+        return self.select_series(
+                'SELECT day, cases FROM global_cases WHERE day BETWEEN ? AND ? ORDER BY day',
+                day_range(start, end), numpy.int64)
+
+    def closures(self, country: str, start: Optional[DateLike] = None,
+                 end: Optional[DateLike] = None) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Return the dates and the closure statuses of the given country from start to end.
+        Dates without a status are left out.
+
+        Raise KeyError if the country is not in the school closure data set.
+        """
+        row = self.connection.execute(
+                'SELECT country_id FROM closure_countries WHERE country = ?',
+                (country,)).fetchone()
+        if row is None:
+            raise KeyError(country)
+        return self.select_series(
+                'SELECT day, status FROM school_closures WHERE country_id = ? '
+                'AND day BETWEEN ? AND ? ORDER BY day', (row[0], *day_range(start, end)),
+                numpy.int8)
+
+    def global_closures(self, start: Optional[DateLike] = None,
+                        end: Optional[DateLike] = None) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Return the dates and the most common closure status of all countries from start to end.
+        Dates without a status are left out.
+        """
+        return self.select_series(
+                'SELECT day, status FROM global_closures WHERE day BETWEEN ? AND ? '
+                'AND status != ? ORDER BY day', (*day_range(start, end), MISSING_STATUS),
+                numpy.int8)
+
+    def provinces(self, country: str) -> List[str]:
+        """
+        Return the sorted names of the provinces of the given country.
+
+        Raise KeyError if the country is not in this database.
+        """
+        if country not in self.countries:
+            raise KeyError(country)
+        return [row[0] for row in self.connection.execute(
+                "SELECT province FROM locations WHERE country = ? AND province != '' "
+                "ORDER BY province", (country,))]
+
+
+# =================================================================================================
+# Functions
+# =================================================================================================
+
+def to_day(date: DateLike) -> int:
+    """
+    Return the number of days since 1970-01-01 of the given date.
+
+    >>> to_day(datetime.date(1970, 1, 2))
+    1
+    """
+    return int(numpy.datetime64(date, 'D').astype(numpy.int64))
+
+
+def day_range(start: Optional[DateLike], end: Optional[DateLike]) -> Tuple[int, int]:
+    """
+    Return the first and the last day of the given date range (inclusive), for BETWEEN.
+    """
+    return (MIN_DAY if start is None else to_day(start),
+            MAX_DAY if end is None else to_day(end))
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod()
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports'  : ['__future__', 'datetime', 'itertools', 'json', 'sqlite3', 'typing',
+                            'numpy', 'dataset'],
+        'allowed-io'     : [],
+        'max-line-length': 100,
+        'disable'        : ['R1705', 'C0200', 'E9989', 'E9997']
+    })
@@ -0,0 +1,460 @@
+"""
+This module contains the Dataset class, a library facade over our data sets that is independent of
+the GUI and of the module-level constants in data.py.
+
+A Dataset is loaded once and never changes afterwards, so several datasets (for example, different
+snapshots of the same files) could be held side by side and queried from many threads at once.
+
+>>> import datetime
+>>> ds = Dataset.load('resources/covid_cases_datasets/time_series_covid19_confirmed_global.csv')
+>>> dates, cases = ds.cases('Canada', datetime.date(2021, 1, 1), datetime.date(2021, 1, 3))
+>>> [str(d) for d in dates]
+['2021-01-01', '2021-01-02', '2021-01-03']
+>>> 'Ontario' in ds.provinces('Canada')
+True
+"""
+# Future features
+from __future__ import annotations
+
+# Python built-ins
+import copy
+import csv
+import datetime
+from typing import Dict, List, Optional, Tuple, Union
+
+# NumPy
+import numpy
+
+# Our modules
+import data
+from resource_manager import open_lines
+
+# A date accepted by the queries of Dataset.
+DateLike = Union[datetime.date, numpy.datetime64, str]
+
+# The value of a missing closure status in Dataset.closure_statuses.
+MISSING_STATUS = -1
+
+# The order in which data.init_global_school_closures breaks ties between statuses.
+GLOBAL_STATUS_ORDER = [data.ClosureStatus.CLOSED, data.ClosureStatus.FULLY_OPEN,
+                       data.ClosureStatus.ACADEMIC_BREAK, data.ClosureStatus.PARTIALLY_OPEN]
+
+
+class Dataset:
+    """
+    A COVID-19 cases data set and (optionally) a school closure data set, stored as NumPy arrays.
+
+    Every query returns a tuple of two arrays of the same length: the dates (numpy.datetime64[D])
+    and the values (int64 cases or int8 closure statuses, see data.ClosureStatus).
+
+    Instance Attributes:
+        - dates: The date axis of the covid cases.
+        - countries: The sorted names of all countries in the covid cases data set.
+        - country_indices: A dict mapping country names to rows of country_cases.
+        - country_cases: The cases of every country on every date, shape (countries, dates).
+            - A country without a country-wide row is the total of its provinces, see
+              counted_rows.
+        - locations: The (country, province) pair of every row of location_cases. The province is
+          an empty string for country-wide rows.
+        - location_indices: A dict mapping (country, province) pairs to rows of location_cases.
+        - location_cases: The cases of every location on every date, shape (locations, dates).
+        - country_provinces: A dict mapping country names to the sorted names of their provinces.
+        - global_cases: The total cases of all countries on every date.
+        - closure_dates: The date axis of the school closures.
+        - closure_countries: The sorted names of all countries in the school closure data set.
+        - closure_country_indices: A dict mapping country names to rows of closure_statuses.
+        - closure_statuses: The closure status of every country on every closure date, shape
+          (closure countries, closure dates). Missing statuses are MISSING_STATUS.
+        - global_closure_statuses: The most common closure status on every closure date, see
+          most_common_statuses.
+
+    Representation Invariants:
+        - self.country_cases.shape == (len(self.countries), len(self.dates))
+        - self.location_cases.shape == (len(self.locations), len(self.dates))
+        - self.closure_statuses.shape == (len(self.closure_countries), len(self.closure_dates))
+    """
+    dates: numpy.ndarray
+    countries: List[str]
+    country_indices: Dict[str, int]
+    country_cases: numpy.ndarray
+    locations: List[Tuple[str, str]]
+    location_indices: Dict[Tuple[str, str], int]
+    location_cases: numpy.ndarray
+    country_provinces: Dict[str, List[str]]
+    global_cases: numpy.ndarray
+    closure_dates: numpy.ndarray
+    closure_countries: List[str]
+    closure_country_indices: Dict[str, int]
+    closure_statuses: numpy.ndarray
+    global_closure_statuses: numpy.ndarray
+
+    def __init__(self, dates: numpy.ndarray, locations: List[Tuple[str, str]],
+                 location_cases: numpy.ndarray, closure_dates: numpy.ndarray,
+                 closure_countries: List[str], closure_statuses: numpy.ndarray,
+                 global_closure_statuses: numpy.ndarray) -> None:
+        """
+        Initialize a Dataset from its raw arrays, and compute all derived arrays.
+
+        Note:
+            - Use Dataset.load to load a Dataset from files.
+        """
+        self.dates = dates
+        self.locations = locations
+        self.location_indices = {location: i for i, location in enumerate(locations)}
+        self.location_cases = location_cases
+        self.closure_dates = closure_dates
+        self.closure_countries = closure_countries
+        self.closure_country_indices = {c: i for i, c in enumerate(closure_countries)}
+        self.closure_statuses = closure_statuses
+        self.global_closure_statuses = global_closure_statuses
+
+        # Countries and provinces
+        self.countries = sorted({country for country, _ in locations})
+        self.country_indices = {c: i for i, c in enumerate(self.countries)}
+        provinces: Dict[str, List[str]] = {c: [] for c in self.countries}
+        for country, province in locations:
+            if province != '':
+                provinces[country].append(province)
+        self.country_provinces = {c: sorted(p) for c, p in provinces.items()}
+
+        self.country_cases = self.total_country_cases(location_cases)
+        self.global_cases = self.country_cases.sum(axis=0)
+
+        for array in (self.dates, self.location_cases, self.country_cases, self.global_cases,
+                      self.closure_dates, self.closure_statuses, self.global_closure_statuses):
+            array.flags.writeable = False
+
+    # =============================================================================================
+    # Loading
+    # =============================================================================================
+
+    @classmethod
+    def load(cls, covid_path: str, closure_path: Optional[str] = None) -> Dataset:
+        """
+        Load a Dataset from a JHU global time series file and (optionally) a school closure file.
+
+        The same countries are removed or renamed as in data.py.
+        """
+        dates, locations, location_cases = read_covid_cases(covid_path)
+        if closure_path is None:
+            closures = group_closures([])
+        else:
+            closures = read_school_closures(closure_path)
+        return cls(dates, locations, location_cases, *closures)
+
+    @classmethod
+    def from_data(cls) -> Dataset:
+        """
+        Build a Dataset from the records already read by data.init_data, so that the files are not
+        read a second time.
+
+        Preconditions:
+            - data.ALL_COVID_CASES != []
+        """
+        rows: Dict[Tuple[str, str], List[int]] = {}
+        for case in data.ALL_COVID_CASES:
+            province = '' if case.province is None else case.province.name
+            rows.setdefault((case.country.name, province), []).append(case.cases)
+        locations = list(rows)
+        location_cases = numpy.array(list(rows.values()), dtype=numpy.int64)
+        # Every location has one case on every date, in the order of the dates
+        dates = numpy.array([case.date for case in data.GLOBAL_COVID_CASES],
+                            dtype='datetime64[D]')
+
+        records = [(closure.country.name, closure.date, closure.status.value)
+                   for closure in data.ALL_SCHOOL_CLOSURES]
+        return cls(dates, locations, location_cases, *group_closures(records))
+
+    def extended(self, dates: numpy.ndarray, location_cases: numpy.ndarray) -> Dataset:
+        """
+        Return a new Dataset with the given dates and their cases appended to the covid cases of
+        this dataset, which does not change. location_cases has one row for every location, in the
+        order of self.locations.
+
+        Only the totals of the new dates are computed, and the school closures are shared.
+
+        Preconditions:
+            - location_cases.shape == (len(self.locations), len(dates))
+            - all(date > self.dates[-1] for date in dates)
+        """
+        new_country_cases = self.total_country_cases(location_cases)
+        dataset = copy.copy(self)
+        dataset.dates = numpy.concatenate([self.dates, dates.astype('datetime64[D]')])
+        dataset.location_cases = numpy.hstack([self.location_cases, location_cases])
+        dataset.country_cases = numpy.hstack([self.country_cases, new_country_cases])
+        dataset.global_cases = numpy.concatenate([self.global_cases,
+                                                  new_country_cases.sum(axis=0)])
+        for array in (dataset.dates, dataset.location_cases, dataset.country_cases,
+                      dataset.global_cases):
+            array.flags.writeable = False
+        return dataset
+
+    def counted_rows(self) -> List[int]:
+        """
+        Return the rows of location_cases that count towards the totals of their countries: the
+        country-wide row of a country if there is one, otherwise its provinces, except the second
+        one in the data set, like data.calculate_country_total_covid_cases.
+        """
+        country_rows = {country for country, province in self.locations if province == ''}
+        counted = []
+        num_provinces = {country: 0 for country in self.countries}
+        for row, (country, province) in enumerate(self.locations):
+            if province == '':
+                counted.append(row)
+            elif country not in country_rows:
+                num_provinces[country] += 1
+                if num_provinces[country] != 2:
+                    counted.append(row)
+        return counted
+
+    def total_country_cases(self, location_cases: numpy.ndarray) -> numpy.ndarray:
+        """
+        Return the cases of every country from the given cases of every location (in the order of
+        self.locations), shape (countries, dates). See counted_rows.
+        """
+        rows = self.counted_rows()
+        totals = numpy.zeros((len(self.countries), location_cases.shape[1]), dtype=numpy.int64)
+        numpy.add.at(totals, [self.country_indices[self.locations[row][0]] for row in rows],
+                     location_cases[rows])
+        return totals
+
+    # =============================================================================================
+    # Queries
+    # =============================================================================================
+
+    def cases(self, country: str, start: Optional[DateLike] = None,
+              end: Optional[DateLike] = None) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Return the dates and the cumulative cases of the given country from start to end
+        (inclusive). A None start or end means the first or last date.
+
+        Raise KeyError if the country is not in this dataset.
+        """
+        index = self.country_indices[country]
+        window = date_slice(self.dates, start, end)
+        return self.dates[window], self.country_cases[index, window]
+
+    def province_cases(self, country: str, province: str, start: Optional[DateLike] = None,
+                       end: Optional[DateLike] = None) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Return the dates and the cumulative cases of the given province from start to end.
+
+        Raise KeyError if the province is not in this dataset.
+        """
+        row = self.location_indices[(country, province)]
+        window = date_slice(self.dates, start, end)
+        return self.dates[window], self.location_cases[row, window]
+
+    def global_total_cases(self, start: Optional[DateLike] = None,
+                           end: Optional[DateLike] = None) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Return the dates and the cumulative cases of the whole world from start to end.
+        """
+        window = date_slice(self.dates, start, end)
+        return self.dates[window], self.global_cases[window]
+
+    def closures(self, country: str, start: Optional[DateLike] = None,
+                 end: Optional[DateLike] = None) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Return the dates and the closure statuses of the given country from start to end.
+        Dates without a status are left out.
+
+        Raise KeyError if the country is not in the school closure data set.
+        """
+        index = self.closure_country_indices[country]
+        window = date_slice(self.closure_dates, start, end)
+        statuses = self.closure_statuses[index, window]
+        present = statuses != MISSING_STATUS
+        return self.closure_dates[window][present], statuses[present]
+
+    def global_closures(self, start: Optional[DateLike] = None,
+                        end: Optional[DateLike] = None) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Return the dates and the most common closure status of all countries from start to end.
+        Dates without a status are left out.
+        """
+        window = date_slice(self.closure_dates, start, end)
+        statuses = self.global_closure_statuses[window]
+        present = statuses != MISSING_STATUS
+        return self.closure_dates[window][present], statuses[present]
+
+    def provinces(self, country: str) -> List[str]:
+        """
+        Return the sorted names of the provinces of the given country.
+
+        Raise KeyError if the country is not in this dataset.
+        """
+        return list(self.country_provinces[country])
+
+    def date_range(self) -> Tuple[datetime.date, datetime.date]:
+        """
+        Return the first and the last date on which both covid cases and closure statuses exist,
+        like the default date range of our main window.
+        """
+        first, last = self.dates[0], self.dates[-1]
+        if len(self.closure_dates) > 0:
+            first = max(first, self.closure_dates[0])
+            last = min(last, self.closure_dates[-1])
+        return first.astype(datetime.date), last.astype(datetime.date)
+
+
+# =================================================================================================
+# Functions
+# =================================================================================================
+
+def date_slice(dates: numpy.ndarray, start: Optional[DateLike],
+               end: Optional[DateLike]) -> slice:
+    """
+    Return the slice of the sorted dates array from start to end (inclusive).
+
+    >>> d = numpy.arange('2020-01-01', '2020-01-10', dtype='datetime64[D]')
+    >>> date_slice(d, datetime.date(2020, 1, 3), '2020-01-05')
+    slice(2, 5, None)
+    """
+    left = 0 if start is None else int(numpy.searchsorted(dates, numpy.datetime64(start, 'D'),
+                                                          side='left'))
+    right = len(dates) if end is None else int(numpy.searchsorted(dates,
+                                                                  numpy.datetime64(end, 'D'),
+                                                                  side='right'))
+    return slice(left, right)
+
+
+def parse_covid_date(raw_date: str) -> numpy.datetime64:
+    """
+    Parse a date in the header of the JHU time series files.
+
+    >>> str(parse_covid_date('1/22/20'))
+    '2020-01-22'
+    """
+    month, day, year = raw_date.split('/')
+    return numpy.datetime64(f'20{year}-{int(month):02d}-{int(day):02d}', 'D')
+
+
+def read_covid_cases(filename: str) -> Tuple[numpy.ndarray, List[Tuple[str, str]], numpy.ndarray]:
+    """
+    Read a JHU global time series file, and return its dates, its (country, province) locations,
+    and its cases array of shape (locations, dates).
+    """
+    with open_lines(filename) as file:
+        reader = csv.reader(file)
+        header = next(reader)
+        locations = []
+        rows = []
+        for row in reader:
+            country = row[1]
+            if not data.is_in_ascii(country) or country in data.COVID_COUNTRIES_DELETE:
+                continue
+            locations.append((country, row[0]))
+            rows.append(row[4:])
+
+    dates = numpy.array([parse_covid_date(d) for d in header[4:]], dtype='datetime64[D]')
+    location_cases = numpy.array(rows, dtype=numpy.int64).reshape((len(rows), len(dates)))
+    return dates, locations, location_cases
+
+
+def read_new_covid_cases(filename: str, dates: numpy.ndarray, locations: List[Tuple[str, str]]) \
+        -> Optional[Tuple[numpy.ndarray, numpy.ndarray]]:
+    """
+    Read the dates added to a JHU global time series file after the given dates, and the cases of
+    the given locations on them, shape (locations, new dates). Only the new columns of every row
+    are read, see data.read_covid_columns.
+
+    Return None if the file changed in another way, like its locations or its earlier dates.
+    """
+    start = 4 + len(dates)
+    header, row_names, columns = data.read_covid_columns(filename, start)
+    if len(header) < start or \
+            not numpy.array_equal([parse_covid_date(d) for d in header[4:start]], dates):
+        return None
+    kept = [((country, province), row) for (province, country), row in zip(row_names, columns)
+            if data.is_in_ascii(country) and country not in data.COVID_COUNTRIES_DELETE]
+    if [location for location, _ in kept] != locations:
+        return None
+
+    new_dates = numpy.array([parse_covid_date(d) for d in header[start:]], dtype='datetime64[D]')
+    location_cases = numpy.array([row for _, row in kept], dtype=numpy.int64)
+    return new_dates, location_cases.reshape((len(locations), len(new_dates)))
+
+
+def read_school_closures(filename: str) \
+        -> Tuple[numpy.ndarray, List[str], numpy.ndarray, numpy.ndarray]:
+    """
+    Read a school closure file, and return its dates, its sorted countries, its statuses array
+    of shape (countries, dates), and its most common status on every date.
+    """
+    records = []
+    with open_lines(filename) as file:
+        reader = csv.reader(file)
+        next(reader)
+        for row in reader:
+            country = row[2]
+            if not data.is_in_ascii(country) or country in data.CLOSURE_COUNTRIES_DELETE:
+                continue
+            country = data.CLOSURE_COUNTRY_NAMES_FIX.get(country, country)
+            day, month, year = row[0].split('/')
+            records.append((country, f'{year}-{int(month):02d}-{int(day):02d}',
+                            data.STATUS_DICT[row[3]].value))
+    return group_closures(records)
+
+
+def group_closures(records: List[Tuple[str, DateLike, int]]) \
+        -> Tuple[numpy.ndarray, List[str], numpy.ndarray, numpy.ndarray]:
+    """
+    Group (country, date, status) records, in the order of their file, into the dates, the sorted
+    countries, the statuses array of shape (countries, dates), and the most common status on
+    every date, like read_school_closures.
+    """
+    countries = sorted({country for country, _, _ in records})
+    country_indices = {c: i for i, c in enumerate(countries)}
+    record_dates = numpy.array([d for _, d, _ in records], dtype='datetime64[D]')
+    record_statuses = numpy.array([s for _, _, s in records], dtype=numpy.int8)
+    dates = numpy.unique(record_dates)
+    columns = numpy.searchsorted(dates, record_dates)
+    statuses = numpy.full((len(countries), len(dates)), MISSING_STATUS, dtype=numpy.int8)
+    statuses[[country_indices[c] for c, _, _ in records], columns] = record_statuses
+    return dates, countries, statuses, most_common_statuses(len(dates), columns, record_statuses)
+
+
+def most_common_statuses(num_dates: int, columns: numpy.ndarray,
+                         record_statuses: numpy.ndarray) -> numpy.ndarray:
+    """
+    Return the most common status on every date of the records, given the date (column) and the
+    status of every record in the order of their file, like data.init_global_school_closures:
+        - the first record of every date but the first date is not counted,
+        - the last date has no status (MISSING_STATUS),
+        - ties are broken in GLOBAL_STATUS_ORDER.
+
+    >>> most_common_statuses(3, numpy.array([0, 0, 1, 1, 1, 2]),
+    ...                      numpy.array([1, 3, 1, 2, 2, 0], dtype=numpy.int8))
+    array([ 3,  2, -1], dtype=int8)
+
+    Preconditions:
+        - The records are sorted by date, like the school closure data set.
+    """
+    order = numpy.array([status.value for status in GLOBAL_STATUS_ORDER], dtype=numpy.int8)
+    ranks = numpy.zeros(order.max() + 1, dtype=numpy.int64)
+    ranks[order] = numpy.arange(len(order))
+    counted = numpy.ones(len(columns), dtype=bool)
+    counted[1:] = columns[1:] == columns[:-1]
+    counts = numpy.zeros((len(order), num_dates), dtype=numpy.int64)
+    numpy.add.at(counts, (ranks[record_statuses[counted]], columns[counted]), 1)
+    result = order[counts.argmax(axis=0)]
+    if num_dates > 0:
+        result[-1] = MISSING_STATUS
+    return result
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod()
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports'  : ['__future__', 'copy', 'csv', 'datetime', 'typing', 'numpy', 'data',
+                            'resource_manager'],
+        'allowed-io'     : ['read_covid_cases', 'read_school_closures'],
+        'max-line-length': 100,
+        'disable'        : ['R1705', 'C0200', 'E9989', 'E9997', 'R0902']
+    })
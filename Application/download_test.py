@@ -0,0 +1,212 @@
+"""
+A test of the resumable downloads of resource_manager.Resource.download.
+
+It serves a random file from a local http.server, and checks that:
+    - interrupted: a download cut off by the server returns False, and leaves the bytes received
+      in the temporary (.part) file, not in the resource,
+    - resumed: the next download asks for the remaining bytes only (HTTP Range), appends them, and
+      gets the right identifier,
+    - range ignored: a server that ignores Range sends the whole file again, which replaces the
+      temporary file,
+    - already complete: a temporary file with every byte is renamed when the server answers 416.
+
+The checks run as the doctest of run_checks, like the doctests of our other modules:
+    python download_test.py
+"""
+# Python built-ins
+import http.server
+import os
+import shutil
+import tempfile
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Requests
+import requests
+
+# Our modules
+import resource_manager
+from resource_manager import BUFFER_SIZE, PARTIAL_SUFFIX, Resource, compute_identifier
+
+
+class DownloadHandler(http.server.BaseHTTPRequestHandler):
+    """
+    A handler that serves payload at any path, and behaves as the class attributes say.
+
+    Class Attributes:
+        - payload: The bytes served.
+        - interrupt_at: Cut off the next response after this many bytes, or None.
+        - honor_range: Whether Range headers are answered with the bytes asked for.
+        - ranges: The Range header of every request, or None if it had none.
+    """
+    payload: bytes = b''
+    interrupt_at: Optional[int] = None
+    honor_range: bool = True
+    ranges: List[Optional[str]] = []
+
+    def do_GET(self) -> None:
+        """Serve payload, or the part asked for by the Range header."""
+        payload = DownloadHandler.payload
+        DownloadHandler.ranges.append(self.headers.get('Range'))
+        start = 0
+        if self.headers.get('Range') is not None and DownloadHandler.honor_range:
+            start = int(self.headers['Range'][len('bytes='):].rstrip('-'))
+            if start >= len(payload):
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{len(payload)}')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{len(payload) - 1}/{len(payload)}')
+        else:
+            self.send_response(200)
+        self.send_header('Content-Length', str(len(payload) - start))
+        self.end_headers()
+
+        if DownloadHandler.interrupt_at is not None:
+            # The connection is closed when this method returns, before the whole body is sent.
+            self.wfile.write(payload[start:DownloadHandler.interrupt_at])
+            DownloadHandler.interrupt_at = None
+        else:
+            self.wfile.write(payload[start:])
+
+    def log_message(self, *args) -> None:
+        """Keep the output of the test clean."""
+
+
+def check_interrupted(resource: Resource, session: requests.Session) -> Tuple[bool, str]:
+    """Check a download cut off by the server."""
+    DownloadHandler.interrupt_at = 2 * BUFFER_SIZE
+    is_downloaded = resource.download(session)
+    partial_path = resource.local_path + PARTIAL_SUFFIX
+    if is_downloaded or os.path.exists(resource.local_path) or not os.path.exists(partial_path):
+        return False, 'the interrupted download was not kept in the temporary file'
+    size = os.path.getsize(partial_path)
+    if not 0 < size <= 2 * BUFFER_SIZE:
+        return False, f'the temporary file has {size} bytes'
+    return True, f'kept {size} bytes'
+
+
+def check_resumed(resource: Resource, session: requests.Session) -> Tuple[bool, str]:
+    """Check a download resumed from the temporary file of check_interrupted."""
+    size = os.path.getsize(resource.local_path + PARTIAL_SUFFIX)
+    if not resource.download(session):
+        return False, 'the resumed download failed'
+    if DownloadHandler.ranges[-1] != f'bytes={size}-':
+        return False, f'asked for {DownloadHandler.ranges[-1]} instead of bytes={size}-'
+    return check_complete(resource, f'asked for the {len(DownloadHandler.payload) - size} '
+                                    f'bytes after {size}')
+
+
+def check_range_ignored(resource: Resource, session: requests.Session) -> Tuple[bool, str]:
+    """Check a download resumed from a wrong temporary file by a server that ignores Range."""
+    with open(resource.local_path + PARTIAL_SUFFIX, 'wb') as file:
+        file.write(b'x' * BUFFER_SIZE)
+    DownloadHandler.honor_range = False
+    try:
+        if not resource.download(session):
+            return False, 'the download failed'
+    finally:
+        DownloadHandler.honor_range = True
+    return check_complete(resource, 'started over')
+
+
+def check_already_complete(resource: Resource, session: requests.Session) -> Tuple[bool, str]:
+    """Check a download whose temporary file has every byte already."""
+    with open(resource.local_path + PARTIAL_SUFFIX, 'wb') as file:
+        file.write(DownloadHandler.payload)
+    if not resource.download(session):
+        return False, 'the download failed'
+    return check_complete(resource, 'renamed the temporary file')
+
+
+def check_complete(resource: Resource, message: str) -> Tuple[bool, str]:
+    """Check that resource was downloaded completely and correctly."""
+    if os.path.exists(resource.local_path + PARTIAL_SUFFIX):
+        return False, 'the temporary file was left'
+    with open(resource.local_path, 'rb') as file:
+        if file.read() != DownloadHandler.payload:
+            return False, 'the downloaded file is different'
+    if not resource.is_complete():
+        return False, 'the identifier is different'
+    return True, message
+
+
+# The size of the file served, which must be greater than 2 * BUFFER_SIZE.
+PAYLOAD_SIZE = 300000
+
+# The checks in the order they run, each starting from the files the previous one left.
+CHECKS: List[Tuple[str, Callable[[Resource, requests.Session], Tuple[bool, str]]]] = [
+    ('interrupted', check_interrupted),
+    ('resumed', check_resumed),
+    ('range ignored', check_range_ignored),
+    ('already complete', check_already_complete)
+]
+
+
+def run_checks(size: int = PAYLOAD_SIZE) -> Dict[str, str]:
+    """
+    Run CHECKS against a local http.server serving size random bytes, and return the message of
+    every check that failed by its name.
+
+    The verification manifest that the downloads record into is restored afterwards.
+
+    Preconditions:
+        - size > 2 * BUFFER_SIZE
+
+    >>> run_checks()
+    {}
+    """
+    manifest = dict(resource_manager.MANIFEST)
+    is_manifest_changed = resource_manager.IS_MANIFEST_CHANGED
+    directory = tempfile.mkdtemp(prefix='csc110-download-')
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), DownloadHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        DownloadHandler.payload = os.urandom(size)
+        DownloadHandler.ranges = []
+        source_path = os.path.join(directory, 'source.bin')
+        with open(source_path, 'wb') as file:
+            file.write(DownloadHandler.payload)
+        resource = Resource('resource.bin', os.path.join(directory, 'resource.bin'),
+                            f'http://127.0.0.1:{server.server_address[1]}/resource.bin',
+                            compute_identifier(source_path))
+
+        failures = {}
+        with requests.Session() as session:
+            for name, check in CHECKS:
+                if os.path.exists(resource.local_path):
+                    os.remove(resource.local_path)
+                resource.reset()
+                is_passed, message = check(resource, session)
+                if not is_passed:
+                    failures[name] = message
+        return failures
+    finally:
+        server.shutdown()
+        server.server_close()
+        resource_manager.MANIFEST.clear()
+        resource_manager.MANIFEST.update(manifest)
+        resource_manager.IS_MANIFEST_CHANGED = is_manifest_changed
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod()
+
+    import python_ta.contracts
+
+    python_ta.contracts.check_all_contracts()
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports'  : ['http.server', 'os', 'shutil', 'tempfile', 'threading', 'typing',
+                            'requests', 'resource_manager'],
+        'allowed-io'     : ['check_range_ignored', 'check_already_complete', 'check_complete',
+                            'run_checks'],
+        'max-line-length': 100,
+        'disable'        : ['R1705', 'C0200', 'E9989', 'E9997']
+    })
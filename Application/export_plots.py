@@ -0,0 +1,383 @@
+"""
+A headless command-line entry point that exports the plots of many countries into image files.
+
+It reuses data.init_data and the styling in plot_style, and renders with the Agg backend of
+matplotlib, so neither a QApplication nor a display is needed. Plots are rendered by a pool of
+processes, and every process reuses one figure for all of its plots.
+
+The time-lapses exported by the GUI (see save_time_lapse) are rendered by the same figure.
+
+Usage:
+    python export_plots.py [--output-dir exported_plots] [--format png svg]
+                           [--range 2020-03-01:2021-03-01 ...] [--countries Canada US ...]
+                           [--workers 4] [--dpi 100] [--size 12x5]
+"""
+# Python built-ins
+import argparse
+import bisect
+import datetime
+import logging
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+# Matplotlib
+import matplotlib.animation
+import matplotlib.axes
+import matplotlib.dates
+import matplotlib.lines
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+# Our modules
+import data
+import plot_style
+import settings
+from resource_manager import Config, register_resources
+
+# A dict that maps the file extensions of time-lapses to the names of their matplotlib writers.
+TIME_LAPSE_WRITERS = {
+    '.gif': 'pillow',
+    '.mp4': 'ffmpeg'
+}
+
+
+# =================================================================================================
+# Classes
+# =================================================================================================
+
+class ExportTask:
+    """
+    A plot of a country in a date range to be exported.
+
+    Instance Attributes:
+        - path: The path of the exported files without extension.
+        - title: The title of the plot.
+        - covid_dates and covid_cases: The data of the covid cases plot.
+        - closure_dates and closure_statuses: The data of the closure status plot, as the steps of
+          a closure timeline (see data.ClosureTimeline.step_data).
+    """
+    path: str
+    title: str
+    covid_dates: List[datetime.date]
+    covid_cases: List[int]
+    closure_dates: List[datetime.date]
+    closure_statuses: List[float]
+
+    def __init__(self, path: str, title: str,
+                 covid_dates: List[datetime.date], covid_cases: List[int],
+                 closure_dates: List[datetime.date], closure_statuses: List[float]) -> None:
+        """Initialize an ExportTask object"""
+        self.path = path
+        self.title = title
+        self.covid_dates = covid_dates
+        self.covid_cases = covid_cases
+        self.closure_dates = closure_dates
+        self.closure_statuses = closure_statuses
+
+
+class PlotRenderer:
+    """
+    A long-lived figure (with the same styling as gui_plot.PlotCanvas) that renders ExportTasks.
+
+    Rendering only replaces the data of the two lines and rescales the axes, so the figure and its
+    axes are created only once.
+
+    Instance Attributes:
+        - figure: The matplotlib figure, drawn by the Agg backend.
+        - covid_axes: The axes of covid cases plot.
+        - closure_axes: The axes of closure status plot.
+        - covid_line: The line of the covid cases plot.
+        - closure_line: The line of the closure status plot.
+        - formats: The file formats (extensions) to export.
+        - dpi: The dots per inch of the exported images.
+    """
+    figure: Figure
+    covid_axes: matplotlib.axes.Axes
+    closure_axes: matplotlib.axes.Axes
+    covid_line: matplotlib.lines.Line2D
+    closure_line: matplotlib.lines.Line2D
+    formats: Sequence[str]
+    dpi: int
+
+    def __init__(self, size: Tuple[float, float], formats: Sequence[str], dpi: int,
+                 covid_label: str = plot_style.DEFAULT_COVID_LABEL) -> None:
+        """Initialize a PlotRenderer object"""
+        self.formats = formats
+        self.dpi = dpi
+        self.figure = Figure(figsize=size, **plot_style.FIGURE_KWARGS)
+        FigureCanvasAgg(self.figure)
+
+        self.covid_axes, self.closure_axes = self.figure.subplots(1, 2)
+        plot_style.init_axes(self.covid_axes, self.closure_axes, covid_label)
+
+        self.covid_line, = self.covid_axes.plot([], [],
+                                                linestyle=plot_style.DEFAULT_LINE_STYLE,
+                                                marker=plot_style.DEFAULT_DATA_MARKER,
+                                                color=plot_style.DEFAULT_COVID_LINE_COLOR)
+        self.closure_line, = self.closure_axes.plot([], [], drawstyle='steps-post',
+                                                    linestyle=plot_style.DEFAULT_LINE_STYLE,
+                                                    marker=plot_style.DEFAULT_DATA_MARKER,
+                                                    color=plot_style.DEFAULT_CLOSURE_LINE_COLOR)
+        for axes in (self.covid_axes, self.closure_axes):
+            axes.xaxis_date()
+            axes.tick_params(axis='x', labelrotation=40.0)
+        self.freeze_layout()
+
+    def freeze_layout(self) -> None:
+        """
+        Compute the tight layout of the figure once and then turn it off.
+
+        A tight layout draws the whole figure once more on every save, which doubles the time of
+        rendering. The layout is computed with the widest y tick labels of the covid cases plot
+        (six digits, larger numbers are shown with an offset), so that it fits every country.
+        """
+        self.render_data(ExportTask('', 'Title', [datetime.date(2020, 1, 1),
+                                                  datetime.date(2021, 12, 31)],
+                                    [0, 999999], [], []))
+        self.figure.tight_layout()
+        self.figure.set_tight_layout(False)
+
+    def render_data(self, task: ExportTask) -> None:
+        """
+        Replace the data and the title of the figure with those of the given task.
+        """
+        self.figure.suptitle(task.title)
+        self.covid_line.set_data(matplotlib.dates.date2num(task.covid_dates), task.covid_cases)
+        self.closure_line.set_data(matplotlib.dates.date2num(task.closure_dates),
+                                   task.closure_statuses)
+        for axes in (self.covid_axes, self.closure_axes):
+            axes.relim()
+            axes.autoscale_view()
+
+    def render(self, task: ExportTask) -> str:
+        """
+        Render the given task into files of all formats, and return the path of the task.
+        """
+        self.render_data(task)
+        for file_format in self.formats:
+            self.figure.savefig(f'{task.path}.{file_format}', format=file_format, dpi=self.dpi)
+        return task.path
+
+
+# =================================================================================================
+# Worker processes
+# =================================================================================================
+
+# The renderer of the current worker process, created by init_worker.
+RENDERER: Optional[PlotRenderer] = None
+
+
+def init_worker(size: Tuple[float, float], formats: Sequence[str], dpi: int) -> None:
+    """
+    Create the renderer of the current worker process.
+    """
+    global RENDERER
+    RENDERER = PlotRenderer(size, formats, dpi)
+
+
+def render_task(task: ExportTask) -> str:
+    """
+    Render the given task with the renderer of the current worker process.
+    """
+    return RENDERER.render(task)
+
+
+# =================================================================================================
+# Functions
+# =================================================================================================
+
+def filter_by_date(items: List[data.TimeBasedData], start: datetime.date,
+                   end: datetime.date) -> List[data.TimeBasedData]:
+    """
+    Return the items whose date is in [start, end].
+
+    Preconditions:
+        - items is sorted by date
+    """
+    dates = [item.date for item in items]
+    return items[bisect.bisect_left(dates, start):bisect.bisect_right(dates, end)]
+
+
+def make_file_name(country: data.Country, start: datetime.date, end: datetime.date) -> str:
+    """
+    Return a file name (without extension) for the plot of country from start to end.
+
+    >>> make_file_name(data.Country('Korea, South'), datetime.date(2020, 3, 1), \
+    datetime.date(2021, 3, 1))
+    'Korea_South_2020-03-01_2021-03-01'
+    """
+    name = re.sub(r'[^A-Za-z0-9]+', '_', country.name).strip('_')
+    return f'{name}_{start.isoformat()}_{end.isoformat()}'
+
+
+def make_tasks(countries: List[data.Country],
+               date_ranges: List[Tuple[Optional[datetime.date], Optional[datetime.date]]],
+               output_dir: str) -> List[ExportTask]:
+    """
+    Return the tasks that export the plots of all countries in all date ranges.
+
+    A None start or end date means the first or last date of our data sets.
+
+    Note:
+        - This function should only be called after data are initialized.
+    """
+    min_date = max(data.ALL_COVID_CASES[0].date, data.ALL_SCHOOL_CLOSURES[0].date)
+    max_date = min(data.ALL_COVID_CASES[-1].date, data.ALL_SCHOOL_CLOSURES[-1].date)
+
+    tasks = []
+    for country in countries:
+        for start, end in date_ranges:
+            start = min_date if start is None else start
+            end = max_date if end is None else end
+            covid_cases = filter_by_date(data.COUNTRIES_TO_COVID_CASES.get(country, []),
+                                         start, end)
+            timeline = data.COUNTRIES_TO_CLOSURE_TIMELINES.get(country, data.ClosureTimeline())
+            closure_dates, closure_statuses = timeline.clip(start, end).step_data()
+            tasks.append(ExportTask(os.path.join(output_dir, make_file_name(country, start, end)),
+                                    f'{country.name} ({start} to {end})',
+                                    [c.date for c in covid_cases],
+                                    [c.cases for c in covid_cases],
+                                    closure_dates, closure_statuses))
+    return tasks
+
+
+def parse_date_range(text: str) -> Tuple[Optional[datetime.date], Optional[datetime.date]]:
+    """
+    Parse a date range written as START:END in ISO format. Either side may be empty.
+
+    >>> parse_date_range('2020-03-01:')
+    (datetime.date(2020, 3, 1), None)
+    """
+    start, end = text.split(':')
+    return (datetime.date.fromisoformat(start) if start != '' else None,
+            datetime.date.fromisoformat(end) if end != '' else None)
+
+
+def parse_size(text: str) -> Tuple[float, float]:
+    """
+    Parse a figure size written as WIDTHxHEIGHT in inches.
+
+    >>> parse_size('12x5')
+    (12.0, 5.0)
+    """
+    width, height = text.lower().split('x')
+    return float(width), float(height)
+
+
+def save_time_lapse(path: str, title: str, covid_dates: List[datetime.date],
+                    covid_values: List[float], timeline: data.ClosureTimeline,
+                    covid_label: str = plot_style.DEFAULT_COVID_LABEL, days_per_frame: int = 7,
+                    fps: int = 10, size: Tuple[float, float] = (12.0, 5.0),
+                    dpi: int = 100) -> int:
+    """
+    Save a time-lapse of the given covid series and closure timeline into path, a GIF or an MP4
+    file (see TIME_LAPSE_WRITERS). Every frame shows days_per_frame more dates than the previous
+    one, and the axes keep the limits of the whole date range. Return the number of frames.
+
+    Raise ValueError if the format of path is not supported, and RuntimeError if its writer is
+    not available (MP4 needs ffmpeg).
+
+    Preconditions:
+        - len(covid_dates) == len(covid_values) > 0
+        - days_per_frame >= 1
+    """
+    writer_name = TIME_LAPSE_WRITERS.get(os.path.splitext(path)[1].lower())
+    if writer_name is None:
+        raise ValueError(f'Time-lapses can only be saved as {", ".join(TIME_LAPSE_WRITERS)}')
+    if not matplotlib.animation.writers.is_available(writer_name):
+        raise RuntimeError(f'The {writer_name} writer of matplotlib is not available')
+
+    renderer = PlotRenderer(size, [], dpi, covid_label)
+    renderer.render_data(ExportTask('', title, covid_dates, covid_values, *timeline.step_data()))
+    counts = list(range(1, len(covid_dates), days_per_frame)) + [len(covid_dates)]
+
+    def render_frame(count: int) -> None:
+        """Show the first count dates"""
+        end_date = covid_dates[count - 1]
+        closure_dates, closure_statuses = timeline.clip(datetime.date.min, end_date).step_data()
+        renderer.figure.suptitle(f'{title} ({end_date})')
+        renderer.covid_line.set_data(matplotlib.dates.date2num(covid_dates[:count]),
+                                     covid_values[:count])
+        renderer.closure_line.set_data(matplotlib.dates.date2num(closure_dates),
+                                       closure_statuses)
+
+    animation = matplotlib.animation.FuncAnimation(renderer.figure, render_frame, frames=counts,
+                                                   cache_frame_data=False)
+    animation.save(path, writer=matplotlib.animation.writers[writer_name](fps=fps), dpi=dpi)
+    return len(counts)
+
+
+def parse_arguments(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Parse the command-line arguments of the exporter. Without --range, the whole date range is
+    exported.
+
+    >>> parse_arguments([]).ranges
+    [(None, None)]
+    >>> parse_arguments(['--range', '2020-03-01:', ':2021-03-01']).ranges
+    [(datetime.date(2020, 3, 1), None), (None, datetime.date(2021, 3, 1))]
+    """
+    parser = argparse.ArgumentParser(description='Export the plots of many countries.')
+    parser.add_argument('--output-dir', default='exported_plots',
+                        help='the directory of the exported files')
+    parser.add_argument('--format', nargs='+', default=['png'], dest='formats',
+                        help='the file formats, like png and svg')
+    parser.add_argument('--range', nargs='+', default=[(None, None)], dest='ranges',
+                        type=parse_date_range,
+                        help='date ranges written as START:END (ISO dates, either may be empty)')
+    parser.add_argument('--countries', nargs='+',
+                        help='the countries to export, all countries by default')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='the number of worker processes')
+    parser.add_argument('--dpi', type=int, default=100, help='dots per inch of the images')
+    parser.add_argument('--size', type=parse_size, default=(12.0, 5.0),
+                        help='the figure size written as WIDTHxHEIGHT in inches')
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    The entry of the exporter. Return the exit code.
+    """
+    args = parse_arguments(argv)
+
+    logging.basicConfig(stream=sys.stdout, level=settings.LOG_LEVEL, format=settings.LOG_FORMAT)
+
+    config = Config('config.json')
+    settings.init_setting(config['setting'])
+    register_resources(config['resource'])
+    data.init_data()
+    if 'Failed to' in data.progress_description:
+        logging.critical(data.progress_description)
+        return 1
+
+    if args.countries is None:
+        countries = data.SORTED_COUNTRIES
+    else:
+        countries = [data.Country(name) for name in args.countries]
+        unknown = [c.name for c in countries if c not in data.COUNTRIES_TO_COVID_CASES]
+        if unknown:
+            logging.critical(f'Unknown countries: {", ".join(unknown)}')
+            return 1
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    tasks = make_tasks(countries, args.ranges, args.output_dir)
+
+    logging.info(f'Exporting {len(tasks)} plots with {args.workers} workers...')
+    timestamp1 = time.time()
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker,
+                             initargs=(args.size, args.formats, args.dpi)) as executor:
+        for path in executor.map(render_task, tasks, chunksize=8):
+            logging.debug(f'Exported {path}')
+    seconds_elapsed = round(time.time() - timestamp1, 3)
+    logging.info(f'Exported {len(tasks)} plots into {args.output_dir} in '
+                 f'{seconds_elapsed} seconds!')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,306 @@
+"""
+This module contains the small-multiples grid of our project: one sparkline tile for every country.
+
+The grid is a QListView in icon mode over CountryTileModel, so Qt only asks for the tiles that are
+visible and scrolling stays fast however many countries there are. Tiles are painted with QPainter
+on QImages by a pool of worker threads (QPixmaps may only be created on the GUI thread), and each
+tile is cached as a QPixmap keyed on its country, date range, style, and data version.
+"""
+# Python built-ins
+import datetime
+import os
+from typing import Any, List, Optional, Set, Tuple
+
+# NumPy
+import numpy
+
+# Our modules
+import data
+from gui_utils import *
+
+# The size of a tile in pixels.
+TILE_WIDTH = 180
+TILE_HEIGHT = 110
+
+# The height of the closure status strip at the bottom of a tile in pixels.
+STRIP_HEIGHT = 8
+
+# The size of QPixmapCache in kilobytes, enough for a few grids of all countries.
+PIXMAP_CACHE_LIMIT = 65536
+
+# The colors of closure statuses in the strip.
+STATUS_COLORS = {
+    data.ClosureStatus.FULLY_OPEN    : QColor('#7FB77E'),
+    data.ClosureStatus.PARTIALLY_OPEN: QColor('#F7D060'),
+    data.ClosureStatus.CLOSED        : QColor('#E06469'),
+    data.ClosureStatus.ACADEMIC_BREAK: QColor('#B0B0B0')
+}
+
+
+# =================================================================================================
+# Rendering
+# =================================================================================================
+
+def render_tile(name: str, values: numpy.ndarray,
+                runs: List[Tuple[float, float, data.ClosureStatus]],
+                color: str) -> QImage:
+    """
+    Return a tile of the given country: its name, the sparkline of values, and a strip of its
+    closure status runs, given as (start, end, status) with start and end as fractions of the width.
+
+    This function is thread-safe, it only paints on a QImage.
+    """
+    image = QImage(TILE_WIDTH, TILE_HEIGHT, QImage.Format_ARGB32_Premultiplied)
+    image.fill(Qt.white)
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.Antialiasing)
+
+    painter.setPen(QColor('#D0D0D0'))
+    painter.drawRect(0, 0, TILE_WIDTH - 1, TILE_HEIGHT - 1)
+    painter.setPen(Qt.black)
+    painter.setFont(QFont(painter.font().family(), 8))
+    painter.drawText(QRectF(4, 2, TILE_WIDTH - 8, 14), Qt.AlignLeft | Qt.AlignVCenter,
+                     painter.fontMetrics().elidedText(name, Qt.ElideRight, TILE_WIDTH - 8))
+
+    # Sparkline, split where values are NaN
+    top, bottom = 18.0, TILE_HEIGHT - STRIP_HEIGHT - 4.0
+    finite = numpy.isfinite(values)
+    if finite.any() and len(values) > 1:
+        low, high = float(values[finite].min()), float(values[finite].max())
+        scale = (bottom - top) / (high - low) if high > low else 0.0
+        xs = 2 + numpy.arange(len(values)) * ((TILE_WIDTH - 4) / (len(values) - 1))
+        ys = bottom - (numpy.where(finite, values, low) - low) * scale
+        painter.setPen(QPen(QColor(color), 1.2))
+        start = None
+        for i in range(len(values) + 1):
+            if i < len(values) and finite[i]:
+                start = i if start is None else start
+            elif start is not None:
+                painter.drawPolyline(QPolygonF([QPointF(x, y) for x, y in
+                                                zip(xs[start:i], ys[start:i])]))
+                start = None
+
+    # Closure status strip
+    painter.setPen(Qt.NoPen)
+    for start, end, status in runs:
+        painter.setBrush(STATUS_COLORS[status])
+        painter.drawRect(QRectF(2 + start * (TILE_WIDTH - 4), TILE_HEIGHT - STRIP_HEIGHT - 2,
+                                max(1.0, (end - start) * (TILE_WIDTH - 4)), STRIP_HEIGHT))
+    painter.end()
+    return image
+
+
+class TileSignals(QObject):
+    """
+    The signals of a TileTask, since a QRunnable cannot have signals.
+    """
+    # The cache key and the row of the tile, and the tile.
+    rendered: pyqtSignal = pyqtSignal(str, int, QImage)
+
+
+class TileTask(QRunnable):
+    """
+    A task that renders a tile in a worker thread.
+
+    Instance Attributes:
+        - key: The cache key of the tile.
+        - row: The row of the tile in the model.
+        - arguments: The arguments of render_tile.
+        - signals: The signals to report the tile.
+    """
+    key: str
+    row: int
+    arguments: Tuple
+    signals: TileSignals
+
+    def __init__(self, key: str, row: int, arguments: Tuple) -> None:
+        """Initialize a TileTask"""
+        super().__init__()
+        self.key = key
+        self.row = row
+        self.arguments = arguments
+        self.signals = TileSignals()
+
+    def run(self) -> None:
+        """Render the tile and report it"""
+        self.signals.rendered.emit(self.key, self.row, render_tile(*self.arguments))
+
+
+# =================================================================================================
+# Model and view
+# =================================================================================================
+
+class CountryTileModel(QAbstractListModel):
+    """
+    A list model of the tiles of all countries.
+
+    The decoration of a tile is its cached QPixmap. A tile that is not cached yet is shown as a
+    blank tile and rendered in thread_pool, so only the tiles the view asks for are rendered.
+
+    Instance Attributes:
+        - names: The names of all countries.
+        - values: The series of every country, shape (countries, dates).
+        - runs: The closure status runs of every country, see render_tile.
+        - style_key: The part of the cache keys that identifies the date range, the style, and the
+          version of the data.
+        - color: The line color of sparklines.
+        - thread_pool: The pool of worker threads that render tiles.
+        - pending: The cache keys of the tiles being rendered.
+        - blank_pixmap: The pixmap shown while a tile is rendered.
+    """
+    names: List[str]
+    values: numpy.ndarray
+    runs: List[List[Tuple[float, float, data.ClosureStatus]]]
+    style_key: str
+    color: str
+    thread_pool: QThreadPool
+    pending: Set[str]
+    blank_pixmap: QPixmap
+
+    def __init__(self, parent: Optional[QObject] = None) -> None:
+        """Initialize an empty CountryTileModel"""
+        super().__init__(parent)
+        self.names = []
+        self.values = numpy.zeros((0, 0))
+        self.runs = []
+        self.style_key = ''
+        self.color = '#000000'
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(max(1, (os.cpu_count() or 1) - 1))
+        self.pending = set()
+        self.blank_pixmap = QPixmap(TILE_WIDTH, TILE_HEIGHT)
+        self.blank_pixmap.fill(QColor('#F4F4F4'))
+        QPixmapCache.setCacheLimit(max(QPixmapCache.cacheLimit(), PIXMAP_CACHE_LIMIT))
+
+    def set_data(self, names: List[str], dates: List[datetime.date], values: numpy.ndarray,
+                 timelines: List[data.ClosureTimeline], series_name: str, color: str,
+                 data_version: int = 0) -> None:
+        """
+        Show the given series of the given countries from the first to the last of dates.
+        Tiles cached for another data_version (see snapshot.DataSnapshot.version) are not reused.
+
+        Preconditions:
+            - values.shape == (len(names), len(dates))
+            - len(timelines) == len(names)
+        """
+        # Tiles of the previous data that have not started are not needed any more.
+        self.thread_pool.clear()
+        self.pending.clear()
+
+        self.beginResetModel()
+        self.names = names
+        self.values = values
+        self.color = color
+        first = dates[0] if dates else datetime.date.min
+        length = max(1, len(dates) - 1)
+        self.runs = [[((start - first).days / length, ((end - first).days + 1) / length, status)
+                      for start, end, status in zip(t.starts, t.ends, t.statuses)]
+                     for t in timelines]
+        last = dates[-1] if dates else datetime.date.min
+        self.style_key = f'{first}|{last}|{series_name}|{color}|{data_version}'
+        self.endResetModel()
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        """Return the number of tiles"""
+        return 0 if parent.isValid() else len(self.names)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> Any:
+        """Return the pixmap (decoration) or the name (tool tip) of a tile"""
+        if not index.isValid():
+            return None
+        row = index.row()
+        if role == Qt.DecorationRole:
+            key = self.cache_key(row)
+            pixmap = QPixmapCache.find(key)
+            if pixmap is not None and not pixmap.isNull():
+                return pixmap
+            if key not in self.pending:
+                self.pending.add(key)
+                task = TileTask(key, row, (self.names[row], self.values[row], self.runs[row],
+                                           self.color))
+                task.signals.rendered.connect(self.on_tile_rendered)
+                self.thread_pool.start(task)
+            return self.blank_pixmap
+        elif role in (Qt.ToolTipRole, Qt.AccessibleTextRole):
+            return self.names[row]
+        return None
+
+    def cache_key(self, row: int) -> str:
+        """Return the cache key of the tile of the given row"""
+        return f'tile|{self.names[row]}|{self.style_key}'
+
+    @pyqtSlot(str, int, QImage)
+    def on_tile_rendered(self, key: str, row: int, image: QImage) -> None:
+        """Cache a rendered tile and show it if it's still in the model"""
+        self.pending.discard(key)
+        QPixmapCache.insert(key, QPixmap.fromImage(image))
+        if row < len(self.names) and self.cache_key(row) == key:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+
+class CountryGridWindow(QWidget):
+    """
+    A window with the tiles of all countries.
+
+    Instance Attributes:
+        - description_label: A label that describes the series and the date range shown.
+        - list_view: The grid of tiles.
+        - model: The model of tiles.
+    """
+    # Emitted with the name of a country when its tile is double-clicked.
+    country_activated: pyqtSignal = pyqtSignal(str)
+
+    description_label: StandardLabel
+    list_view: QListView
+    model: CountryTileModel
+
+    def __init__(self, parent: Optional[QWidget] = None) -> None:
+        """Initialize a CountryGridWindow"""
+        super().__init__(parent, Qt.Window)
+        self.setWindowTitle('All Countries')
+        self.resize(4 * (TILE_WIDTH + 12) + 40, 5 * (TILE_HEIGHT + 12) + 60)
+
+        self.description_label = StandardLabel('', self)
+        self.model = CountryTileModel(self)
+        self.list_view = QListView(self)
+        self.list_view.setViewMode(QListView.IconMode)
+        self.list_view.setResizeMode(QListView.Adjust)
+        self.list_view.setMovement(QListView.Static)
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setIconSize(QSize(TILE_WIDTH, TILE_HEIGHT))
+        self.list_view.setGridSize(QSize(TILE_WIDTH + 12, TILE_HEIGHT + 12))
+        self.list_view.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.list_view.setModel(self.model)
+        self.list_view.doubleClicked.connect(
+                lambda index: self.country_activated.emit(self.model.names[index.row()]))
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.description_label)
+        layout.addWidget(self.list_view)
+
+    def set_data(self, names: List[str], dates: List[datetime.date], values: numpy.ndarray,
+                 timelines: List[data.ClosureTimeline], series_name: str, color: str,
+                 data_version: int = 0) -> None:
+        """
+        Show the given series of the given countries, see CountryTileModel.set_data.
+        """
+        span = f'{dates[0]} to {dates[-1]}' if dates else 'no dates'
+        self.description_label.setText(f'{series_name} of {len(names)} countries, {span} '
+                                       f'(double-click a tile to plot it)')
+        self.model.set_data(names, dates, values, timelines, series_name, color, data_version)
+
+
+if __name__ == '__main__':
+    # doctest this module will generate an error, and doctest is meaningless for this module.
+    # import doctest
+    # doctest.testmod()
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports'  : ['datetime', 'os', 'typing', 'numpy', 'data', 'gui_utils'],
+        'allowed-io'     : [],
+        'max-line-length': 100,
+        'disable'        : ['R1705', 'C0200', 'E0602', 'E9989', 'W0401', 'E9997', 'R0902']
+    })
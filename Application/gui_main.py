@@ -3,21 +3,20 @@ This module contains the main window and its elements of our project.
 
 If you are seeing many warnings, that's normal and that's not our fault.
 """
+# Future features
+from __future__ import annotations
+
 # Python built-ins
+import bisect
+import datetime
 import math
+import os
 import platform
 import time
-from typing import Any, List, Tuple
+from typing import TYPE_CHECKING, List, Optional
 
-# Matplotlib
-import matplotlib.axes
-import matplotlib.backend_bases
-import matplotlib.lines
-import matplotlib.style
+# PyQt5
 from PyQt5 import QtGui
-from matplotlib import pyplot
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
 
 # Our modules
 import algorithms
@@ -25,6 +24,26 @@ import data
 from gui_utils import *
 from resource_manager import *
 
+if TYPE_CHECKING:
+    # gui_plot imports matplotlib, so it is only imported when the plot is created.
+    # See MainWindowUI.init_plot.
+    import matplotlib.axes
+    import gui_grid
+    import gui_plot
+    import latency
+    import profiling
+    import snapshot
+
+# The frames per second of exported time-lapses.
+TIME_LAPSE_FPS = 10
+
+# The milliseconds to wait after the files of our data sets last changed before reloading them, so a
+# file being written is read once it's complete.
+DATA_RELOAD_DELAY = 1000
+
+# Milliseconds between two updates of the latency statistics in the status bar
+LATENCY_UPDATE_INTERVAL = 1000
+
 if platform.system() == 'Windows':
     # Ctype
     import ctypes
@@ -33,434 +52,6 @@ if platform.system() == 'Windows':
     # Letting Windows display the Icon in the taskbar as well
     ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID(APP_ID)
 
-matplotlib.style.use('fast')
-
-
-class PlotToolbar(NavigationToolbar):
-    """
-    A customized toolbar from matplotlib.
-
-    When needed, we could add more attributes and methods.
-
-    Instance Attributes:
-        - toolitems: Override the super toolitems for our purpose.
-        - window: A MainWindow instance that is the parent window of this toolbar.
-    """
-
-    toolitems: List = [t for t in NavigationToolbar.toolitems if t[0] in {'Home'}]
-    window: Any
-
-    def __init__(self, canvas: FigureCanvas, parent: QWidget, coordinates: bool = True) -> None:
-        """
-        Initialize the Plot toolbar class
-        """
-        super().__init__(canvas, parent, coordinates)
-        self.window = parent
-        set_font(self)
-
-    def _init_toolbar(self) -> None:
-        """
-        Intentionally left as blank.
-        """
-
-    def home(self, *args) -> None:
-        """
-        Override the super home function.
-
-        This function is called when user clicks the home button on this toolbar.
-        Upon trigger, then we re-plot our plots to its original states, with original scales.
-        """
-        if self.canvas.plotted:
-            self.window.update_plot()
-
-
-class PlotCanvas(FigureCanvas):
-    """
-    Figure widget from matplotlib with many customizations like cross-hair, customized zoom,
-    and pan.
-
-    We used blit to optimize the frame rates of the figure.
-
-    Instance Attributes:
-        - figure: The actual matplotlib figure instance.
-        - covid_axes: The axes of covid cases plot.
-        - closure_axes: The axes of closure status plot.
-        - background: The background of the figure, and it's used for blitting.
-        - curr_x: Current x value that should always be a date.
-        - curr_y: Current y value that should always be an int.
-            - Note: curr_x and curr_y may be None if the cursor is not on the axes.
-        - covid_line_color and closure_line_color: The line color of covid_axes and closure_axes.
-        - covid_line_style and closure_line_style: The line style of covid_axes and closure_axes.
-        - covid_data_marker and closure_data_marker: The line marker of covid_axes and closure_axes.
-        - covid_x_data and closure_x_data: The current data of the x-axis.
-        - covid_y_data and closure_y_data: The current data of the y-axis.
-        - covid_horizontal_cross_hair: The horizontal axis of the covid cross-hair.
-        - covid_vertical_cross_hair: The vertical axis of the covid cross-hair.
-        - closure_horizontal_cross_hair: The horizontal axis of the closure cross-hair.
-        - closure_vertical_cross_hair: The vertical axis of the closure cross-hair.
-        - covid_prev_x: The previous cursor positions (x-axis on covid plot).
-        - covid_prev_y: The previous cursor positions (y-axis on covid plot).
-        - closure_prev_x: The previous cursor positions (x-axis on covid plot).
-        - closure_prev_y: The previous cursor positions (y-axis on covid plot).
-    """
-    figure: pyplot.Figure
-    covid_axes: pyplot.Axes
-    closure_axes: pyplot.Axes
-    background: Any
-
-    curr_x: Optional[datetime.date]
-    curr_y: Optional[int]
-
-    covid_line_color: str = '#385587'
-    closure_line_color: str = '#FFBF37'
-
-    covid_line_style: str = 'solid'
-    closure_line_style: str = 'solid'
-
-    covid_data_marker: str = '.'
-    closure_data_marker: str = '.'
-
-    covid_x_data: List[datetime.date]
-    covid_y_data: List[int]
-
-    closure_x_data: List[datetime.date]
-    closure_y_data: List[int]
-
-    covid_horizontal_cross_hair: matplotlib.lines.Line2D
-    covid_vertical_cross_hair: matplotlib.lines.Line2D
-    closure_horizontal_cross_hair: matplotlib.lines.Line2D
-    closure_vertical_cross_hair: matplotlib.lines.Line2D
-
-    covid_prev_x: float = 0
-    covid_prev_y: float = 0
-    closure_prev_x: float = 0
-    closure_prev_y: float = 0
-
-    plotted: bool
-
-    def __init__(self) -> None:
-        """
-        Initialize a PlotCanvas instance.
-        It will create figures and axes, connect events, and other necessary tasks.
-        """
-        self.figure = pyplot.Figure(tight_layout=True, linewidth=1)
-        super().__init__(self.figure)
-
-        self.covid_axes, self.closure_axes = self.figure.subplots(1, 2)
-        self.mpl_connect('motion_notify_event', self.on_mouse_move)
-        self.mpl_connect('scroll_event', self.on_scroll)
-        self.mpl_connect('button_press_event', self.on_mouse_button_press)
-        self.mpl_connect('button_release_event', self.on_mouse_button_release)
-
-        self.init_figures()
-        # Initialize curr_x and curr_y to None and updated from the on_mouse_move function
-        self.curr_x = None
-        self.curr_y = None
-
-        # Initialize a storage bool to check if the plots are out
-        self.plotted = False
-
-        # Formatting the right upper corner of the display
-        self.covid_axes.format_coord = lambda _, __: \
-            f'Date = {self.curr_x}, Cases = {self.curr_y}'
-        self.closure_axes.format_coord = lambda _, __: \
-            f'Date = {self.curr_x}, Status = ' \
-            f'{data.ENUM_TO_STATUS_DICT[data.ClosureStatus(self.curr_y)]}'
-
-        self.draw()
-
-        self.covid_horizontal_cross_hair = self.covid_axes.axhline(
-                y=0, color='black', linewidth=0.8, linestyle='--', animated=True)
-        self.covid_vertical_cross_hair = self.covid_axes.axvline(
-                x=0, color='black', linewidth=0.8, linestyle='--', animated=True)
-        self.closure_horizontal_cross_hair = self.closure_axes.axhline(
-                y=0, color='black', linewidth=0.8, linestyle='--', animated=True)
-        self.closure_vertical_cross_hair = self.closure_axes.axvline(
-                x=0, color='black', linewidth=0.8, linestyle='--', animated=True)
-
-    def init_figures(self) -> None:
-        """
-        Initialize the matplotlib figure, including titles and labels.
-        """
-        # Setting labels and title
-        self.covid_axes.set_title('COVID-19 Cases')
-        self.covid_axes.set_xlabel('Dates')
-        self.covid_axes.set_ylabel('Cumulative cases')
-
-        self.closure_axes.set_yticks(ticks=[0, 1, 2, 3], minor=False)
-        self.closure_axes.set_yticklabels(
-                labels=['Academic Break', 'Fully Open', 'Partially Open', 'Closed'],
-                minor=False)
-
-        for text in self.covid_axes.get_xticklabels():
-            text.set_rotation(40.0)
-        for text in self.closure_axes.get_xticklabels():
-            text.set_rotation(40.0)
-
-        self.closure_axes.set_title('School Closure Status')
-        self.closure_axes.set_xlabel('Dates')
-
-    def update_background(self) -> None:
-        """
-        Update self.background.
-        Note:
-            - This function should be called everytime after a call to self.draw().
-            - Because we need to update any changes of the background of the plot after redrawing.
-        """
-        self.background = self.copy_from_bbox(self.figure.bbox)
-
-    def update_lines(self, axes: matplotlib.axes.Axes,
-                     color: Optional[str] = None,
-                     style: Optional[str] = None,
-                     marker: Optional[str] = None) -> None:
-        """
-        Update the color, style, and marker of lines in the given axes.
-        """
-        if axes is self.covid_axes:
-            if color is not None:
-                self.covid_line_color = color
-            if style is not None:
-                self.covid_line_style = style
-            if marker is not None:
-                self.covid_data_marker = marker
-        elif axes is self.closure_axes:
-            if color is not None:
-                self.closure_line_color = color
-            if style is not None:
-                self.closure_line_style = style
-            if marker is not None:
-                self.closure_data_marker = marker
-        else:
-            raise ValueError('Illegal Axes!')
-
-        for line in axes.get_lines():
-            line: matplotlib.lines.Line2D
-
-            if color is not None:
-                line.set_color(color)
-            if style is not None:
-                line.set_linestyle(style)
-            if marker is not None:
-                line.set_marker(marker)
-
-        self.draw()
-        self.update_background()
-
-    def plot_covid_cases(self, covid_cases: List[data.CovidCaseData]) -> None:
-        """Plots covid_cases in self.axes_covid"""
-        self.covid_x_data = [c.date for c in covid_cases]
-        self.covid_y_data = [c.cases for c in covid_cases]
-
-        self.covid_axes.clear()
-        self.init_figures()
-        self.covid_axes.plot(self.covid_x_data, self.covid_y_data,
-                             linestyle=self.covid_line_style,
-                             marker=self.covid_data_marker,
-                             color=self.covid_line_color)
-
-        self.draw()
-        self.update_background()
-
-    def plot_school_closures(self, school_closures: List[data.SchoolClosureData]) -> None:
-        """Plots school_closures in self.axes_closure"""
-        self.closure_x_data = [c.date for c in school_closures]
-        self.closure_y_data = [c.status.value for c in school_closures]
-
-        self.closure_axes.clear()
-        self.init_figures()
-        self.closure_axes.plot(self.closure_x_data, self.closure_y_data,
-                               linestyle=self.closure_line_style,
-                               marker=self.closure_data_marker,
-                               color=self.closure_line_color)
-
-        self.draw()
-        self.update_background()
-
-    def get_closet_coordinates_from_x(self, x: int, x_data: List, y_data: List) -> Tuple[int, int]:
-        """
-        Return a tuple representing the closet point in the given x_data and y_data
-        based on the given x value.
-        """
-        x_date = datetime.date.fromtimestamp(0) + datetime.timedelta(days=x)
-        index = algorithms.binary_search(x_data, x_date)
-        x = (x_data[index] - datetime.date.fromtimestamp(0)).days
-        y = y_data[min(index + 1, len(y_data) - 1)]
-        self.curr_x = x_date
-        self.curr_y = y
-        return x, y
-
-    def pan(self, axes: pyplot.Axes, event: matplotlib.backend_bases.MouseEvent) -> None:
-        """
-        Pan the axes based on the given mouse event.
-        """
-        min_x, max_x = axes.get_xlim()
-        min_y, max_y = axes.get_ylim()
-        display_to_data = axes.transData.inverted()
-        prev_data = (0, 0)
-
-        if axes is self.covid_axes:
-            prev_data = display_to_data.transform_point((self.covid_prev_x, self.covid_prev_y))
-            self.covid_prev_x = event.x
-            self.covid_prev_y = event.y
-        elif axes is self.closure_axes:
-            prev_data = display_to_data.transform_point((self.closure_prev_x, self.closure_prev_y))
-            self.closure_prev_x = event.x
-            self.closure_prev_y = event.y
-
-        dx = (event.xdata - prev_data[0])
-        dy = (event.ydata - prev_data[1])
-
-        axes.set_xlim(min_x - dx, max_x - dx)
-        axes.set_ylim(min_y - dy, max_y - dy)
-
-        self.draw()
-        self.update_background()
-
-    def on_mouse_move(self, event: matplotlib.backend_bases.MouseEvent) -> None:
-        """
-        The handler of on_mouse_move event, which renders the cross-hair and mouse drag (pan).
-        Optimized with blit, so now the FPS is very high.
-
-        If the user is dragging the plot, then we pan the plot.
-        """
-        self.restore_region(self.background)
-        if not event.inaxes:
-            self.covid_horizontal_cross_hair.set_visible(False)
-            self.covid_vertical_cross_hair.set_visible(False)
-            self.closure_horizontal_cross_hair.set_visible(False)
-            self.closure_vertical_cross_hair.set_visible(False)
-            self.curr_x = None
-            self.curr_y = None
-            self.blit(self.figure.bbox)
-            self.flush_events()
-            return
-
-        x = event.xdata
-        y = event.ydata
-
-        if event.inaxes is self.covid_axes:
-            if event.button == matplotlib.backend_bases.MouseButton.LEFT:
-                self.pan(self.covid_axes, event)
-
-            x, y = self.get_closet_coordinates_from_x(
-                    x, self.covid_x_data, self.covid_y_data)
-
-            self.covid_horizontal_cross_hair.set_visible(True)
-            self.covid_vertical_cross_hair.set_visible(True)
-            self.covid_horizontal_cross_hair.set_ydata(y)
-            self.covid_vertical_cross_hair.set_xdata(x)
-            self.covid_axes.draw_artist(self.covid_horizontal_cross_hair)
-            self.covid_axes.draw_artist(self.covid_vertical_cross_hair)
-
-        elif event.inaxes is self.closure_axes:
-            if event.button == matplotlib.backend_bases.MouseButton.LEFT:
-                self.pan(self.closure_axes, event)
-
-            x, y = self.get_closet_coordinates_from_x(
-                    x, self.closure_x_data, self.closure_y_data)
-
-            self.closure_horizontal_cross_hair.set_visible(True)
-            self.closure_vertical_cross_hair.set_visible(True)
-            self.closure_horizontal_cross_hair.set_ydata(y)
-            self.closure_vertical_cross_hair.set_xdata(x)
-            self.closure_axes.draw_artist(self.closure_horizontal_cross_hair)
-            self.closure_axes.draw_artist(self.closure_vertical_cross_hair)
-
-        self.blit(self.figure.bbox)
-        self.flush_events()
-
-    @staticmethod
-    def zoom(is_zoom_in: bool, zoom_factor: float, x: float,
-             original_min: float, original_max: float) -> Tuple[float, float]:
-        """
-        Return the new limit(minimum and maximum) based on several zooming factors centered on x.
-        """
-        length = original_max - original_min
-        zoom_length = length * zoom_factor
-        left_ratio = (x - original_min) / length
-        right_ratio = 1 - left_ratio
-        left_zoom_length = zoom_length * left_ratio
-        right_zoom_length = zoom_length * right_ratio
-
-        if is_zoom_in:
-            return original_min + left_zoom_length, original_max - right_zoom_length
-        else:
-            return original_min - left_zoom_length, original_max + right_zoom_length
-
-    def on_scroll(self, event: matplotlib.backend_bases.MouseEvent) -> None:
-        """
-        Zoom in or zoom out as the user scroll up or down.
-        """
-        if not event.inaxes:
-            return
-
-        zoom_factor = 0.2
-        x = event.xdata
-        y = event.ydata
-        min_x, max_x = 0, 0
-        min_y, max_y = 0, 0
-
-        if event.inaxes is self.covid_axes:
-            min_x, max_x = self.covid_axes.get_xlim()
-            min_y, max_y = self.covid_axes.get_ylim()
-        elif event.inaxes is self.closure_axes:
-            min_x, max_x = self.closure_axes.get_xlim()
-            min_y, max_y = self.closure_axes.get_ylim()
-
-        if event.button == 'up':
-            min_x, max_x = self.zoom(True, zoom_factor, x, min_x, max_x)
-            min_y, max_y = self.zoom(True, zoom_factor, y, min_y, max_y)
-        elif event.button == 'down':
-            min_x, max_x = self.zoom(False, zoom_factor, x, min_x, max_x)
-            min_y, max_y = self.zoom(False, zoom_factor, y, min_y, max_y)
-
-        if event.inaxes is self.covid_axes:
-            self.covid_axes.set_xlim(min_x, max_x)
-            self.covid_axes.set_ylim(min_y, max_y)
-        elif event.inaxes is self.closure_axes:
-            self.closure_axes.set_xlim(min_x, max_x)
-
-        self.draw()
-        self.update_background()
-
-    def on_mouse_button_press(self, event: matplotlib.backend_bases.MouseEvent) -> None:
-        """
-        If the left button is pressed, we start to pan the plot as the mouse moves.
-        This function serve as the start of the pan operation.
-        """
-        if event.button == matplotlib.backend_bases.MouseButton.LEFT:
-            if event.inaxes is self.covid_axes:
-                self.covid_prev_x = event.x
-                self.covid_prev_y = event.y
-                self.closure_prev_x = 0
-                self.closure_prev_y = 0
-            elif event.inaxes is self.closure_axes:
-                self.covid_prev_x = 0
-                self.covid_prev_y = 0
-                self.closure_prev_x = event.x
-                self.closure_prev_y = event.y
-
-    def on_mouse_button_release(self, event: matplotlib.backend_bases.MouseEvent) -> None:
-        """
-        If the left button is released, we end the panning action.
-        """
-        if event.button == matplotlib.backend_bases.MouseButton.LEFT:
-            self.covid_prev_x = 0
-            self.covid_prev_y = 0
-            self.closure_prev_x = 0
-            self.closure_prev_y = 0
-
-    def reset(self) -> None:
-        """Resets the plots to the default style"""
-        self.covid_line_color = '#385587'
-        self.closure_line_color = '#FFBF37'
-
-        self.covid_line_style = 'solid'
-        self.closure_line_style = 'solid'
-
-        self.covid_data_marker = '.'
-        self.closure_data_marker = '.'
-
 
 class MainWindowUI(QMainWindow):
     """
@@ -490,6 +81,10 @@ class MainWindowUI(QMainWindow):
             - global_radio_button: A radio button that toggles between national and global plots.
             - country_shortcut_buttons: Several buttons that are used to select major countries.
             - location_reset_button: A button to reset the country selected.
+            - series_selection_label: A label that displays the word "Series".
+            - series_selection_combo_box: A combo box to select the series of covid cases to plot.
+            - metric_selection_label: A label that displays the word "Metric".
+            - metric_selection_combo_box: A combo box to select the metric (like deaths) to plot.
         - date_group: A group of widgets which are responsible for selecting date range.
             - start_date_label: A label that displays "Start Date:".
             - end_date_label: A label that displays "End Date:".
@@ -499,8 +94,13 @@ class MainWindowUI(QMainWindow):
             - end_date_slider: A slider to choose the plot end date conveniently.
             - date_reset_button: A button to reset the dates selected.
             - date_confirm_button: A button to confirm and plot the dates selected.
+            - play_button: A button to play or pause the playback of the date range.
+            - playback_speed_combo_box: A combo box to select the speed of the playback.
         - plot_navigation_tool_bar: The matplotlib plot toolbar, edited to only contain home button.
         - plot_canvas: Our customized matplotlib canvas, holding our figures.
+            - Both plot_tool_bar and plot_canvas are None until init_plot is called.
+        - plot_layout: The layout that holds plot_tool_bar and plot_canvas.
+        - plot_placeholder_label: A label shown in place of the plot until init_plot is called.
         - menu_bar: A menu bar that contains numerous functionalities.
             - file_menu: A menu to perform operations such as saving the plot.
             - edit_menu: A menu to perform operations such as renaming the window.
@@ -537,6 +137,10 @@ class MainWindowUI(QMainWindow):
     # Key countries specified by data.KEY_COUNTRIES
     country_shortcut_buttons: List[StandardPushButton]
     location_reset_button: StandardPushButton
+    series_selection_label: StandardLabel
+    series_selection_combo_box: StandardComboBox
+    metric_selection_label: StandardLabel
+    metric_selection_combo_box: StandardComboBox
 
     # Date Group
     date_group: StandardGroupBox
@@ -548,10 +152,14 @@ class MainWindowUI(QMainWindow):
     end_date_slider: StandardSlider
     date_reset_button: StandardPushButton
     date_confirm_button: StandardPushButton
+    play_button: StandardPushButton
+    playback_speed_combo_box: StandardComboBox
 
     # Plot
-    plot_tool_bar: PlotToolbar
-    plot_canvas: PlotCanvas
+    plot_tool_bar: Optional[gui_plot.PlotToolbar] = None
+    plot_canvas: Optional[gui_plot.PlotCanvas] = None
+    plot_layout: QVBoxLayout
+    plot_placeholder_label: StandardLabel
 
     # Menu bar
     menu_bar: StandardMenuBar
@@ -649,6 +257,12 @@ class MainWindowUI(QMainWindow):
             button.setToolTip(button.text())
         self.location_reset_button = StandardPushButton('Reset', self.location_group)
         self.location_reset_button.setToolTip('Reset the location selection')
+        self.series_selection_label = StandardLabel('Series', self.location_group)
+        self.series_selection_combo_box = StandardComboBox(self.location_group)
+        self.series_selection_combo_box.setToolTip('Select the series of covid cases to plot')
+        self.metric_selection_label = StandardLabel('Metric', self.location_group)
+        self.metric_selection_combo_box = StandardComboBox(self.location_group)
+        self.metric_selection_combo_box.setToolTip('Select the metric to plot')
 
         # Date Group
         self.date_group = StandardGroupBox('Date', self)
@@ -664,10 +278,16 @@ class MainWindowUI(QMainWindow):
         self.date_reset_button.setToolTip('Reset the date')
         self.date_confirm_button = StandardPushButton('Confirm', self.date_group)
         self.date_confirm_button.setToolTip('Confirm the date selection and update the plot')
+        self.play_button = StandardPushButton('Play', self.date_group)
+        self.play_button.setToolTip('Play the date range forward, '
+                                    'move the end date slider to scrub')
+        self.playback_speed_combo_box = StandardComboBox(self.date_group, PLAYBACK_SPEEDS.keys())
+        self.playback_speed_combo_box.setToolTip('Select the speed of the playback')
 
         # Plot
-        self.plot_canvas = PlotCanvas()
-        self.plot_tool_bar = PlotToolbar(self.plot_canvas, self)
+        # With fast startup, the plot is created by init_plot after the window is shown.
+        self.plot_placeholder_label = StandardLabel('Loading the plot...', self)
+        self.plot_placeholder_label.setAlignment(Qt.AlignCenter)
 
         # Progress bar on status bar
         self.progress_bar = StandardProgressBar(self.statusBar())
@@ -731,7 +351,11 @@ class MainWindowUI(QMainWindow):
                 shortcut_layout.addWidget(self.country_shortcut_buttons[index], 2)
                 index += 1
 
+        location_group_layout.addWidget(self.series_selection_label, 2, 2)
+        location_group_layout.addWidget(self.series_selection_combo_box, 3, 2)
         location_group_layout.addWidget(self.location_reset_button, 4, 2)
+        location_group_layout.addWidget(self.metric_selection_label, 5, 0)
+        location_group_layout.addWidget(self.metric_selection_combo_box, 5, 1)
 
         # Date Group
         controller_layout.addWidget(self.date_group)
@@ -745,20 +369,51 @@ class MainWindowUI(QMainWindow):
         date_group_layout.insertSpacerItem(4, QSpacerItem(100, 30))
         date_group_layout.add_widget(self.date_confirm_button, 4, stretch=618)
         date_group_layout.add_widget(self.date_reset_button, 4, stretch=1000 - 618)
+        date_group_layout.add_widget(self.play_button, 5, stretch=618)
+        date_group_layout.add_widget(self.playback_speed_combo_box, 5, stretch=1000 - 618)
 
-        plot_layout = QVBoxLayout()
-        main_layout.addLayout(plot_layout, 618)
-        plot_layout.addWidget(self.plot_tool_bar)
-        plot_layout.addWidget(self.plot_canvas)
+        self.plot_layout = QVBoxLayout()
+        main_layout.addLayout(self.plot_layout, 618)
+        self.plot_layout.addWidget(self.plot_placeholder_label)
 
         widget.setLayout(main_layout)
         self.setCentralWidget(widget)
 
+        if not settings.FAST_STARTUP:
+            self.init_plot()
+
+    def init_plot(self) -> None:
+        """
+        Import matplotlib, create the plot canvas and its toolbar, and put them in place of
+        plot_placeholder_label.
+
+        Note:
+            - With fast startup, this function is called once the event loop is running, so that
+              the window shell could be shown before matplotlib is imported.
+            - Calling this function more than once has no effect.
+        """
+        if self.plot_canvas is not None:
+            return
+
+        import gui_plot
+
+        self.plot_canvas = gui_plot.PlotCanvas()
+        self.plot_tool_bar = gui_plot.PlotToolbar(self.plot_canvas, self)
+        self.plot_layout.removeWidget(self.plot_placeholder_label)
+        self.plot_placeholder_label.deleteLater()
+        self.plot_layout.addWidget(self.plot_tool_bar)
+        self.plot_layout.addWidget(self.plot_canvas)
+
 
 class DataThread(QThread):
     """
     A QThread subclass that initializes our data asynchronously.
+
+    The snapshot of the data is built in this thread too, and then sent to the main window, which
+    only ever reads complete snapshots. So the main window stays usable while the data are
+    initialized again.
     """
+    on_loaded: pyqtSignal = pyqtSignal(object)
 
     def __init__(self, parent: QObject) -> None:
         """Initializes the data initialization thread"""
@@ -767,6 +422,68 @@ class DataThread(QThread):
     def run(self) -> None:
         """Runs the data initialization thread"""
         data.init_data()
+        if data.GLOBAL_COVID_CASES == []:
+            # Failed to initialize, see ProgressUpdateThread.
+            return
+        import snapshot
+        self.on_loaded.emit(snapshot.DataSnapshot.from_data(settings.METRIC_DATASETS))
+
+
+class DataReloadThread(QThread):
+    """
+    A QThread subclass that loads a new snapshot of our data sets asynchronously.
+
+    Unlike DataThread, it does not change the data module, so the main window keeps using the
+    current snapshot while it runs. See snapshot.DataSnapshot.load.
+    """
+    on_loaded: pyqtSignal = pyqtSignal(object)
+    on_failed: pyqtSignal = pyqtSignal(str)
+
+    def __init__(self, parent: QObject) -> None:
+        """Initializes the data reload thread"""
+        super().__init__(parent)
+
+    def run(self) -> None:
+        """Runs the data reload thread"""
+        import snapshot
+        try:
+            new_snapshot = snapshot.DataSnapshot.load(
+                    RESOURCES_DICT[COVID19_RESOURCE_NAME].local_path,
+                    RESOURCES_DICT[SCHOOL_CLOSURE_RESOURCE_NAME].local_path,
+                    settings.METRIC_DATASETS)
+        except (OSError, ValueError, KeyError, IndexError, StopIteration) as e:
+            self.on_failed.emit(f'{type(e).__name__}: {e}')
+            return
+        self.on_loaded.emit(new_snapshot)
+
+
+class DataRefreshThread(QThread):
+    """
+    A QThread subclass that extends a snapshot by the new dates of the covid cases data set
+    asynchronously. Like DataReloadThread, it does not change the data module. See
+    snapshot.DataSnapshot.extended.
+
+    Instance Attributes:
+        - data_snapshot: The snapshot to extend, set before the thread is started.
+    """
+    on_refreshed: pyqtSignal = pyqtSignal(object, object)
+    on_failed: pyqtSignal = pyqtSignal(str)
+
+    data_snapshot: Optional[snapshot.DataSnapshot] = None
+
+    def __init__(self, parent: QObject) -> None:
+        """Initializes the data refresh thread"""
+        super().__init__(parent)
+
+    def run(self) -> None:
+        """Runs the data refresh thread"""
+        old_snapshot = self.data_snapshot
+        try:
+            new_snapshot = old_snapshot.extended(RESOURCES_DICT[COVID19_RESOURCE_NAME].local_path)
+        except (OSError, ValueError, KeyError, IndexError, StopIteration) as e:
+            self.on_failed.emit(f'{type(e).__name__}: {e}')
+            return
+        self.on_refreshed.emit(old_snapshot, new_snapshot)
 
 
 class ProgressUpdateThread(QThread):
@@ -801,12 +518,64 @@ class MainWindow(MainWindowUI):
 
     Instance Attributes:
         - progress_bar_update_thread: The thread for monitoring the progress of data init.
+        - data_thread: The thread that initializes our data.
         - is_user_operation: True if the user is editing the date.
             - The reason we used it here is that sometimes we need to change the date
               programmatically, but we don't want the slot to be signaled when we change the date
               programmatically.
+        - covid_marker_menu and closure_marker_menu: The menus to select the line markers.
+            - With fast startup, their actions are created when the markers menu is first opened.
+        - first_paint_filter: The event filter that tells us when the window is first painted.
+        - data_snapshot: The data sets shown by this window, see snapshot.DataSnapshot.
+            - It's None until data are initialized.
+            - It's replaced as a whole (never changed) when the data are initialized again or
+              the files of the data sets change, so no lock is needed to read it.
+        - data_watcher: The watcher of the files of our data sets.
+        - data_reload_timer: The timer that waits for the files to stop changing.
+        - data_reload_thread: The thread that loads a new snapshot.
+        - is_data_reload_pending: True if the files changed while data_reload_thread was running.
+        - data_refresh_thread: The thread that extends the snapshot by the new dates (F5).
+        - overlay_countries: The names of the countries overlaid on the plot.
+            - If it's empty, only the selected location is plotted.
+        - country_grid_window: The window with the tiles of all countries.
+            - It's None until the user first opens it.
+        - playback_timer: The timer that advances the playback, see on_play_button_clicked.
+        - playback_position: The number of dates the playback has advanced, which may be
+          fractional at slow speeds.
+        - profiler: The profiler of initializing, plotting, and panning, or None if we are not
+          profiling. See profiling.Profiler.
+        - profiling_action: The View menu item that starts and stops profiling.
+        - latency_monitor: The monitor of the event latencies and frame times of the plot, or None
+          if they are not monitored. See latency.LatencyMonitor.
+        - latency_action: The View menu item that starts and stops latency_monitor.
+        - latency_label: A label in the status bar that shows the statistics of latency_monitor.
+        - latency_timer: The timer that updates latency_label.
     """
+    plot_initialized: pyqtSignal = pyqtSignal()
+
     progress_bar_update_thread: ProgressUpdateThread
+    data_thread: DataThread
+    first_paint_filter: FirstPaintFilter
+    data_snapshot: Optional[snapshot.DataSnapshot] = None
+    data_watcher: QFileSystemWatcher
+    data_reload_timer: QTimer
+    data_reload_thread: DataReloadThread
+    is_data_reload_pending: bool = False
+    data_refresh_thread: DataRefreshThread
+    overlay_countries: List[str]
+    country_grid_window: Optional[gui_grid.CountryGridWindow] = None
+    playback_timer: QTimer
+    playback_position: float = 0.0
+    profiler: Optional[profiling.Profiler] = None
+    profiling_action: QAction
+    latency_monitor: Optional[latency.LatencyMonitor] = None
+    latency_action: QAction
+    latency_label: StandardLabel
+    latency_timer: QTimer
+
+    covid_marker_menu: QMenu
+    closure_marker_menu: QMenu
+    is_marker_menus_initialized: bool = False
 
     is_user_operation: bool = True
     is_slider_moving: bool = False
@@ -819,6 +588,27 @@ class MainWindow(MainWindowUI):
 
         # Please ignore the warning here.
         self.progress_bar_update_thread = ProgressUpdateThread(self)
+        self.data_thread = DataThread(self)
+
+        self.playback_timer = QTimer(self)
+        self.playback_timer.setInterval(PLAYBACK_FRAME_INTERVAL)
+
+        # The files of our data sets are watched once data are initialized, see watch_data_files.
+        self.data_watcher = QFileSystemWatcher(self)
+        self.data_reload_timer = QTimer(self)
+        self.data_reload_timer.setSingleShot(True)
+        self.data_reload_timer.setInterval(DATA_RELOAD_DELAY)
+        self.data_reload_thread = DataReloadThread(self)
+        self.data_refresh_thread = DataRefreshThread(self)
+        self.overlay_countries = []
+
+        # The latency statistics are shown while they are monitored, see set_latency_monitoring.
+        self.latency_label = StandardLabel('', self.statusBar())
+        set_font(self.latency_label, font_size=10)
+        self.statusBar().addPermanentWidget(self.latency_label)
+        self.latency_label.setVisible(False)
+        self.latency_timer = QTimer(self)
+        self.latency_timer.setInterval(LATENCY_UPDATE_INTERVAL)
 
         # Initialize menu
         self.init_menu()
@@ -829,6 +619,34 @@ class MainWindow(MainWindowUI):
         # Now, our data haven't initialized yet, so we disable all functional widgets for safety.
         self.set_enabled_functional_widgets(False)
 
+        if settings.FAST_STARTUP:
+            # Initializing data needs the plot, so wait for it.
+            self.initialization_group.setEnabled(False)
+            self.first_paint_filter = FirstPaintFilter(self)
+            self.first_paint_filter.painted.connect(self.on_first_painted)
+            QApplication.instance().installEventFilter(self.first_paint_filter)
+
+    @pyqtSlot()
+    def on_first_painted(self) -> None:
+        """
+        When the window shell is painted for the first time, we create the plot as soon as the
+        event loop finishes painting.
+        """
+        QApplication.instance().removeEventFilter(self.first_paint_filter)
+        QTimer.singleShot(0, self.init_plot)
+
+    def init_plot(self) -> None:
+        """
+        Create the plot (see MainWindowUI.init_plot), enable the widgets that need it, and emit
+        plot_initialized.
+        """
+        if self.plot_canvas is not None:
+            return
+        super().init_plot()
+        self.plot_canvas.setEnabled(self.location_group.isEnabled())
+        self.initialization_group.setEnabled(True)
+        self.plot_initialized.emit()
+
     def init_menu(self) -> None:
         """
         Initialize the menu bar
@@ -840,6 +658,17 @@ class MainWindow(MainWindowUI):
         save_plot.triggered.connect(self.save_plot)
         self.file_menu.addAction(save_plot)
 
+        export_time_lapse = QAction('Export Time-lapse...', self)
+        export_time_lapse.setStatusTip('Save the playback of the current plot as a GIF or an MP4')
+        export_time_lapse.triggered.connect(self.export_time_lapse)
+        self.file_menu.addAction(export_time_lapse)
+
+        refresh_data = QAction('Refresh COVID-19 Data', self)
+        refresh_data.setStatusTip('Read the new dates of the COVID-19 data set')
+        refresh_data.setShortcut('F5')
+        refresh_data.triggered.connect(self.refresh_covid_data)
+        self.file_menu.addAction(refresh_data)
+
         separator = QAction(self)
         separator.setSeparator(True)
         self.file_menu.addAction(separator)
@@ -886,39 +715,87 @@ class MainWindow(MainWindowUI):
         for style, description in LINE_STYLES.items():
             covid_action = QAction(description, covid_style_menu)
             covid_action.setStatusTip(description)
-            covid_action.triggered.connect(make_function(self.plot_canvas.update_lines,
-                                                         self.plot_canvas.covid_axes,
-                                                         style=style))
+            covid_action.triggered.connect(make_function(self.update_lines, True, style=style))
             covid_style_menu.addAction(covid_action)
 
             closure_action = QAction(description, closure_style_menu)
             closure_action.setStatusTip(description)
-            closure_action.triggered.connect(make_function(self.plot_canvas.update_lines,
-                                                           self.plot_canvas.closure_axes,
+            closure_action.triggered.connect(make_function(self.update_lines, False,
                                                            style=style))
             closure_style_menu.addAction(closure_action)
 
         # Show marker toggle menu
         marker_menu = self.settings_menu.addMenu('Markers')
-        covid_marker_menu = marker_menu.addMenu('COVID-19 Cases Line Marker')
-        closure_marker_menu = marker_menu.addMenu('School Closure Status Line Marker')
+        self.covid_marker_menu = marker_menu.addMenu('COVID-19 Cases Line Marker')
+        self.closure_marker_menu = marker_menu.addMenu('School Closure Status Line Marker')
+        if settings.FAST_STARTUP:
+            marker_menu.aboutToShow.connect(self.init_marker_menus)
+        else:
+            self.init_marker_menus()
+
+        # View Menu
+        view_statusbar = QAction('Display Statusbar', self)
+        view_statusbar.setCheckable(True)
+        view_statusbar.setChecked(True)
+        view_statusbar.setStatusTip('Turn on/off the statusbar')
+        view_statusbar.triggered.connect(self.toggle_statusbar)
+        self.view_menu.addAction(view_statusbar)
+
+        overlay_countries = QAction('Overlay Countries...', self)
+        overlay_countries.setStatusTip('Plot several countries at once')
+        overlay_countries.setShortcut('Ctrl+O')
+        overlay_countries.triggered.connect(self.select_overlay_countries)
+        self.view_menu.addAction(overlay_countries)
+
+        clear_overlay = QAction('Clear Overlay', self)
+        clear_overlay.setStatusTip('Plot the selected location only')
+        clear_overlay.triggered.connect(lambda: self.set_overlay_countries([]))
+        self.view_menu.addAction(clear_overlay)
+
+        country_grid = QAction('All Countries...', self)
+        country_grid.setStatusTip('Show a small plot of every country')
+        country_grid.setShortcut('Ctrl+G')
+        country_grid.triggered.connect(self.show_country_grid)
+        self.view_menu.addAction(country_grid)
+
+        self.profiling_action = QAction('Profile Performance', self)
+        self.profiling_action.setCheckable(True)
+        self.profiling_action.setStatusTip('Record profiles of initializing, plotting and panning')
+        self.profiling_action.triggered.connect(self.set_profiling)
+        self.view_menu.addAction(self.profiling_action)
+
+        self.latency_action = QAction('Show Latency Statistics', self)
+        self.latency_action.setCheckable(True)
+        self.latency_action.setStatusTip('Measure how fast the plot responds to the mouse')
+        self.latency_action.triggered.connect(self.set_latency_monitoring)
+        self.view_menu.addAction(self.latency_action)
+
+    @pyqtSlot()
+    def init_marker_menus(self) -> None:
+        """
+        Initialize the actions (with icons) of covid_marker_menu and closure_marker_menu.
+
+        Note:
+            - Calling this function more than once has no effect.
+        """
+        if self.is_marker_menus_initialized:
+            return
+        self.is_marker_menus_initialized = True
 
         for marker, info in LINE_MARKERS.items():
             description, icon_name = info
             try:
-                covid_action = QAction(description, covid_marker_menu)
+                covid_action = QAction(description, self.covid_marker_menu)
                 covid_action.setStatusTip(description)
-                covid_action.triggered.connect(make_function(self.plot_canvas.update_lines,
-                                                             self.plot_canvas.covid_axes,
+                covid_action.triggered.connect(make_function(self.update_lines, True,
                                                              marker=marker))
-                covid_marker_menu.addAction(covid_action)
+                self.covid_marker_menu.addAction(covid_action)
 
-                closure_action = QAction(description, closure_marker_menu)
+                closure_action = QAction(description, self.closure_marker_menu)
                 closure_action.setStatusTip(description)
-                closure_action.triggered.connect(make_function(self.plot_canvas.update_lines,
-                                                               self.plot_canvas.closure_axes,
+                closure_action.triggered.connect(make_function(self.update_lines, False,
                                                                marker=marker))
-                closure_marker_menu.addAction(closure_action)
+                self.closure_marker_menu.addAction(closure_action)
 
                 icon = QIcon(RESOURCES_DICT[icon_name].local_path)
                 covid_action.setIcon(icon)
@@ -927,20 +804,13 @@ class MainWindow(MainWindowUI):
                 # This is because none marker does not have icon.
                 pass
 
-        # View Menu
-        view_statusbar = QAction('Display Statusbar', self)
-        view_statusbar.setCheckable(True)
-        view_statusbar.setChecked(True)
-        view_statusbar.setStatusTip('Turn on/off the statusbar')
-        view_statusbar.triggered.connect(self.toggle_statusbar)
-        self.view_menu.addAction(view_statusbar)
-
     def init_signals(self) -> None:
         """
         Initialize the signals.
         """
         # Progress bar update
         self.progress_bar_update_thread.on_updated.connect(self.update_progress_bar)
+        self.data_thread.on_loaded.connect(self.on_data_initialized)
         # Init button
         self.initialization_button.clicked.connect(self.on_init_button_clicked)
         # Country selection
@@ -949,6 +819,12 @@ class MainWindow(MainWindowUI):
                 self.on_country_selection_combo_box_changed)
         # Global radio button
         self.global_radio_button.toggled.connect(self.on_global_radio_button_toggled)
+        # Series selection
+        self.series_selection_combo_box.currentTextChanged.connect(
+                self.on_series_selection_combo_box_changed)
+        # Metric selection
+        self.metric_selection_combo_box.currentTextChanged.connect(
+                self.on_metric_selection_combo_box_changed)
         for button in self.country_shortcut_buttons:
             button.clicked.connect(self.on_country_shortcut_buttons_clicked)
         # Location reset button
@@ -957,6 +833,8 @@ class MainWindow(MainWindowUI):
         self.date_confirm_button.clicked.connect(self.on_date_confirm_button_clicked)
         # Date reset button
         self.date_reset_button.clicked.connect(self.on_date_reset_button_clicked)
+        self.play_button.clicked.connect(self.on_play_button_clicked)
+        self.playback_timer.timeout.connect(self.on_playback_timer_timeout)
         # Date edit
         self.start_date_edit.dateChanged.connect(self.on_start_date_edit_changed)
         self.end_date_edit.dateChanged.connect(self.on_end_date_edit_changed)
@@ -967,34 +845,75 @@ class MainWindow(MainWindowUI):
         self.end_date_slider.sliderMoved.connect(self.on_end_date_slider_moved)
         self.end_date_slider.sliderReleased.connect(self.on_slider_released)
         self.end_date_slider.valueChanged.connect(self.on_end_date_slider_value_changed)
+        # Data reload
+        self.data_watcher.fileChanged.connect(self.on_data_file_changed)
+        self.data_watcher.directoryChanged.connect(self.on_data_file_changed)
+        self.data_reload_timer.timeout.connect(self.reload_data)
+        self.data_reload_thread.on_loaded.connect(self.on_data_reloaded)
+        self.data_reload_thread.on_failed.connect(self.on_data_reload_failed)
+        self.data_reload_thread.finished.connect(self.on_data_reload_finished)
+        self.data_refresh_thread.on_refreshed.connect(self.on_covid_data_refreshed)
+        self.data_refresh_thread.on_failed.connect(self.on_covid_data_refresh_failed)
+        # Latency statistics
+        self.latency_timer.timeout.connect(self.update_latency_label)
 
     def update_plot(self) -> None:
         """
         Update the plot according to current location and date range.
         """
-        filtered_covid_cases: List[data.CovidCaseData]
-        filtered_school_closures: List[data.SchoolClosureData]
+        import metrics
+
+        # A reload may replace data_snapshot, but this plot only reads the snapshot it started with.
+        data_snapshot = self.data_snapshot
+
+        # Plotting ends any playback.
+        self.playback_timer.stop()
+        self.play_button.setText('Play')
 
         # Current date range
         start_date: QDate = self.start_date_edit.date().toPyDate()
         end_date: QDate = self.end_date_edit.date().toPyDate()
 
         if self.global_radio_button.isChecked():
-            filtered_covid_cases = algorithms.linear_predicate(
-                    data.GLOBAL_COVID_CASES, lambda c: start_date <= c.date <= end_date)
-            filtered_school_closures = algorithms.linear_predicate(
-                    data.GLOBAL_SCHOOL_CLOSURES, lambda c: start_date <= c.date <= end_date)
+            location = metrics.GLOBAL_LOCATION
         else:
-            country = data.Country(self.country_selection_combo_box.currentText())
-            filtered_covid_cases = algorithms.linear_predicate(
-                    data.COUNTRIES_TO_COVID_CASES[country],
-                    lambda c: start_date <= c.date <= end_date)
-            filtered_school_closures = algorithms.linear_predicate(
-                    data.COUNTRIES_TO_SCHOOL_CLOSURES[country],
-                    lambda c: start_date <= c.date <= end_date)
-
-        self.plot_canvas.plot_covid_cases(filtered_covid_cases)
-        self.plot_canvas.plot_school_closures(filtered_school_closures)
+            location = self.country_selection_combo_box.currentText()
+        closure_timeline = data_snapshot.closure_timeline(location)
+
+        # The series are cached by the metrics engines, see metrics.MetricsEngine.
+        series_name = self.series_selection_combo_box.currentText()
+        metric = self.metric_selection_combo_box.currentText()
+        metrics_engine = data_snapshot.engine(metric)
+        label = data_snapshot.series_label(series_name, metric)
+
+        if self.country_grid_window is not None and self.country_grid_window.isVisible():
+            self.update_country_grid()
+
+        if self.overlay_countries != []:
+            # Countries without the metric are left out, and the location is plotted if none has it.
+            names = [name for name in self.overlay_countries
+                     if name in metrics_engine.location_indices]
+            if names != self.overlay_countries:
+                self.statusBar().showMessage(f'Some countries have no {metric} data')
+        else:
+            names = []
+        if names != []:
+            # The country x date matrix is sliced once, panning and zooming reuse the slice.
+            covid_dates, covid_values = metrics_engine.get_many(names, series_name, start_date,
+                                                                end_date)
+            timelines = [data_snapshot.closure_timeline(name).clip(start_date, end_date)
+                         for name in names]
+            self.plot_canvas.plot_overlay(covid_dates, names, covid_values, timelines, label)
+            return
+        if location in metrics_engine.location_indices:
+            covid_dates, covid_values = metrics_engine.get(location, series_name, start_date,
+                                                           end_date)
+            covid_values = covid_values.tolist()
+        else:
+            self.statusBar().showMessage(f'{location} has no {metric} data')
+            covid_dates, covid_values = [], []
+        self.plot_canvas.plot_covid_series(covid_dates, covid_values, label)
+        self.plot_canvas.plot_school_closures(closure_timeline.clip(start_date, end_date))
 
     def set_enabled_functional_widgets(self, is_enable: bool) -> None:
         """
@@ -1005,15 +924,18 @@ class MainWindow(MainWindowUI):
         """
         self.location_group.setEnabled(is_enable)
         self.date_group.setEnabled(is_enable)
-        self.plot_canvas.setEnabled(is_enable)
+        if self.plot_canvas is not None:
+            self.plot_canvas.setEnabled(is_enable)
 
-    def init_content(self) -> None:
+    def init_content(self, new_snapshot: snapshot.DataSnapshot) -> None:
         """
-        Initialize those functional widgets.
-
-        Note:
-            - This function should only be called after data are initialized.
+        Initialize those functional widgets with the given snapshot of our data.
         """
+        self.data_snapshot = new_snapshot
+        self.init_series_selection()
+        self.init_metric_selection()
+        self.watch_data_files()
+
         if not self.global_radio_button.isChecked():
             self.global_radio_button.toggle()
         # Location
@@ -1021,6 +943,42 @@ class MainWindow(MainWindowUI):
         # Date
         self.set_default_date()
 
+    def init_series_selection(self) -> None:
+        """
+        Fill the series selection combo box with the series of data_snapshot, keeping the current
+        selection if it is still available.
+
+        Note:
+            - This function should only be called after data_snapshot is initialized.
+        """
+        current_series = self.series_selection_combo_box.currentText()
+        series_names = self.data_snapshot.metrics_engine.series_names()
+        self.is_user_operation = False
+        self.series_selection_combo_box.clear()
+        self.series_selection_combo_box.addItems(series_names)
+        if current_series in series_names:
+            self.series_selection_combo_box.setCurrentText(current_series)
+        self.is_user_operation = True
+
+    def init_metric_selection(self) -> None:
+        """
+        Fill the metric selection combo box with the metrics of data_snapshot, keeping the current
+        selection if it is still available. The combo box is hidden if there is only one metric.
+
+        Note:
+            - This function should only be called after data_snapshot is initialized.
+        """
+        current_metric = self.metric_selection_combo_box.currentText()
+        metric_names = self.data_snapshot.metric_names()
+        self.is_user_operation = False
+        self.metric_selection_combo_box.clear()
+        self.metric_selection_combo_box.addItems(metric_names)
+        if current_metric in metric_names:
+            self.metric_selection_combo_box.setCurrentText(current_metric)
+        self.is_user_operation = True
+        self.metric_selection_label.setVisible(len(metric_names) > 1)
+        self.metric_selection_combo_box.setVisible(len(metric_names) > 1)
+
     def set_default_location(self) -> None:
         """
         Set the location group to its default state.
@@ -1032,7 +990,7 @@ class MainWindow(MainWindowUI):
         if not self.global_radio_button.isChecked():
             self.global_radio_button.toggle()
         self.country_selection_combo_box.clear()
-        self.country_selection_combo_box.addItems([c.name for c in data.SORTED_COUNTRIES])
+        self.country_selection_combo_box.addItems(self.data_snapshot.country_names)
         self.country_selection_combo_box.setCurrentText('Canada')
 
     def set_default_date(self) -> None:
@@ -1044,8 +1002,7 @@ class MainWindow(MainWindowUI):
         Note:
             - This function should only be called after data are initialized.
         """
-        max_date = min(data.ALL_COVID_CASES[-1].date, data.ALL_SCHOOL_CLOSURES[-1].date)
-        min_date = max(data.ALL_COVID_CASES[0].date, data.ALL_SCHOOL_CLOSURES[0].date)
+        min_date, max_date = self.data_snapshot.min_date, self.data_snapshot.max_date
         self.end_date_edit.set_extremum_date(min_date, max_date)
         self.end_date_edit.setDate(max_date)
         self.start_date_edit.set_extremum_date(min_date, max_date)
@@ -1055,8 +1012,7 @@ class MainWindow(MainWindowUI):
     def update_progress_bar(self, progress: int, description: str) -> None:
         """
         Update the progress bar and progress description (on status bar).
-        If data are initialized (progress >= 100), then we initialize our contents and hide the
-        progress bar.
+        Once data are initialized, the progress bar is hidden by on_data_initialized.
         """
         if 'Failed to' in description:
             QMessageBox.critical(self, 'Critical error', f'{description} \n'
@@ -1068,32 +1024,38 @@ class MainWindow(MainWindowUI):
 
         self.progress_bar.setValue(progress)
         self.statusBar().showMessage(description)
-        if progress >= 100:
-            self.init_content()
-            self.set_enabled_functional_widgets(True)
-            self.progress_bar.setVisible(False)
-            self.plot_canvas.reset()
-            self.update_plot()
-            self.plot_canvas.plotted = True
-            self.initialization_helper_label.setText(
-                    'Please click the button below \nto reinitialize our data!')
-            self.settings_menu.setDisabled(False)
+
+    @pyqtSlot(object)
+    def on_data_initialized(self, new_snapshot: snapshot.DataSnapshot) -> None:
+        """
+        When data_thread has initialized our data, we initialize our contents with their snapshot
+        and hide the progress bar. The status bar shows the timings of the slowest stages, see
+        data.INIT_DATA_RECORDER.
+        """
+        self.init_content(new_snapshot)
+        self.set_enabled_functional_widgets(True)
+        self.progress_bar.setVisible(False)
+        self.statusBar().showMessage(data.progress_description)
+        self.plot_canvas.reset()
+        self.update_plot()
+        self.plot_canvas.plotted = True
+        self.initialization_helper_label.setText(
+                'Please click the button below \nto reinitialize our data!')
+        self.settings_menu.setDisabled(False)
 
     @pyqtSlot()
     def on_init_button_clicked(self) -> None:
         """
         We initialize or re-initialize our data when the initialized_button is clicked.
+        While the data are initialized again, the main window keeps showing its current snapshot.
         """
-        if not self.progress_bar_update_thread.isRunning():
-            self.set_enabled_functional_widgets(False)
+        if not self.progress_bar_update_thread.isRunning() and not self.data_thread.isRunning():
             data.reset_data()
             settings.sort = \
                 algorithms.SORTING_ALGORITHMS[self.algorithms_selection_combo_box.currentText()]
             self.progress_bar.setVisible(True)
             self.progress_bar_update_thread.start()
-            # Please ignore the warning here.
-            data_thread = DataThread(self)
-            data_thread.start()
+            self.data_thread.start()
 
     @pyqtSlot(str)
     def on_country_search_bar_edited(self, new_text: str) -> None:
@@ -1110,10 +1072,10 @@ class MainWindow(MainWindowUI):
             return
         new_text = new_text.lower()
         len_text = len(new_text)
-        for country in data.SORTED_COUNTRIES:
-            if new_text in country.name.lower():
-                country_name = country.name
-                match_country[country.name] = len_text / len(country_name)
+        for name in self.data_snapshot.country_names:
+            if new_text in name.lower():
+                country_name = name
+                match_country[name] = len_text / len(country_name)
 
         if len(match_country) != 0:
             max_prop = max(match_country.values())
@@ -1141,6 +1103,22 @@ class MainWindow(MainWindowUI):
         """
         self.update_plot()
 
+    @pyqtSlot()
+    def on_series_selection_combo_box_changed(self) -> None:
+        """
+        When the user selects a new series, we update the plot correspondingly.
+        """
+        if self.is_user_operation:
+            self.update_plot()
+
+    @pyqtSlot()
+    def on_metric_selection_combo_box_changed(self) -> None:
+        """
+        When the user selects a new metric, we update the plot correspondingly.
+        """
+        if self.is_user_operation:
+            self.update_plot()
+
     @pyqtSlot()
     def on_country_shortcut_buttons_clicked(self) -> None:
         """
@@ -1228,6 +1206,7 @@ class MainWindow(MainWindowUI):
             self.on_date_edit_changed(min_qdate, self.end_date_slider)
         else:
             self.on_date_edit_changed(new_date, self.end_date_slider)
+        self.scrub_playback(new_date.toPyDate())
 
     def on_slider_value_changed(self, percentage: float, date_edit: StandardDateEdit) -> None:
         """
@@ -1322,6 +1301,240 @@ class MainWindow(MainWindowUI):
         # Saving canvas at desired path
         self.plot_canvas.print_png(path)
 
+    @pyqtSlot()
+    def on_play_button_clicked(self) -> None:
+        """
+        Play or pause the playback of the selected location.
+
+        A new playback (or one that has reached its end) starts from the start date, and then the
+        end date advances by the selected speed. See PlotCanvas.start_playback.
+        """
+        if self.playback_timer.isActive():
+            self.playback_timer.stop()
+            self.play_button.setText('Play')
+            return
+        if self.overlay_countries != []:
+            self.statusBar().showMessage('Playback is not available for overlaid countries')
+            return
+
+        canvas = self.plot_canvas
+        if canvas.playback_count is None or canvas.playback_count == len(canvas.covid_x_data):
+            self.update_plot()
+            canvas.start_playback()
+            self.playback_position = 0.0
+        self.playback_timer.start()
+        self.play_button.setText('Pause')
+
+    @pyqtSlot()
+    def on_playback_timer_timeout(self) -> None:
+        """
+        Advance the playback by one frame, and stop it at the end of the plotted dates.
+        """
+        dates = self.plot_canvas.covid_x_data
+        speed = PLAYBACK_SPEEDS[self.playback_speed_combo_box.currentText()]
+        self.playback_position = min(self.playback_position
+                                     + speed * PLAYBACK_FRAME_INTERVAL / 1000, len(dates) - 1)
+        # The frame is shown by scrub_playback when the end date changes.
+        self.end_date_edit.setDate(dates[int(self.playback_position)])
+        if self.playback_position >= len(dates) - 1:
+            self.playback_timer.stop()
+            self.play_button.setText('Play')
+            # The last frame shows every date, so the lines are drawn normally from now on.
+            self.plot_canvas.reset_playback()
+
+    def scrub_playback(self, end_date: datetime.date) -> None:
+        """
+        Show the frame of the playback that ends on end_date, if there is a playback.
+        """
+        canvas = self.plot_canvas
+        if canvas is None or canvas.playback_count is None:
+            return
+        count = max(1, bisect.bisect_right(canvas.covid_x_data, end_date))
+        if int(self.playback_position) != count - 1:
+            # The user moved the end date.
+            self.playback_position = count - 1
+        canvas.show_playback_frame(count)
+
+    @pyqtSlot()
+    def refresh_covid_data(self) -> None:
+        """
+        Read the new dates of the covid cases data set in data_refresh_thread, without
+        initializing the data again, and extend the current snapshot by them. See
+        on_covid_data_refreshed.
+        """
+        if self.data_snapshot is None or self.data_refresh_thread.isRunning():
+            return
+        self.data_refresh_thread.data_snapshot = self.data_snapshot
+        self.data_refresh_thread.start()
+
+    @pyqtSlot(object, object)
+    def on_covid_data_refreshed(self, old_snapshot: snapshot.DataSnapshot,
+                                new_snapshot: Optional[snapshot.DataSnapshot]) -> None:
+        """
+        Show the snapshot extended by data_refresh_thread, unless old_snapshot was replaced while
+        it was extended (the data were initialized or reloaded again).
+        """
+        if self.data_snapshot is not old_snapshot:
+            return
+        if new_snapshot is None:
+            QMessageBox.information(self, 'Information', 'The COVID-19 data set has changed, '
+                                                         'please initialize the data again.',
+                                    QMessageBox.Ok, QMessageBox.Ok)
+            return
+        new_dates = len(new_snapshot.dataset.dates) - len(old_snapshot.dataset.dates)
+        if new_dates == 0:
+            self.statusBar().showMessage('The COVID-19 data set is up to date')
+            return
+
+        self.set_data_snapshot(new_snapshot)
+        self.statusBar().showMessage(f'Read {new_dates} new dates of the COVID-19 data set')
+
+    @pyqtSlot(str)
+    def on_covid_data_refresh_failed(self, description: str) -> None:
+        """Keep the current snapshot if the covid cases data set could not be read."""
+        self.statusBar().showMessage(f'Failed to read the COVID-19 data set ({description})')
+
+    def watch_data_files(self) -> None:
+        """
+        Watch the files of our data sets, and their directories, since a file that is replaced (for
+        example, by saving it atomically) is not watched any more. See on_data_file_changed.
+        """
+        paths = []
+        for name in (COVID19_RESOURCE_NAME, SCHOOL_CLOSURE_RESOURCE_NAME):
+            paths.extend([RESOURCES_DICT[name].local_path, RESOURCES_DICT[name].local_dir_path])
+        for dataset in settings.METRIC_DATASETS:
+            paths.extend([dataset['local_path'], os.path.dirname(dataset['local_path'])])
+        watched = set(self.data_watcher.files() + self.data_watcher.directories())
+        new_paths = [path for path in dict.fromkeys(paths)
+                     if path not in watched and os.path.exists(path)]
+        if new_paths != []:
+            self.data_watcher.addPaths(new_paths)
+
+    @pyqtSlot(str)
+    def on_data_file_changed(self, _: str) -> None:
+        """
+        When a file of our data sets (or its directory) changes, we reload the data sets once the
+        files have not changed for DATA_RELOAD_DELAY milliseconds.
+        """
+        self.watch_data_files()
+        self.data_reload_timer.start()
+
+    @pyqtSlot()
+    def reload_data(self) -> None:
+        """
+        Load a new snapshot of our data sets in data_reload_thread, see on_data_reloaded.
+        The current plot stays usable while the files are read.
+        """
+        if self.data_snapshot is None or self.data_thread.isRunning():
+            # Initializing the data reads the files anyway.
+            return
+        if self.data_reload_thread.isRunning():
+            self.is_data_reload_pending = True
+            return
+        self.statusBar().showMessage('Reloading the data sets...')
+        self.data_reload_thread.start()
+
+    @pyqtSlot(object)
+    def on_data_reloaded(self, new_snapshot: snapshot.DataSnapshot) -> None:
+        """
+        Show the snapshot loaded by data_reload_thread, unless a newer snapshot is already shown
+        (the data were initialized again while it was loaded).
+        """
+        if self.data_snapshot is None or new_snapshot.version < self.data_snapshot.version:
+            return
+        self.set_data_snapshot(new_snapshot)
+        self.statusBar().showMessage(f'Reloaded the data sets, {new_snapshot.min_date} to '
+                                     f'{new_snapshot.max_date}')
+
+    @pyqtSlot(str)
+    def on_data_reload_failed(self, description: str) -> None:
+        """
+        Keep the current snapshot if the files could not be read, for example because they are
+        still being written. They are reloaded again when they change.
+        """
+        self.statusBar().showMessage(f'Failed to reload the data sets ({description})')
+
+    @pyqtSlot()
+    def on_data_reload_finished(self) -> None:
+        """Reload the data sets again if their files changed while they were being read."""
+        if self.is_data_reload_pending:
+            self.is_data_reload_pending = False
+            self.reload_data()
+
+    def set_data_snapshot(self, new_snapshot: snapshot.DataSnapshot) -> None:
+        """
+        Show new_snapshot instead of data_snapshot, and update the plot.
+
+        The selected location, series, and dates are kept where new_snapshot still has them. If the
+        end date was the last date, it stays the last date, so new dates are shown.
+        """
+        old_snapshot, self.data_snapshot = self.data_snapshot, new_snapshot
+        self.init_series_selection()
+        self.init_metric_selection()
+
+        if new_snapshot.country_names != old_snapshot.country_names:
+            country_name = self.country_selection_combo_box.currentText()
+            self.country_selection_combo_box.blockSignals(True)
+            self.country_selection_combo_box.clear()
+            self.country_selection_combo_box.addItems(new_snapshot.country_names)
+            self.country_selection_combo_box.setCurrentText(
+                    country_name if country_name in new_snapshot.country_names else 'Canada')
+            self.country_selection_combo_box.blockSignals(False)
+            self.overlay_countries = [name for name in self.overlay_countries
+                                      if name in new_snapshot.country_names]
+
+        # Narrowing the date ranges clamps the dates, and start <= end still holds.
+        is_latest = self.end_date_edit.date().toPyDate() >= old_snapshot.max_date
+        self.start_date_edit.set_extremum_date(new_snapshot.min_date, new_snapshot.max_date)
+        self.end_date_edit.set_extremum_date(new_snapshot.min_date, new_snapshot.max_date)
+        if is_latest:
+            self.end_date_edit.setDate(new_snapshot.max_date)
+        self.update_plot()
+
+    @pyqtSlot()
+    def export_time_lapse(self) -> None:
+        """Save the playback of the plotted location at the selected speed."""
+        if self.plot_canvas is None or not self.plot_canvas.plotted \
+                or not self.location_group.isEnabled():
+            return
+        if self.overlay_countries != []:
+            self.statusBar().showMessage('Time-lapses are not available for overlaid countries')
+            return
+        path, _ = StandardFileDialog().getSaveFileName(self, 'Export Time-lapse', '',
+                                                       'GIF(*.gif);;MP4(*.mp4)')
+        if path == '':
+            return
+
+        # export_plots is imported here, so it does not delay the first paint.
+        import export_plots
+        canvas = self.plot_canvas
+        location = 'Global' if self.global_radio_button.isChecked() \
+            else self.country_selection_combo_box.currentText()
+        days_per_frame = max(1, PLAYBACK_SPEEDS[self.playback_speed_combo_box.currentText()]
+                             // TIME_LAPSE_FPS)
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        self.statusBar().showMessage(f'Exporting {path}...')
+        try:
+            frames = export_plots.save_time_lapse(
+                    path, location, canvas.covid_x_data, canvas.covid_y_data,
+                    canvas.closure_timeline, canvas.covid_label, days_per_frame, TIME_LAPSE_FPS)
+        except (ValueError, RuntimeError) as e:
+            self.statusBar().clearMessage()
+            QMessageBox.warning(self, 'Warning', str(e), QMessageBox.Ok, QMessageBox.Ok)
+            return
+        finally:
+            QApplication.restoreOverrideCursor()
+        self.statusBar().showMessage(f'Exported {frames} frames into {path}')
+
+    def update_lines(self, is_covid: bool, color: Optional[str] = None,
+                     style: Optional[str] = None, marker: Optional[str] = None) -> None:
+        """
+        Update the color, style, and marker of the lines in the covid axes (if is_covid is True)
+        or the closure axes of plot_canvas. See PlotCanvas.update_lines.
+        """
+        axes = self.plot_canvas.covid_axes if is_covid else self.plot_canvas.closure_axes
+        self.plot_canvas.update_lines(axes, color, style, marker)
+
     def change_color(self, axes: matplotlib.axes.Axes) -> None:
         """Changes the line color in the plot to a specific color as given."""
         color_dialog = StandardColorDialog()
@@ -1349,6 +1562,143 @@ class MainWindow(MainWindowUI):
         if ok and new_name != '':
             self.setWindowTitle(new_name)
 
+    @pyqtSlot(bool)
+    def set_profiling(self, is_enabled: bool, directory: Optional[str] = None) -> None:
+        """
+        Start or stop profiling data.init_data, update_plot, and the panning and drawing of the
+        plot. The profiles are written into a new subdirectory of the given directory (or
+        profiling.DEFAULT_PROFILE_DIR) when profiling stops.
+        """
+        # Nothing is imported or replaced until profiling starts, see profiling.py.
+        import profiling
+        if is_enabled == (self.profiler is not None):
+            return
+        if is_enabled:
+            import gui_plot
+            self.profiler = profiling.Profiler([
+                (data, 'init_data', 'data.init_data'),
+                (MainWindow, 'update_plot', 'MainWindow.update_plot'),
+                (gui_plot.PlotCanvas, 'on_mouse_move', 'PlotCanvas.on_mouse_move'),
+                (gui_plot.PlotCanvas, 'draw', 'PlotCanvas.draw')
+            ], directory or profiling.DEFAULT_PROFILE_DIR)
+            self.profiler.start()
+            message = 'Profiling initializing, plotting and panning...'
+        else:
+            paths = self.profiler.stop()
+            message = f'Wrote {len(paths)} profile files into {self.profiler.directory}'
+            self.profiler = None
+        if self.plot_canvas is not None:
+            # The mouse handlers were connected before they were replaced or restored.
+            self.plot_canvas.connect_events()
+        self.profiling_action.setChecked(is_enabled)
+        self.statusBar().showMessage(message)
+
+    @pyqtSlot(bool)
+    def set_latency_monitoring(self, is_enabled: bool) -> None:
+        """
+        Start or stop monitoring the event latencies and frame times of the plot. The statistics
+        are shown in the status bar while they are monitored, and written as JSON into
+        profiling.DEFAULT_PROFILE_DIR when monitoring stops.
+        """
+        if is_enabled and self.plot_canvas is None:
+            is_enabled = False
+        if is_enabled == (self.latency_monitor is not None):
+            self.latency_action.setChecked(is_enabled)
+            return
+        if is_enabled:
+            # Nothing is imported or replaced until monitoring starts, see latency.py.
+            import latency
+            self.latency_monitor = latency.LatencyMonitor(self.plot_canvas)
+            self.latency_monitor.start()
+            self.latency_timer.start()
+            self.update_latency_label()
+        else:
+            import profiling
+            self.latency_timer.stop()
+            self.latency_monitor.stop()
+            try:
+                path = self.latency_monitor.write_json(profiling.DEFAULT_PROFILE_DIR)
+                self.statusBar().showMessage(f'Wrote the latency statistics into {path}')
+            except OSError as e:
+                self.statusBar().showMessage(f'Failed to write the latency statistics ({e})')
+            self.latency_monitor = None
+        self.latency_label.setVisible(is_enabled)
+        self.latency_action.setChecked(is_enabled)
+
+    @pyqtSlot()
+    def update_latency_label(self) -> None:
+        """Show the latest statistics of latency_monitor in latency_label."""
+        if self.latency_monitor is not None:
+            self.latency_label.setText(self.latency_monitor.summary())
+
+    @pyqtSlot()
+    def select_overlay_countries(self) -> None:
+        """Let the user select the countries to overlay on the plot."""
+        if self.data_snapshot is None or not self.location_group.isEnabled():
+            return
+        dialog = StandardListSelectionDialog(self.data_snapshot.country_names,
+                                             self.overlay_countries, self)
+        dialog.setWindowTitle('Overlay Countries')
+        dialog.resize(400, 600)
+        if dialog.exec():
+            self.set_overlay_countries(dialog.selected_items())
+
+    def set_overlay_countries(self, names: List[str]) -> None:
+        """
+        Overlay the given countries on the plot, or plot the selected location only if names is
+        empty.
+        """
+        self.overlay_countries = names
+        if self.data_snapshot is None or not self.location_group.isEnabled():
+            return
+        if names != []:
+            self.statusBar().showMessage(f'Overlaying {len(names)} countries')
+        self.update_plot()
+
+    @pyqtSlot()
+    def show_country_grid(self) -> None:
+        """Show the tiles of all countries in their own window."""
+        if self.data_snapshot is None or not self.location_group.isEnabled():
+            return
+        if self.country_grid_window is None:
+            # gui_grid is imported here, so it does not delay the first paint.
+            import gui_grid
+            self.country_grid_window = gui_grid.CountryGridWindow(self)
+            self.country_grid_window.country_activated.connect(self.on_country_grid_activated)
+        self.update_country_grid()
+        self.country_grid_window.show()
+        self.country_grid_window.raise_()
+
+    def update_country_grid(self) -> None:
+        """
+        Show the selected series and date range in country_grid_window.
+        Only the tiles that are not cached for them are rendered again.
+        """
+        start_date = self.start_date_edit.date().toPyDate()
+        end_date = self.end_date_edit.date().toPyDate()
+        series_name = self.series_selection_combo_box.currentText()
+        metric = self.metric_selection_combo_box.currentText()
+        data_snapshot = self.data_snapshot
+        metrics_engine = data_snapshot.engine(metric)
+        names = [name for name in data_snapshot.country_names
+                 if name in metrics_engine.location_indices]
+        dates, values = metrics_engine.get_many(names, series_name, start_date, end_date)
+        timelines = [data_snapshot.closure_timeline(name).clip(start_date, end_date)
+                     for name in names]
+        self.country_grid_window.set_data(names, dates, values, timelines,
+                                          data_snapshot.series_label(series_name, metric),
+                                          self.plot_canvas.covid_line_color,
+                                          data_snapshot.version)
+
+    @pyqtSlot(str)
+    def on_country_grid_activated(self, country_name: str) -> None:
+        """Plot the country whose tile the user double-clicked."""
+        self.set_overlay_countries([])
+        self.country_selection_combo_box.setCurrentText(country_name)
+        self.global_radio_button.setChecked(False)
+        self.raise_()
+        self.activateWindow()
+
     @pyqtSlot(bool)
     def toggle_statusbar(self, state: bool) -> None:
         """Toggles the statusbar (visible or invisible)."""
@@ -1359,8 +1709,9 @@ class MainWindow(MainWindowUI):
 
     def resizeEvent(self, a0: QtGui.QResizeEvent) -> None:
         super().resizeEvent(a0)
-        self.plot_canvas.draw()
-        self.plot_canvas.update_background()
+        if self.plot_canvas is not None:
+            self.plot_canvas.draw()
+            self.plot_canvas.update_background()
 
 
 if __name__ == '__main__':
@@ -1376,11 +1727,11 @@ if __name__ == '__main__':
 
     # Many checks are not very meaningful for our purposes.
     python_ta.check_all(config={
-        'extra-imports'  : ['math', 'platform', 'time', 'typing', 'matplotlib', 'matplotlib.axes',
-                            'matplotlib.backend_bases', 'matplotlib.lines', 'matplotlib.style',
-                            'matplotlib.backends.backend_qt5agg',
-                            'matplotlib.backends.backend_qt5agg', 'algorithms', 'data',
-                            'gui_utils', 'resource_manager', 'ctypes'],
+        'extra-imports'  : ['__future__', 'bisect', 'datetime', 'math', 'platform', 'time',
+                            'typing', 'PyQt5', 'matplotlib.axes', 'algorithms', 'data',
+                            'export_plots', 'gui_grid', 'gui_plot', 'gui_utils', 'latency', 'os',
+                            'metrics', 'profiling',
+                            'resource_manager', 'snapshot', 'ctypes'],
         'allowed-io'     : [],
         'max-line-length': 100,
         'disable'        : ['R1705', 'C0200', 'E0602', 'E9989', 'C0302', 'W0401', 'E9997', 'R0902']
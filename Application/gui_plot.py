@@ -0,0 +1,767 @@
+"""
+This module contains the matplotlib plot widgets of our project.
+
+It is imported lazily by gui_main, because importing matplotlib and its Qt backend is the slowest
+part of our startup.
+"""
+# Python built-ins
+import collections
+import datetime
+import math
+from typing import Any, List, Optional, Tuple
+
+# NumPy
+import numpy
+
+# Matplotlib
+import matplotlib.axes
+import matplotlib.backend_bases
+import matplotlib.collections
+import matplotlib.dates
+import matplotlib.lines
+import matplotlib.text
+from matplotlib import pyplot
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
+
+# Our modules
+import algorithms
+import data
+import plot_style
+from gui_utils import *
+
+
+# The maximum number of overlaid countries listed by a readout and by the legend.
+OVERLAY_READOUT_LIMIT = 15
+OVERLAY_LEGEND_LIMIT = 20
+
+# The maximum size of the frames cached by a playback in bytes.
+PLAYBACK_CACHE_BYTES = 256 * 1024 * 1024
+
+
+class PlotToolbar(NavigationToolbar):
+    """
+    A customized toolbar from matplotlib.
+
+    When needed, we could add more attributes and methods.
+
+    Instance Attributes:
+        - toolitems: Override the super toolitems for our purpose.
+        - window: A MainWindow instance that is the parent window of this toolbar.
+    """
+
+    toolitems: List = [t for t in NavigationToolbar.toolitems if t[0] in {'Home'}]
+    window: Any
+
+    def __init__(self, canvas: FigureCanvas, parent: QWidget, coordinates: bool = True) -> None:
+        """
+        Initialize the Plot toolbar class
+        """
+        super().__init__(canvas, parent, coordinates)
+        self.window = parent
+        set_font(self)
+
+    def _init_toolbar(self) -> None:
+        """
+        Intentionally left as blank.
+        """
+
+    def home(self, *args) -> None:
+        """
+        Override the super home function.
+
+        This function is called when user clicks the home button on this toolbar.
+        Upon trigger, then we re-plot our plots to its original states, with original scales.
+        """
+        if self.canvas.plotted:
+            self.window.update_plot()
+
+
+class PlotCanvas(FigureCanvas):
+    """
+    Figure widget from matplotlib with many customizations like cross-hair, customized zoom,
+    and pan.
+
+    We used blit to optimize the frame rates of the figure.
+
+    Instance Attributes:
+        - figure: The actual matplotlib figure instance.
+        - covid_axes: The axes of covid cases plot.
+        - closure_axes: The axes of closure status plot.
+        - background: The background of the figure, and it's used for blitting.
+        - curr_x: Current x value that should always be a date.
+        - curr_y: Current y value that should always be an int.
+            - Note: curr_x and curr_y may be None if the cursor is not on the axes.
+        - covid_line_color and closure_line_color: The line color of covid_axes and closure_axes.
+        - covid_line_style and closure_line_style: The line style of covid_axes and closure_axes.
+        - covid_data_marker and closure_data_marker: The line marker of covid_axes and closure_axes.
+        - covid_label: The name of the series plotted on covid_axes, see metrics.SERIES.
+        - covid_x_data and closure_x_data: The current data of the x-axis.
+        - covid_y_data and closure_y_data: The current data of the y-axis.
+            - The closure data are the steps of closure_timeline, see ClosureTimeline.step_data.
+        - closure_timeline: The closure timeline currently plotted.
+        - overlay_names: The names of the overlaid countries, or an empty list if one location is
+          plotted. See plot_overlay.
+        - overlay_x_data: The dates of the overlaid series, as matplotlib date numbers.
+        - overlay_values: The overlaid covid series, shape (countries, dates).
+        - overlay_timelines: The overlaid closure timelines.
+        - covid_readout and closure_readout: The texts that show the values of all overlaid series
+          at the date under the cursor. They are created by plot_overlay, because clearing the
+          axes removes them.
+        - covid_line and closure_line: The lines of the plotted location.
+        - playback_count: The number of dates shown by the playback, or None if there is no
+          playback. See start_playback.
+        - playback_frames: The frames of the playback (regions of the canvas) keyed on their
+          number of dates, from the least recently shown.
+        - covid_horizontal_cross_hair: The horizontal axis of the covid cross-hair.
+        - covid_vertical_cross_hair: The vertical axis of the covid cross-hair.
+        - closure_horizontal_cross_hair: The horizontal axis of the closure cross-hair.
+        - closure_vertical_cross_hair: The vertical axis of the closure cross-hair.
+        - covid_prev_x: The previous cursor positions (x-axis on covid plot).
+        - covid_prev_y: The previous cursor positions (y-axis on covid plot).
+        - closure_prev_x: The previous cursor positions (x-axis on covid plot).
+        - closure_prev_y: The previous cursor positions (y-axis on covid plot).
+        - event_connections: The ids of the connections of our mouse event handlers.
+    """
+    figure: pyplot.Figure
+    covid_axes: pyplot.Axes
+    closure_axes: pyplot.Axes
+    background: Any
+
+    curr_x: Optional[datetime.date]
+    curr_y: Optional[int]
+
+    covid_line_color: str = plot_style.DEFAULT_COVID_LINE_COLOR
+    closure_line_color: str = plot_style.DEFAULT_CLOSURE_LINE_COLOR
+
+    covid_line_style: str = plot_style.DEFAULT_LINE_STYLE
+    closure_line_style: str = plot_style.DEFAULT_LINE_STYLE
+
+    covid_data_marker: str = plot_style.DEFAULT_DATA_MARKER
+    closure_data_marker: str = plot_style.DEFAULT_DATA_MARKER
+
+    covid_label: str = plot_style.DEFAULT_COVID_LABEL
+
+    covid_x_data: List[datetime.date]
+    covid_y_data: List[float]
+
+    closure_x_data: List[datetime.date]
+    closure_y_data: List[float]
+    closure_timeline: data.ClosureTimeline
+
+    covid_line: matplotlib.lines.Line2D
+    closure_line: matplotlib.lines.Line2D
+    playback_count: Optional[int]
+    playback_frames: collections.OrderedDict
+
+    covid_horizontal_cross_hair: matplotlib.lines.Line2D
+    covid_vertical_cross_hair: matplotlib.lines.Line2D
+    closure_horizontal_cross_hair: matplotlib.lines.Line2D
+    closure_vertical_cross_hair: matplotlib.lines.Line2D
+
+    covid_prev_x: float = 0
+    covid_prev_y: float = 0
+    closure_prev_x: float = 0
+    closure_prev_y: float = 0
+
+    overlay_names: List[str]
+    overlay_x_data: numpy.ndarray
+    overlay_values: numpy.ndarray
+    overlay_timelines: List[data.ClosureTimeline]
+    covid_readout: matplotlib.text.Text
+    closure_readout: matplotlib.text.Text
+    event_connections: List[int]
+
+    plotted: bool
+
+    def __init__(self) -> None:
+        """
+        Initialize a PlotCanvas instance.
+        It will create figures and axes, connect events, and other necessary tasks.
+        """
+        self.figure = pyplot.Figure(**plot_style.FIGURE_KWARGS)
+        super().__init__(self.figure)
+
+        self.covid_axes, self.closure_axes = self.figure.subplots(1, 2)
+        self.event_connections = []
+        self.connect_events()
+
+        self.init_figures()
+        # Initialize curr_x and curr_y to None and updated from the on_mouse_move function
+        self.curr_x = None
+        self.curr_y = None
+
+        # Initialize a storage bool to check if the plots are out
+        self.plotted = False
+        self.overlay_names = []
+        self.playback_count = None
+        self.playback_frames = collections.OrderedDict()
+
+        # Formatting the right upper corner of the display
+        self.covid_axes.format_coord = lambda _, __: \
+            f'Date = {self.curr_x}' if self.curr_y is None \
+            else f'Date = {self.curr_x}, Cases = {self.curr_y}'
+        self.closure_axes.format_coord = lambda _, __: \
+            f'Date = {self.curr_x}' if self.curr_y is None \
+            else f'Date = {self.curr_x}, Status = ' \
+                 f'{data.ENUM_TO_STATUS_DICT[data.ClosureStatus(self.curr_y)]}'
+
+        self.draw()
+
+        self.covid_horizontal_cross_hair = self.covid_axes.axhline(
+                y=0, color='black', linewidth=0.8, linestyle='--', animated=True)
+        self.covid_vertical_cross_hair = self.covid_axes.axvline(
+                x=0, color='black', linewidth=0.8, linestyle='--', animated=True)
+        self.closure_horizontal_cross_hair = self.closure_axes.axhline(
+                y=0, color='black', linewidth=0.8, linestyle='--', animated=True)
+        self.closure_vertical_cross_hair = self.closure_axes.axvline(
+                x=0, color='black', linewidth=0.8, linestyle='--', animated=True)
+
+    @staticmethod
+    def make_readout(axes: matplotlib.axes.Axes) -> matplotlib.text.Text:
+        """
+        Return an (animated) readout text in the upper left corner of the given axes.
+        """
+        return axes.text(0.02, 0.98, '', transform=axes.transAxes, animated=True,
+                         verticalalignment='top', fontsize='x-small', family='monospace',
+                         bbox={'facecolor': 'white', 'alpha': 0.8, 'edgecolor': 'lightgray'})
+
+    def connect_events(self) -> None:
+        """
+        Connect our event handlers, replacing the connections made before.
+
+        matplotlib keeps the handlers it was given, so they should be connected again after they
+        are replaced, for example by profiling.Profiler.
+        """
+        for connection in self.event_connections:
+            self.mpl_disconnect(connection)
+        self.event_connections = [
+            self.mpl_connect('motion_notify_event', self.on_mouse_move),
+            self.mpl_connect('scroll_event', self.on_scroll),
+            self.mpl_connect('button_press_event', self.on_mouse_button_press),
+            self.mpl_connect('button_release_event', self.on_mouse_button_release),
+            self.mpl_connect('draw_event', self.on_draw)
+        ]
+
+    def init_figures(self) -> None:
+        """
+        Initialize the matplotlib figure, including titles and labels.
+        """
+        plot_style.init_axes(self.covid_axes, self.closure_axes, self.covid_label)
+
+    def update_background(self) -> None:
+        """
+        Update self.background.
+        Note:
+            - This function should be called everytime after a call to self.draw().
+            - Because we need to update any changes of the background of the plot after redrawing.
+        """
+        self.background = self.copy_from_bbox(self.figure.bbox)
+        if self.playback_count is not None:
+            # The cached frames were drawn on the previous background.
+            self.playback_frames.clear()
+            self.show_playback_frame(self.playback_count)
+
+    def restore_background(self) -> None:
+        """
+        Restore self.background, or the current frame during a playback.
+        """
+        if self.playback_count in self.playback_frames:
+            self.restore_region(self.playback_frames[self.playback_count])
+        else:
+            self.restore_region(self.background)
+
+    def update_lines(self, axes: matplotlib.axes.Axes,
+                     color: Optional[str] = None,
+                     style: Optional[str] = None,
+                     marker: Optional[str] = None) -> None:
+        """
+        Update the color, style, and marker of lines in the given axes.
+        """
+        if axes is self.covid_axes:
+            if color is not None:
+                self.covid_line_color = color
+            if style is not None:
+                self.covid_line_style = style
+            if marker is not None:
+                self.covid_data_marker = marker
+        elif axes is self.closure_axes:
+            if color is not None:
+                self.closure_line_color = color
+            if style is not None:
+                self.closure_line_style = style
+            if marker is not None:
+                self.closure_data_marker = marker
+        else:
+            raise ValueError('Illegal Axes!')
+
+        for line in axes.get_lines():
+            line: matplotlib.lines.Line2D
+
+            if color is not None:
+                line.set_color(color)
+            if style is not None:
+                line.set_linestyle(style)
+            if marker is not None:
+                line.set_marker(marker)
+
+        # Overlaid countries keep their own colors and have no markers.
+        if style is not None:
+            for collection in axes.collections:
+                collection.set_linestyle(style)
+
+        self.draw()
+        self.update_background()
+
+    def plot_covid_series(self, dates: List[datetime.date], values: List[float],
+                          label: str) -> None:
+        """Plots a series named label (see metrics.SERIES) in self.axes_covid"""
+        self.reset_playback()
+        self.overlay_names = []
+        self.covid_label = label
+        self.covid_x_data = dates
+        self.covid_y_data = values
+
+        self.covid_axes.clear()
+        self.init_figures()
+        self.covid_line, = self.covid_axes.plot(self.covid_x_data, self.covid_y_data,
+                                                linestyle=self.covid_line_style,
+                                                marker=self.covid_data_marker,
+                                                color=self.covid_line_color)
+
+        self.draw()
+        self.update_background()
+
+    def plot_school_closures(self, timeline: data.ClosureTimeline) -> None:
+        """
+        Plots the closure timeline in self.axes_closure, one step segment for every run of the same
+        status.
+        """
+        self.reset_playback()
+        self.overlay_names = []
+        self.closure_timeline = timeline
+        self.closure_x_data, self.closure_y_data = timeline.step_data()
+
+        self.closure_axes.clear()
+        self.init_figures()
+        self.closure_line, = self.closure_axes.plot(self.closure_x_data, self.closure_y_data,
+                                                    drawstyle='steps-post',
+                                                    linestyle=self.closure_line_style,
+                                                    marker=self.closure_data_marker,
+                                                    color=self.closure_line_color)
+
+        self.draw()
+        self.update_background()
+
+    def plot_overlay(self, dates: List[datetime.date], names: List[str], values: numpy.ndarray,
+                     timelines: List[data.ClosureTimeline], label: str) -> None:
+        """
+        Overlay the covid series named label and the closure timelines of several countries.
+
+        All series of a subplot are drawn by one LineCollection, so that the number of artists
+        does not grow with the number of countries, and panning and zooming stay fast.
+
+        Preconditions:
+            - values.shape == (len(names), len(dates))
+            - len(timelines) == len(names)
+        """
+        self.reset_playback()
+        self.overlay_names = names
+        self.overlay_x_data = matplotlib.dates.date2num(dates)
+        self.overlay_values = values
+        self.overlay_timelines = timelines
+        self.covid_label = label
+        colors = plot_style.overlay_colors(len(names))
+
+        self.covid_axes.clear()
+        self.closure_axes.clear()
+        self.init_figures()
+
+        # Covid series: every row of values is a line
+        x_data = numpy.broadcast_to(self.overlay_x_data, values.shape)
+        self.covid_axes.add_collection(matplotlib.collections.LineCollection(
+                numpy.stack([x_data, values], axis=-1), colors=colors,
+                linestyles=self.covid_line_style, linewidths=1))
+
+        # Closure timelines: every timeline is drawn as steps, spread around their ticks
+        offsets = numpy.linspace(-plot_style.OVERLAY_CLOSURE_SPREAD,
+                                 plot_style.OVERLAY_CLOSURE_SPREAD, len(names)) \
+            if len(names) > 1 else [0.0]
+        steps = []
+        for timeline, offset in zip(timelines, offsets):
+            step_x, step_y = timeline.step_data()
+            step_x = numpy.repeat(matplotlib.dates.date2num(step_x), 2)[1:]
+            step_y = numpy.repeat(numpy.array(step_y, dtype=float) + offset, 2)[:-1]
+            steps.append(numpy.stack([step_x, step_y], axis=-1))
+        self.closure_axes.add_collection(matplotlib.collections.LineCollection(
+                steps, colors=colors, linestyles=self.closure_line_style, linewidths=1))
+
+        for axes in (self.covid_axes, self.closure_axes):
+            axes.xaxis_date()
+            axes.autoscale_view()
+        self.covid_readout = self.make_readout(self.covid_axes)
+        self.closure_readout = self.make_readout(self.closure_axes)
+
+        # Drawing a legend entry takes about a millisecond, as long as drawing a whole line, so
+        # the legend only lists the countries with the largest last values.
+        last_values = numpy.nan_to_num(values[:, -1], nan=-math.inf) if values.shape[1] > 0 \
+            else numpy.zeros(len(names))
+        order = numpy.argsort(-last_values, kind='stable')[:OVERLAY_LEGEND_LIMIT]
+        handles = [matplotlib.lines.Line2D([], [], color=colors[i], label=names[i])
+                   for i in order]
+        if len(names) > OVERLAY_LEGEND_LIMIT:
+            more = len(names) - OVERLAY_LEGEND_LIMIT
+            handles.append(matplotlib.lines.Line2D([], [], linestyle='none',
+                                                   label=f'and {more} more'))
+        self.covid_axes.legend(handles=handles, fontsize='x-small', loc='upper left',
+                               ncol=math.ceil(len(handles) / 10))
+
+        self.draw()
+        self.update_background()
+
+    def start_playback(self) -> None:
+        """
+        Start a playback of the plotted location that shows its first date only. See
+        show_playback_frame.
+
+        The lines become animated, so they are left out of self.background, and the axes keep
+        the limits of the whole date range.
+
+        Preconditions:
+            - self.overlay_names == []
+        """
+        self.playback_count = 1
+        self.playback_frames.clear()
+        self.covid_line.set_animated(True)
+        self.closure_line.set_animated(True)
+        self.draw()
+        self.update_background()
+
+    def show_playback_frame(self, count: int) -> None:
+        """
+        Show the lines of the playback up to the count-th date of the plotted dates.
+
+        A frame only draws the lines on self.background with blit, and then it is cached, so
+        showing a previous frame again is a copy of pixels. The cache is limited by
+        PLAYBACK_CACHE_BYTES.
+
+        Preconditions:
+            - self.playback_count is not None
+        """
+        count = max(1, min(count, len(self.covid_x_data)))
+        self.playback_count = count
+        if count in self.playback_frames:
+            self.playback_frames.move_to_end(count)
+            self.restore_region(self.playback_frames[count])
+        else:
+            end_date = self.covid_x_data[count - 1]
+            self.restore_region(self.background)
+            self.covid_line.set_data(self.covid_x_data[:count], self.covid_y_data[:count])
+            self.closure_line.set_data(
+                    *self.closure_timeline.clip(datetime.date.min, end_date).step_data())
+            self.covid_axes.draw_artist(self.covid_line)
+            self.closure_axes.draw_artist(self.closure_line)
+
+            self.playback_frames[count] = self.copy_from_bbox(self.figure.bbox)
+            frame_bytes = int(self.figure.bbox.width) * int(self.figure.bbox.height) * 4
+            while len(self.playback_frames) > max(1, PLAYBACK_CACHE_BYTES // frame_bytes):
+                self.playback_frames.popitem(last=False)
+        self.blit(self.figure.bbox)
+
+    def reset_playback(self) -> None:
+        """
+        Forget the playback and its frames. If there was a playback, its lines are not animated
+        any more and the figure is drawn again, so they stay on the figure after any later draw.
+        """
+        if self.playback_count is None:
+            return
+        self.playback_count = None
+        self.playback_frames.clear()
+        self.covid_line.set_animated(False)
+        self.closure_line.set_animated(False)
+        self.draw()
+        self.update_background()
+
+    def get_overlay_readouts(self, x: float) -> Tuple[float, str, str]:
+        """
+        Return a tuple of the overlaid date closest to the given x value, and the readouts of the
+        covid series and the closure statuses of all overlaid countries on that date.
+
+        Covid values are listed from the largest, and at most OVERLAY_READOUT_LIMIT of them are
+        shown.
+        """
+        index = int(numpy.clip(numpy.searchsorted(self.overlay_x_data, x - 0.5),
+                               0, len(self.overlay_x_data) - 1))
+        x = float(self.overlay_x_data[index])
+        self.curr_x = matplotlib.dates.num2date(x).date()
+        self.curr_y = None
+
+        values = self.overlay_values[:, index]
+        order = numpy.argsort(-numpy.nan_to_num(values, nan=-math.inf))
+        covid_lines = [f'{self.overlay_names[i]:<20.20} {values[i]:>12,.1f}'
+                       for i in order[:OVERLAY_READOUT_LIMIT]]
+        if len(order) > OVERLAY_READOUT_LIMIT:
+            covid_lines.append(f'and {len(order) - OVERLAY_READOUT_LIMIT} more')
+
+        closure_lines = []
+        for name, timeline in zip(self.overlay_names[:OVERLAY_READOUT_LIMIT],
+                                  self.overlay_timelines):
+            status = timeline.status_on(self.curr_x)
+            closure_lines.append(f'{name:<20.20} '
+                                 f'{"-" if status is None else data.ENUM_TO_STATUS_DICT[status]}')
+        if len(self.overlay_names) > OVERLAY_READOUT_LIMIT:
+            closure_lines.append(f'and {len(self.overlay_names) - OVERLAY_READOUT_LIMIT} more')
+
+        header = str(self.curr_x)
+        return x, '\n'.join([header] + covid_lines), '\n'.join([header] + closure_lines)
+
+    def get_closet_coordinates_from_x(self, x: int, x_data: List, y_data: List) -> Tuple[int, int]:
+        """
+        Return a tuple representing the closet point in the given x_data and y_data
+        based on the given x value.
+        """
+        x_date = datetime.date.fromtimestamp(0) + datetime.timedelta(days=x)
+        index = algorithms.binary_search(x_data, x_date)
+        x = (x_data[index] - datetime.date.fromtimestamp(0)).days
+        y = y_data[min(index + 1, len(y_data) - 1)]
+        self.curr_x = x_date
+        self.curr_y = y
+        return x, y
+
+    def get_closure_coordinates_from_x(self, x: float) -> Optional[Tuple[int, int]]:
+        """
+        Return a tuple of the day and the closure status on the day of the given x value, or None
+        if there is no status on that day.
+        """
+        x_date = datetime.date.fromtimestamp(0) + datetime.timedelta(days=int(x))
+        status = self.closure_timeline.status_on(x_date)
+        if status is None:
+            return None
+        self.curr_x = x_date
+        self.curr_y = status.value
+        return int(x), status.value
+
+    def pan(self, axes: pyplot.Axes, event: matplotlib.backend_bases.MouseEvent) -> None:
+        """
+        Pan the axes based on the given mouse event.
+        """
+        min_x, max_x = axes.get_xlim()
+        min_y, max_y = axes.get_ylim()
+        display_to_data = axes.transData.inverted()
+        prev_data = (0, 0)
+
+        if axes is self.covid_axes:
+            prev_data = display_to_data.transform_point((self.covid_prev_x, self.covid_prev_y))
+            self.covid_prev_x = event.x
+            self.covid_prev_y = event.y
+        elif axes is self.closure_axes:
+            prev_data = display_to_data.transform_point((self.closure_prev_x, self.closure_prev_y))
+            self.closure_prev_x = event.x
+            self.closure_prev_y = event.y
+
+        dx = (event.xdata - prev_data[0])
+        dy = (event.ydata - prev_data[1])
+
+        axes.set_xlim(min_x - dx, max_x - dx)
+        axes.set_ylim(min_y - dy, max_y - dy)
+
+        self.draw()
+        self.update_background()
+
+    def on_draw(self, _: matplotlib.backend_bases.DrawEvent) -> None:
+        """
+        During a playback (including a paused one), draw its current frame again after the figure
+        is drawn, for example after a resize or a pan of the toolbar, since self.draw leaves out
+        its animated lines.
+        """
+        if self.playback_count is not None:
+            self.update_background()
+
+    def on_mouse_move(self, event: matplotlib.backend_bases.MouseEvent) -> None:
+        """
+        The handler of on_mouse_move event, which renders the cross-hair and mouse drag (pan).
+        Optimized with blit, so now the FPS is very high.
+
+        If the user is dragging the plot, then we pan the plot.
+        """
+        self.restore_background()
+        if not event.inaxes:
+            self.covid_horizontal_cross_hair.set_visible(False)
+            self.covid_vertical_cross_hair.set_visible(False)
+            self.closure_horizontal_cross_hair.set_visible(False)
+            self.closure_vertical_cross_hair.set_visible(False)
+            self.curr_x = None
+            self.curr_y = None
+            self.blit(self.figure.bbox)
+            self.flush_events()
+            return
+
+        x = event.xdata
+        y = event.ydata
+
+        if self.overlay_names != []:
+            axes = event.inaxes
+            if event.button == matplotlib.backend_bases.MouseButton.LEFT:
+                self.pan(axes, event)
+            x, covid_text, closure_text = self.get_overlay_readouts(x)
+            readout = self.covid_readout if axes is self.covid_axes else self.closure_readout
+            readout.set_text(covid_text if axes is self.covid_axes else closure_text)
+            vertical_cross_hair = self.covid_vertical_cross_hair if axes is self.covid_axes \
+                else self.closure_vertical_cross_hair
+            vertical_cross_hair.set_visible(True)
+            vertical_cross_hair.set_xdata([x])
+            axes.draw_artist(vertical_cross_hair)
+            axes.draw_artist(readout)
+            self.blit(self.figure.bbox)
+            self.flush_events()
+            return
+
+        if event.inaxes is self.covid_axes:
+            if event.button == matplotlib.backend_bases.MouseButton.LEFT:
+                self.pan(self.covid_axes, event)
+
+            x, y = self.get_closet_coordinates_from_x(
+                    x, self.covid_x_data, self.covid_y_data)
+
+            self.covid_horizontal_cross_hair.set_visible(True)
+            self.covid_vertical_cross_hair.set_visible(True)
+            self.covid_horizontal_cross_hair.set_ydata([y])
+            self.covid_vertical_cross_hair.set_xdata([x])
+            self.covid_axes.draw_artist(self.covid_horizontal_cross_hair)
+            self.covid_axes.draw_artist(self.covid_vertical_cross_hair)
+
+        elif event.inaxes is self.closure_axes:
+            if event.button == matplotlib.backend_bases.MouseButton.LEFT:
+                self.pan(self.closure_axes, event)
+
+            coordinates = self.get_closure_coordinates_from_x(x)
+            if coordinates is None:
+                self.blit(self.figure.bbox)
+                self.flush_events()
+                return
+            x, y = coordinates
+
+            self.closure_horizontal_cross_hair.set_visible(True)
+            self.closure_vertical_cross_hair.set_visible(True)
+            self.closure_horizontal_cross_hair.set_ydata([y])
+            self.closure_vertical_cross_hair.set_xdata([x])
+            self.closure_axes.draw_artist(self.closure_horizontal_cross_hair)
+            self.closure_axes.draw_artist(self.closure_vertical_cross_hair)
+
+        self.blit(self.figure.bbox)
+        self.flush_events()
+
+    @staticmethod
+    def zoom(is_zoom_in: bool, zoom_factor: float, x: float,
+             original_min: float, original_max: float) -> Tuple[float, float]:
+        """
+        Return the new limit(minimum and maximum) based on several zooming factors centered on x.
+        """
+        length = original_max - original_min
+        zoom_length = length * zoom_factor
+        left_ratio = (x - original_min) / length
+        right_ratio = 1 - left_ratio
+        left_zoom_length = zoom_length * left_ratio
+        right_zoom_length = zoom_length * right_ratio
+
+        if is_zoom_in:
+            return original_min + left_zoom_length, original_max - right_zoom_length
+        else:
+            return original_min - left_zoom_length, original_max + right_zoom_length
+
+    def on_scroll(self, event: matplotlib.backend_bases.MouseEvent) -> None:
+        """
+        Zoom in or zoom out as the user scroll up or down.
+        """
+        if not event.inaxes:
+            return
+
+        zoom_factor = 0.2
+        x = event.xdata
+        y = event.ydata
+        min_x, max_x = 0, 0
+        min_y, max_y = 0, 0
+
+        if event.inaxes is self.covid_axes:
+            min_x, max_x = self.covid_axes.get_xlim()
+            min_y, max_y = self.covid_axes.get_ylim()
+        elif event.inaxes is self.closure_axes:
+            min_x, max_x = self.closure_axes.get_xlim()
+            min_y, max_y = self.closure_axes.get_ylim()
+
+        if event.button == 'up':
+            min_x, max_x = self.zoom(True, zoom_factor, x, min_x, max_x)
+            min_y, max_y = self.zoom(True, zoom_factor, y, min_y, max_y)
+        elif event.button == 'down':
+            min_x, max_x = self.zoom(False, zoom_factor, x, min_x, max_x)
+            min_y, max_y = self.zoom(False, zoom_factor, y, min_y, max_y)
+
+        if event.inaxes is self.covid_axes:
+            self.covid_axes.set_xlim(min_x, max_x)
+            self.covid_axes.set_ylim(min_y, max_y)
+        elif event.inaxes is self.closure_axes:
+            self.closure_axes.set_xlim(min_x, max_x)
+
+        self.draw()
+        self.update_background()
+
+    def on_mouse_button_press(self, event: matplotlib.backend_bases.MouseEvent) -> None:
+        """
+        If the left button is pressed, we start to pan the plot as the mouse moves.
+        This function serve as the start of the pan operation.
+        """
+        if event.button == matplotlib.backend_bases.MouseButton.LEFT:
+            if event.inaxes is self.covid_axes:
+                self.covid_prev_x = event.x
+                self.covid_prev_y = event.y
+                self.closure_prev_x = 0
+                self.closure_prev_y = 0
+            elif event.inaxes is self.closure_axes:
+                self.covid_prev_x = 0
+                self.covid_prev_y = 0
+                self.closure_prev_x = event.x
+                self.closure_prev_y = event.y
+
+    def on_mouse_button_release(self, event: matplotlib.backend_bases.MouseEvent) -> None:
+        """
+        If the left button is released, we end the panning action.
+        """
+        if event.button == matplotlib.backend_bases.MouseButton.LEFT:
+            self.covid_prev_x = 0
+            self.covid_prev_y = 0
+            self.closure_prev_x = 0
+            self.closure_prev_y = 0
+
+    def reset(self) -> None:
+        """Resets the plots to the default style"""
+        self.covid_line_color = plot_style.DEFAULT_COVID_LINE_COLOR
+        self.closure_line_color = plot_style.DEFAULT_CLOSURE_LINE_COLOR
+
+        self.covid_line_style = plot_style.DEFAULT_LINE_STYLE
+        self.closure_line_style = plot_style.DEFAULT_LINE_STYLE
+
+        self.covid_data_marker = plot_style.DEFAULT_DATA_MARKER
+        self.closure_data_marker = plot_style.DEFAULT_DATA_MARKER
+
+
+if __name__ == '__main__':
+    # doctest this module will generate an error, and doctest is meaningless for this module.
+    # import doctest
+    # doctest.testmod()
+
+    # python_ta.contracts.check_all_contracts will also generate an error
+    # import python_ta.contracts
+    # python_ta.contracts.check_all_contracts()
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports'  : ['collections', 'datetime', 'math', 'typing', 'numpy', 'matplotlib',
+                            'matplotlib.axes', 'matplotlib.backend_bases',
+                            'matplotlib.collections', 'matplotlib.dates', 'matplotlib.lines',
+                            'matplotlib.text', 'matplotlib.backends.backend_qt5agg',
+                            'algorithms', 'data', 'plot_style', 'gui_utils'],
+        'allowed-io'     : [],
+        'max-line-length': 100,
+        'disable'        : ['R1705', 'C0200', 'E0602', 'E9989', 'W0401', 'E9997', 'R0902']
+    })
@@ -73,6 +73,17 @@ LINE_MARKERS = {
     "None"        : ('No Marker', ''),
 }
 
+# A dict that maps the speeds of playbacks to the number of dates they show per second.
+PLAYBACK_SPEEDS = {
+    '1 week/s'  : 7,
+    '2 weeks/s' : 14,
+    '1 month/s' : 30,
+    '3 months/s': 91
+}
+
+# The interval between two frames of a playback in milliseconds.
+PLAYBACK_FRAME_INTERVAL = 40
+
 
 # =================================================================================================
 # Helper Functions
@@ -159,6 +170,38 @@ class EnhancedVBoxLayout(QVBoxLayout):
         self.horizontal_layouts[row].addWidget(widget, stretch, alignment)
 
 
+class FirstPaintFilter(QObject):
+    """
+    An event filter that emits painted once, when the given window or any of its children is
+    painted for the first time.
+
+    Note:
+        - It must be installed on the QApplication instance with installEventFilter.
+
+    Instance Attributes:
+        - window: The window to be monitored.
+        - is_painted: Whether the window has been painted.
+    """
+    painted: pyqtSignal = pyqtSignal()
+
+    window: QWidget
+    is_painted: bool
+
+    def __init__(self, window: QWidget) -> None:
+        """Initialize a First Paint Filter"""
+        super().__init__(window)
+        self.window = window
+        self.is_painted = False
+
+    def eventFilter(self, a0: QObject, a1: QEvent) -> bool:
+        """Emit painted on the first paint event of the window or any of its children."""
+        if not self.is_painted and a1.type() == QEvent.Paint \
+                and isinstance(a0, QWidget) and a0.window() is self.window:
+            self.is_painted = True
+            self.painted.emit()
+        return False
+
+
 class StandardLabel(QLabel):
     """
     A standard label for our project.
@@ -377,6 +420,56 @@ class StandardFileDialog(QFileDialog):
         set_font(self, font_size=12)
 
 
+class StandardListSelectionDialog(QDialog):
+    """
+    A standard dialog to select several items from a list for our project.
+
+    Instance Attributes:
+        - search_bar: A line edit that filters the items by name.
+        - list_widget: The list of items, which supports multiple selection.
+        - button_box: The OK and Cancel buttons.
+    """
+    search_bar: QLineEdit
+    list_widget: QListWidget
+    button_box: QDialogButtonBox
+
+    def __init__(self, items: Iterable[str], selected_items: Iterable[str],
+                 parent: Optional[QWidget] = None) -> None:
+        """Initialize a Standard List Selection Dialog"""
+        super().__init__(parent)
+        set_font(self, font_size=12)
+        self.search_bar = QLineEdit(self)
+        self.search_bar.setPlaceholderText('Search')
+        self.search_bar.textEdited.connect(self.filter_items)
+        self.list_widget = QListWidget(self)
+        self.list_widget.setSelectionMode(QAbstractItemView.MultiSelection)
+        self.list_widget.addItems(items)
+        selected_items = set(selected_items)
+        for i in range(self.list_widget.count()):
+            item = self.list_widget.item(i)
+            item.setSelected(item.text() in selected_items)
+        self.button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel, self)
+        self.button_box.accepted.connect(self.accept)
+        self.button_box.rejected.connect(self.reject)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.search_bar)
+        layout.addWidget(self.list_widget)
+        layout.addWidget(self.button_box)
+
+    @pyqtSlot(str)
+    def filter_items(self, text: str) -> None:
+        """Hide the items whose names do not contain the given text."""
+        for i in range(self.list_widget.count()):
+            item = self.list_widget.item(i)
+            item.setHidden(text.lower() not in item.text().lower())
+
+    def selected_items(self) -> List[str]:
+        """Return the names of the selected items in the order of the list."""
+        return [self.list_widget.item(i).text() for i in range(self.list_widget.count())
+                if self.list_widget.item(i).isSelected()]
+
+
 if __name__ == '__main__':
     # doctest this module will generate an error, and doctest is meaningless for this module.
     # import doctest
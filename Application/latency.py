@@ -0,0 +1,205 @@
+"""
+This module contains LatencyMonitor, which measures how fast our plot responds, so changes to the
+rendering of PlotCanvas could be judged with numbers.
+
+A monitor records:
+    - the latency of the handlers of the mouse events of a canvas: motion, scroll, and press,
+    - the time of every frame the canvas renders, either a blit (only the cross-hair or the
+      playback changed) or a full draw, and how many frames were blits.
+
+The handlers and the rendering methods of the canvas are only replaced on the canvas itself while
+the monitor runs, so there is no overhead at all otherwise. Latencies and frame times are reported
+as their 50th, 95th and 99th percentiles, in one line for the status bar, or as JSON.
+"""
+# Future features
+from __future__ import annotations
+
+# Python built-ins
+import collections
+import datetime
+import json
+import logging
+import os
+import time
+from typing import Any, Callable, Deque, Dict, List
+
+# NumPy
+import numpy
+
+# The handlers of mouse events that are measured, mapped to the names of the events.
+EVENT_HANDLERS = {
+    'on_mouse_move'        : 'motion',
+    'on_scroll'            : 'scroll',
+    'on_mouse_button_press': 'press'
+}
+
+# The rendering methods that are measured, mapped to the kinds of frames.
+FRAME_METHODS = {
+    'blit': 'blit',
+    'draw': 'draw'
+}
+
+# The percentiles reported
+PERCENTILES = [50, 95, 99]
+
+# The number of the latest samples kept of every event or frame kind
+MAX_SAMPLES = 10000
+
+
+class LatencyMonitor:
+    """
+    A monitor of the event latencies and frame times of a canvas, see the module docstring.
+
+    Instance Attributes:
+        - canvas: The canvas monitored, a gui_plot.PlotCanvas.
+        - samples: A dict mapping the names of events and the kinds of frames to their latest
+          durations in seconds.
+        - counts: A Counter of all events and frames, including those no longer in samples.
+        - started_at: When the monitor started.
+        - is_running: Whether the methods of canvas are replaced.
+    """
+    canvas: Any
+    samples: Dict[str, Deque[float]]
+    counts: collections.Counter
+    started_at: datetime.datetime
+    is_running: bool
+
+    def __init__(self, canvas: Any) -> None:
+        """Initialize a LatencyMonitor of the given canvas"""
+        self.canvas = canvas
+        self.samples = {name: collections.deque(maxlen=MAX_SAMPLES)
+                        for name in list(EVENT_HANDLERS.values()) + list(FRAME_METHODS.values())}
+        self.counts = collections.Counter()
+        self.started_at = datetime.datetime.now()
+        self.is_running = False
+
+    def start(self) -> None:
+        """
+        Replace the handlers and the rendering methods of canvas with timed versions, and connect
+        the handlers again (see PlotCanvas.connect_events).
+        """
+        if self.is_running:
+            return
+        for method, name in list(EVENT_HANDLERS.items()) + list(FRAME_METHODS.items()):
+            setattr(self.canvas, method, self.timed(name, method))
+        self.canvas.connect_events()
+        self.is_running = True
+
+    def stop(self) -> None:
+        """Restore the handlers and the rendering methods of canvas."""
+        if not self.is_running:
+            return
+        for method in list(EVENT_HANDLERS) + list(FRAME_METHODS):
+            delattr(self.canvas, method)
+        self.canvas.connect_events()
+        self.is_running = False
+
+    def timed(self, name: str, method: str) -> Callable:
+        """
+        Return a function that calls the given method of canvas, and records its duration as a
+        sample of the given name. The method is looked up on the class of canvas on every call, so
+        the monitor works together with profiling.Profiler.
+        """
+
+        def timed_method(*args: Any, **kwargs: Any) -> Any:
+            """The timed version of a method of the canvas, see LatencyMonitor.timed."""
+            start = time.perf_counter()
+            try:
+                return getattr(type(self.canvas), method)(self.canvas, *args, **kwargs)
+            finally:
+                self.samples[name].append(time.perf_counter() - start)
+                self.counts[name] += 1
+
+        return timed_method
+
+    def percentiles(self, name: str) -> List[float]:
+        """
+        Return the PERCENTILES of the samples of the given name in milliseconds, or an empty list
+        if there is no sample.
+        """
+        if len(self.samples[name]) == 0:
+            return []
+        values = numpy.fromiter(self.samples[name], dtype=float, count=len(self.samples[name]))
+        return (numpy.percentile(values, PERCENTILES) * 1000).tolist()
+
+    def blit_ratio(self) -> float:
+        """Return the fraction of frames that were blits, or 0 if there is no frame."""
+        frames = sum(self.counts[name] for name in FRAME_METHODS.values())
+        return 0.0 if frames == 0 else self.counts['blit'] / frames
+
+    def summary(self) -> str:
+        """
+        Return the p95 latencies of events and frame times, and the blit ratio, in one line, like
+        "motion 1.2 ms, draw 40.5 ms (p95), 97% blit".
+        """
+        parts = []
+        for name in self.samples:
+            values = self.percentiles(name)
+            if values != []:
+                parts.append(f'{name} {values[PERCENTILES.index(95)]:.1f} ms')
+        if parts == []:
+            return 'No events yet'
+        return f'{", ".join(parts)} (p95), {self.blit_ratio():.0%} blit'
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return all statistics as a dict that could be written as JSON."""
+        return {
+            'started_at' : self.started_at.isoformat(),
+            'seconds'    : round((datetime.datetime.now() - self.started_at).total_seconds(), 3),
+            'blit_ratio' : round(self.blit_ratio(), 4),
+            'percentiles': PERCENTILES,
+            'samples'    : {
+                name: {
+                    'count'         : self.counts[name],
+                    'percentiles_ms': [round(value, 3) for value in self.percentiles(name)],
+                    'histogram_ms'  : histogram(self.samples[name])
+                }
+                for name in self.samples
+            }
+        }
+
+    def write_json(self, directory: str) -> str:
+        """
+        Write all statistics into a new JSON file in the given directory, and return its path.
+
+        Raise OSError if the file cannot be written.
+        """
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory,
+                            f'latency-{self.started_at.strftime("%Y%m%d-%H%M%S")}.json')
+        with open(path, 'w') as file:
+            json.dump(self.to_dict(), file, indent=4)
+        logging.info(f'Wrote the latency statistics into {path}')
+        return path
+
+
+def histogram(samples: Deque[float]) -> Dict[str, int]:
+    """
+    Return the histogram of the given durations (in seconds), with buckets of powers of two
+    milliseconds, mapped from their upper bounds.
+
+    >>> histogram(collections.deque([0.0004, 0.0015, 0.0016, 0.030]))
+    {'<= 1 ms': 1, '<= 2 ms': 2, '<= 32 ms': 1}
+    """
+    if len(samples) == 0:
+        return {}
+    values = numpy.fromiter(samples, dtype=float, count=len(samples)) * 1000
+    exponents = numpy.ceil(numpy.log2(numpy.maximum(values, 1))).astype(int)
+    bounds, counts = numpy.unique(exponents, return_counts=True)
+    return {f'<= {2 ** bound} ms': count for bound, count in zip(bounds.tolist(), counts.tolist())}
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod()
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports'  : ['__future__', 'collections', 'datetime', 'json', 'logging', 'os',
+                            'time', 'typing', 'numpy'],
+        'allowed-io'     : ['LatencyMonitor.write_json'],
+        'max-line-length': 100,
+        'disable'        : ['R1705', 'C0200', 'E9989', 'E9997']
+    })
@@ -0,0 +1,157 @@
+"""
+A load test of server.py.
+
+It opens several kept-alive connections to a running server, sends requests for the cases and
+closures of random countries through all of them at once, and reports the requests per second and
+the latency percentiles.
+
+Usage:
+    python server.py &
+    python load_test.py [--host 127.0.0.1] [--port 8110] [--connections 32] [--requests 5000]
+                        [--format json] [--json output.json]
+"""
+# Python built-ins
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from typing import Dict, List, Tuple
+from urllib.parse import quote_plus
+
+
+async def read_response(reader: asyncio.StreamReader) -> Tuple[int, int]:
+    """
+    Read one response, and return a tuple of its status code and the length of its body.
+    """
+    head = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1').split('\r\n')
+    status = int(head[0].split(' ')[1])
+    headers = {}
+    for line in head[1:]:
+        if ':' in line:
+            key, value = line.split(':', 1)
+            headers[key.strip().lower()] = value.strip()
+
+    if headers.get('transfer-encoding') == 'chunked':
+        length = 0
+        while True:
+            size = int((await reader.readuntil(b'\r\n')).strip(), 16)
+            await reader.readexactly(size + 2)
+            length += size
+            if size == 0:
+                return status, length
+    length = int(headers.get('content-length', '0'))
+    await reader.readexactly(length)
+    return status, length
+
+
+async def run_connection(host: str, port: int, targets: List[str],
+                         latencies: List[float], statuses: Dict[int, int]) -> None:
+    """
+    Send the requests of the given targets one after another through one kept-alive connection.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for target in targets:
+            timestamp1 = time.perf_counter()
+            writer.write(f'GET {target} HTTP/1.1\r\nHost: {host}\r\n\r\n'.encode('latin-1'))
+            await writer.drain()
+            status, _ = await read_response(reader)
+            latencies.append(time.perf_counter() - timestamp1)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def fetch_countries(host: str, port: int) -> List[str]:
+    """
+    Return the countries served by the server.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f'GET /countries HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n'
+                 .encode('latin-1'))
+    await writer.drain()
+    body = await reader.read()
+    writer.close()
+    chunks = body.split(b'\r\n\r\n', 1)[1].split(b'\r\n')
+    return json.loads(b''.join(chunks[1::2]))
+
+
+def make_targets(countries: List[str], count: int, response_format: str) -> List[str]:
+    """
+    Return count random request targets of the cases and closures of the given countries.
+    """
+    targets = []
+    for _ in range(count):
+        path = random.choice(['/cases', '/closures'])
+        country = quote_plus(random.choice(countries + ['']))
+        targets.append(f'{path}?country={country}&format={response_format}')
+    return targets
+
+
+def percentile(values: List[float], p: float) -> float:
+    """
+    Return the p-th percentile of values with the nearest-rank method.
+
+    >>> percentile([1.0, 2.0, 3.0, 4.0], 50)
+    2.0
+    """
+    ordered = sorted(values)
+    return ordered[max(0, int(len(ordered) * p / 100 + 0.5) - 1)]
+
+
+async def run_load_test(host: str, port: int, connections: int, requests: int,
+                        response_format: str) -> Dict:
+    """
+    Run the load test and return a summary.
+    """
+    countries = await fetch_countries(host, port)
+    targets = make_targets(countries, requests, response_format)
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+
+    timestamp1 = time.perf_counter()
+    await asyncio.gather(*(run_connection(host, port, targets[i::connections], latencies, statuses)
+                           for i in range(connections)))
+    seconds_elapsed = time.perf_counter() - timestamp1
+
+    return {
+        'requests'           : len(latencies),
+        'connections'        : connections,
+        'format'             : response_format,
+        'seconds'            : seconds_elapsed,
+        'requests_per_second': len(latencies) / seconds_elapsed,
+        'latency_ms'         : {'mean': statistics.mean(latencies) * 1000,
+                                'p50' : percentile(latencies, 50) * 1000,
+                                'p90' : percentile(latencies, 90) * 1000,
+                                'p99' : percentile(latencies, 99) * 1000,
+                                'max' : max(latencies) * 1000},
+        'statuses'           : statuses
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load test a running server.py.')
+    parser.add_argument('--host', default='127.0.0.1', help='the address of the server')
+    parser.add_argument('--port', type=int, default=8110, help='the port of the server')
+    parser.add_argument('--connections', type=int, default=32,
+                        help='the number of concurrent connections')
+    parser.add_argument('--requests', type=int, default=5000, help='the number of requests')
+    parser.add_argument('--format', default='json', choices=['json', 'csv', 'arrow'],
+                        help='the format of the responses')
+    parser.add_argument('--json', help='write the summary into this JSON file')
+    args = parser.parse_args()
+
+    summary = asyncio.run(run_load_test(args.host, args.port, args.connections, args.requests,
+                                        args.format))
+    print(f'{summary["requests"]} requests over {summary["connections"]} connections '
+          f'in {summary["seconds"]:.3f} s')
+    print(f'    Requests per second: {summary["requests_per_second"]:.1f}')
+    for name, milliseconds in summary['latency_ms'].items():
+        print(f'    {name:<6}{milliseconds:>10.3f} ms')
+    print(f'    Statuses: {summary["statuses"]}')
+
+    if args.json is not None:
+        with open(args.json, 'w') as file:
+            json.dump(summary, file, indent=4)
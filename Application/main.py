@@ -2,17 +2,29 @@
 The main entry of our program.
 """
 # Python built-ins
+import os
 import sys
+import time
 
 # PyQt5
+from PyQt5.QtCore import QTimer
 from PyQt5.QtWidgets import *
 from PyQt5.QtGui import QIcon
 
 # Our modules
 import gui_main
+import profiling
+import settings
 from settings import *
 from resource_manager import *
 
+# The wall-clock time when our program started. startup_benchmark.py passes the time it started
+# the process through this environment variable, so that the interpreter startup is included.
+STARTUP_TIMESTAMP = float(os.environ.get('CSC110_STARTUP_TIMESTAMP', time.time()))
+# If True, we report the startup timings to stderr and quit as soon as the plot is created.
+# See startup_benchmark.py.
+IS_STARTUP_BENCHMARK = 'CSC110_STARTUP_TIMESTAMP' in os.environ
+
 # =================================================================================================
 # Initialize logger
 # =================================================================================================
@@ -30,10 +42,9 @@ def init_icons() -> None:
     """Initializes icon for the application"""
     # If failed to download the icons, then let user know and continue running the program
     logging.info('Initializing icons...')
-    main_icon_initialized = init_resource(RESOURCES_DICT[ICON_RESOURCE_NAME])
-    other_icons_initialized = any([not init_resource(RESOURCES_DICT[name])
-                                   for name in MARKERS_ICON_RESOURCE_NAMES])
-    if not main_icon_initialized or other_icons_initialized:
+    try:
+        init_resources([ICON_RESOURCE_NAME] + MARKERS_ICON_RESOURCE_NAMES)
+    except FailedToDownloadResourceException:
         logging.critical('Failed to download icons!')
         # Pls ignore the warning of the None, this is good.
         QMessageBox.critical(None, 'Critical', 'Failed to download icons! \n'
@@ -43,6 +54,28 @@ def init_icons() -> None:
         logging.info('Icon initialized!')
 
 
+def report_startup_timing(stage: str) -> None:
+    """
+    Log the seconds elapsed from the start of our program to the given stage.
+
+    In a startup benchmark, the timing is also written to stderr for startup_benchmark.py, in the
+    same stream as the output of python -X importtime.
+    """
+    seconds_elapsed = time.time() - STARTUP_TIMESTAMP
+    logging.info(f'Startup stage {stage} reached in {round(seconds_elapsed, 3)} seconds.')
+    if IS_STARTUP_BENCHMARK:
+        print(f'startup timing: {stage} {seconds_elapsed}', file=sys.stderr, flush=True)
+
+
+def on_plot_ready() -> None:
+    """
+    Report that the plot is created, and quit if we are running a startup benchmark.
+    """
+    report_startup_timing('plot_ready')
+    if IS_STARTUP_BENCHMARK:
+        QApplication.quit()
+
+
 # We need to retain a reference here to avoid garbage collection.
 # main_window will be initialized after the data are fully loaded
 # in gui.InitWindow#update_progress_bar method.
@@ -57,6 +90,8 @@ if __name__ == '__main__':
 
     logging.info('Initializing settings...')
     init_setting(config['setting'])
+    if 'CSC110_FAST_STARTUP' in os.environ:
+        settings.FAST_STARTUP = os.environ['CSC110_FAST_STARTUP'] == '1'
     logging.info('Settings initialized!')
 
     logging.info('Registering resources...')
@@ -70,14 +105,30 @@ if __name__ == '__main__':
     app.setWindowIcon(QIcon(RESOURCES_DICT[ICON_RESOURCE_NAME].local_path))
 
     main_window = gui_main.MainWindow()
+    first_paint_filter = gui_main.FirstPaintFilter(main_window)
+    first_paint_filter.painted.connect(lambda: report_startup_timing('first_paint'))
+    app.installEventFilter(first_paint_filter)
+    if main_window.plot_canvas is None:
+        main_window.plot_initialized.connect(on_plot_ready)
+    else:
+        # Without fast startup, the plot is ready once the event loop starts.
+        QTimer.singleShot(0, on_plot_ready)
 
     main_window.show()
 
+    # Profile the whole session if it is asked for, see profiling.py.
+    profile_directory = profiling.profile_directory_from_environment()
+    if profile_directory is not None:
+        main_window.set_profiling(True, profile_directory)
+
     # Start the event loop with app.exec
     # After the program stopped, app.exec will return a exit code which could indicate
     # whether there is an error, and sys.exit will get it.
     # If we don't call it with sys.exit, the exit code will always be 0 no matter if an
     # error happened.
     exit_code = app.exec_()
+    # Write the profiles and the latency statistics if we are still recording them.
+    main_window.set_profiling(False)
+    main_window.set_latency_monitoring(False)
     logging.info(f'Application stopped with exit code {exit_code}!')
     sys.exit(exit_code)
@@ -0,0 +1,225 @@
+"""
+This module contains MetricCube, the covid time series of many metrics (like confirmed cases and
+deaths) of many locations in one array.
+
+The JHU time series files of every metric are read into one array of shape (locations, dates,
+metrics). All metrics share the location index and the date axis, so a global file and a US county
+file of the same metric just fill different locations. Numbers are parsed by NumPy straight from
+the text of the files and stored as int32, so no Python object is created for any number, and
+loading takes time and memory roughly proportional to the numbers in the files.
+
+Both kinds of JHU time series files are supported, and told apart by their headers:
+    - Global files: Province/State, Country/Region, Lat, Long, dates...
+    - US files: UID, iso2, iso3, code3, FIPS, Admin2, Province_State, Country_Region, Lat, Long_,
+      Combined_Key, (Population,) dates...
+"""
+# Future features
+from __future__ import annotations
+
+# Python built-ins
+import csv
+import functools
+import logging
+import os
+from typing import Dict, List, Optional, Tuple
+
+# NumPy
+import numpy
+
+# Our modules
+import data
+from dataset import DateLike, date_slice, parse_covid_date
+from resource_manager import open_lines
+
+# The metric of our main covid cases data set, see dataset.Dataset.
+CONFIRMED = 'Confirmed'
+
+# A location of a MetricCube: (country, province, county).
+Location = Tuple[str, str, str]
+
+
+class MetricCube:
+    """
+    The cumulative values of many metrics of many locations on the same dates.
+
+    Instance Attributes:
+        - metrics: The names of all metrics.
+        - locations: The (country, province, county) of every location. The province and the
+          county are empty strings for country-wide rows, and the county is an empty string for
+          rows of global files.
+        - location_indices: A dict mapping locations to rows of values.
+        - dates: The dates that all files have.
+        - values: The value of every metric of every location on every date, shape (locations,
+          dates, metrics).
+        - present: Whether every location has every metric, shape (locations, metrics). The
+          values of a metric a location does not have are 0.
+
+    Representation Invariants:
+        - self.values.shape == (len(self.locations), len(self.dates), len(self.metrics))
+        - self.present.shape == (len(self.locations), len(self.metrics))
+    """
+    metrics: List[str]
+    locations: List[Location]
+    location_indices: Dict[Location, int]
+    dates: numpy.ndarray
+    values: numpy.ndarray
+    present: numpy.ndarray
+
+    def __init__(self, metrics: List[str], locations: List[Location], dates: numpy.ndarray,
+                 values: numpy.ndarray, present: numpy.ndarray) -> None:
+        """
+        Initialize a MetricCube from its arrays.
+
+        Note:
+            - Use MetricCube.load to load a MetricCube from files.
+        """
+        self.metrics = metrics
+        self.locations = locations
+        self.location_indices = {location: i for i, location in enumerate(locations)}
+        self.dates = dates
+        self.values = values
+        self.present = present
+        for array in (self.dates, self.values, self.present):
+            array.flags.writeable = False
+
+    @classmethod
+    def load(cls, files: List[Tuple[str, str]]) -> MetricCube:
+        """
+        Load a MetricCube from the given (metric, path) pairs of JHU time series files.
+        Many files may have the same metric, like the global and the US deaths.
+        """
+        parsed = [(metric, *read_time_series(path)) for metric, path in files]
+        metrics = list(dict.fromkeys(metric for metric, _, _, _ in parsed))
+        location_indices: Dict[Location, int] = {}
+        for _, file_locations, _, _ in parsed:
+            for location in file_locations:
+                location_indices.setdefault(location, len(location_indices))
+        dates = functools.reduce(numpy.intersect1d, [file_dates for _, _, file_dates, _ in parsed])
+
+        values = numpy.zeros((len(location_indices), len(dates), len(metrics)), dtype=numpy.int32)
+        present = numpy.zeros((len(location_indices), len(metrics)), dtype=bool)
+        for metric, file_locations, file_dates, file_values in parsed:
+            rows = [location_indices[location] for location in file_locations]
+            columns = numpy.searchsorted(file_dates, dates)
+            values[rows, :, metrics.index(metric)] = file_values[:, columns]
+            present[rows, metrics.index(metric)] = True
+        return cls(metrics, list(location_indices), dates, values, present)
+
+    def series(self, metric: str, location: Location, start: Optional[DateLike] = None,
+               end: Optional[DateLike] = None) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Return the dates and the values of the given metric of the given location from start to
+        end (inclusive).
+
+        Raise KeyError if the location does not have the metric.
+        """
+        row, column = self.location_indices[location], self.metrics.index(metric)
+        if not self.present[row, column]:
+            raise KeyError((metric, location))
+        window = date_slice(self.dates, start, end)
+        return self.dates[window], self.values[row, window, column]
+
+    def country_totals(self, metric: str) -> Tuple[List[str], numpy.ndarray]:
+        """
+        Return the sorted names of the countries with the given metric, and their totals on every
+        date, shape (countries, dates).
+
+        The total of a country is its country-wide row if it has one, otherwise the total of all its
+        other rows (provinces, or the counties and territories of US files).
+        """
+        column = self.metrics.index(metric)
+        rows = numpy.flatnonzero(self.present[:, column])
+        country_wide = {self.locations[row][0] for row in rows
+                        if self.locations[row][1:] == ('', '')}
+        rows = [row for row in rows if self.locations[row][0] not in country_wide
+                or self.locations[row][1:] == ('', '')]
+
+        countries = sorted({self.locations[row][0] for row in rows})
+        country_indices = {country: i for i, country in enumerate(countries)}
+        totals = numpy.zeros((len(countries), len(self.dates)), dtype=numpy.int64)
+        numpy.add.at(totals, [country_indices[self.locations[row][0]] for row in rows],
+                     self.values[rows, :, column])
+        return countries, totals
+
+
+# =================================================================================================
+# Functions
+# =================================================================================================
+
+def is_date_column(name: str) -> bool:
+    """
+    Return whether the given column of a JHU time series file is a date.
+
+    >>> is_date_column('1/22/20'), is_date_column('Lat')
+    (True, False)
+    """
+    return name.count('/') == 2 and name.replace('/', '').isdigit()
+
+
+def read_time_series(filename: str) -> Tuple[List[Location], numpy.ndarray, numpy.ndarray]:
+    """
+    Read a global or US JHU time series file, and return its locations, its dates, and its values
+    array of shape (locations, dates).
+
+    The same countries are removed as in data.py. The numbers of all rows are joined and parsed by
+    one call of NumPy.
+
+    Raise ValueError if a value is missing or not an integer.
+    """
+    with open_lines(filename) as file:
+        reader = csv.reader(file)
+        header = next(reader)
+        first_date = next(i for i, name in enumerate(header) if is_date_column(name))
+        if 'Admin2' in header:
+            columns = (header.index('Country_Region'), header.index('Province_State'),
+                       header.index('Admin2'))
+        else:
+            columns = (1, 0, None)
+
+        locations = []
+        numbers = []
+        for row in reader:
+            country = row[columns[0]]
+            if not data.is_in_ascii(country) or country in data.COVID_COUNTRIES_DELETE:
+                continue
+            locations.append((country, row[columns[1]],
+                              '' if columns[2] is None else row[columns[2]]))
+            numbers.append(','.join(row[first_date:]))
+
+    dates = numpy.array([parse_covid_date(d) for d in header[first_date:]], dtype='datetime64[D]')
+    values = numpy.fromstring(','.join(numbers), dtype=numpy.int32, sep=',') if numbers \
+        else numpy.zeros(0, dtype=numpy.int32)
+    if values.size != len(locations) * len(dates):
+        raise ValueError(f'{filename} has values that are missing or not integers')
+    return locations, dates, values.reshape((len(locations), len(dates)))
+
+
+def load_available(datasets: List[Dict[str, str]]) -> Optional[MetricCube]:
+    """
+    Load a MetricCube from the given data sets (see settings.METRIC_DATASETS) whose files exist, or
+    return None if none of them exists.
+    """
+    files = []
+    for dataset in datasets:
+        if os.path.exists(dataset['local_path']):
+            files.append((dataset['metric'], dataset['local_path']))
+        else:
+            logging.info(f'Skipped the {dataset["metric"]} data set, '
+                         f'{dataset["local_path"]} does not exist')
+    return MetricCube.load(files) if files else None
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod()
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports'  : ['__future__', 'csv', 'functools', 'logging', 'os', 'typing', 'numpy',
+                            'data', 'dataset', 'resource_manager'],
+        'allowed-io'     : ['read_time_series'],
+        'max-line-length': 100,
+        'disable'        : ['R1705', 'C0200', 'E9989', 'E9997']
+    })
@@ -0,0 +1,221 @@
+"""
+This module computes series derived from the cumulative covid cases, like daily new cases, rolling
+averages, and doubling time.
+
+Every function works on whole arrays, the last axis being dates, so one call computes a series for
+all countries at once. Sliding windows use cumulative sums, so they take O(n) time whatever the
+window size is.
+
+>>> cases = numpy.array([[1, 2, 4, 8, 16]])
+>>> daily_new_cases(cases)
+array([[1, 1, 2, 4, 8]])
+>>> rolling_mean(daily_new_cases(cases), 2)
+array([[nan, 1. , 1.5, 3. , 6. ]])
+"""
+# Future features
+from __future__ import annotations
+
+# Python built-ins
+import datetime
+import math
+from typing import Callable, Dict, List, Optional, Tuple
+
+# NumPy
+import numpy
+
+# Our modules
+from dataset import date_slice
+
+# The location of the global series in a MetricsEngine.
+GLOBAL_LOCATION = ''
+
+# Per capita series are rates per this many people.
+PER_CAPITA_BASE = 100000
+
+# The window of doubling_time in days.
+DOUBLING_TIME_WINDOW = 7
+
+
+# =================================================================================================
+# Vectorized functions
+# =================================================================================================
+
+def daily_new_cases(cases: numpy.ndarray) -> numpy.ndarray:
+    """
+    Return the new cases on every date from the cumulative cases.
+    The new cases on the first date are the cumulative cases on that date.
+
+    Note:
+        - The result may be negative where a data set corrected its cumulative cases.
+    """
+    return numpy.diff(cases, axis=-1, prepend=0)
+
+
+def rolling_mean(values: numpy.ndarray, window: int) -> numpy.ndarray:
+    """
+    Return the mean of the last window values on every date.
+    The first window - 1 dates have no mean and are NaN.
+
+    Preconditions:
+        - window >= 1
+    """
+    sums = numpy.cumsum(values, axis=-1, dtype=numpy.float64)
+    result = numpy.full(values.shape, numpy.nan)
+    if values.shape[-1] >= window:
+        result[..., window - 1:] = sums[..., window - 1:]
+        result[..., window:] -= sums[..., :-window]
+        result[..., window - 1:] /= window
+    return result
+
+
+def doubling_time(cases: numpy.ndarray, window: int = DOUBLING_TIME_WINDOW) -> numpy.ndarray:
+    """
+    Return the number of days the cumulative cases take to double at the growth rate of the last
+    window days. Dates without growth are NaN.
+
+    >>> doubling_time(numpy.array([1, 2, 4, 8]), 1)
+    array([nan,  1.,  1.,  1.])
+    """
+    cases = cases.astype(numpy.float64)
+    result = numpy.full(cases.shape, numpy.nan)
+    current, previous = cases[..., window:], cases[..., :-window]
+    growing = (previous > 0) & (current > previous)
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        days = window * math.log(2) / numpy.log(current / previous)
+    result[..., window:] = numpy.where(growing, days, numpy.nan)
+    return result
+
+
+def per_capita(values: numpy.ndarray, populations: numpy.ndarray) -> numpy.ndarray:
+    """
+    Return the values per PER_CAPITA_BASE people. Locations without a population are NaN.
+
+    populations has one population for every row of values.
+    """
+    populations = numpy.where(populations > 0, populations, numpy.nan).astype(numpy.float64)
+    return values * (PER_CAPITA_BASE / populations)[..., numpy.newaxis]
+
+
+# The series derived from cumulative cases, mapping their names (also the labels of the y-axis) to
+# the functions that compute them.
+SERIES: Dict[str, Callable[[numpy.ndarray], numpy.ndarray]] = {
+    'Cumulative cases'           : lambda cases: cases,
+    'Daily new cases'            : daily_new_cases,
+    '7-day average of new cases' : lambda cases: rolling_mean(daily_new_cases(cases), 7),
+    '14-day average of new cases': lambda cases: rolling_mean(daily_new_cases(cases), 14),
+    'Doubling time (days)'       : doubling_time
+}
+
+# The series that can be computed per capita.
+PER_CAPITA_SERIES = ['Cumulative cases', 'Daily new cases', '7-day average of new cases',
+                     '14-day average of new cases']
+
+
+# =================================================================================================
+# Engine
+# =================================================================================================
+
+class MetricsEngine:
+    """
+    Derived series of the cumulative cases of many locations.
+
+    A series is computed for all locations at once the first time any location asks for it, and
+    then cached.
+
+    Instance Attributes:
+        - dates: The dates of all series.
+        - locations: The names of all locations. The world is GLOBAL_LOCATION.
+        - location_indices: A dict mapping the names of locations to rows of cases.
+        - cases: The cumulative cases of every location, shape (locations, dates).
+        - populations: The population of every location, or None if we do not know them.
+        - cache: A dict mapping the names of series to their values for all locations.
+    """
+    dates: numpy.ndarray
+    locations: List[str]
+    location_indices: Dict[str, int]
+    cases: numpy.ndarray
+    populations: Optional[numpy.ndarray]
+    cache: Dict[str, numpy.ndarray]
+
+    def __init__(self, dates: numpy.ndarray, locations: List[str], cases: numpy.ndarray,
+                 populations: Optional[Dict[str, int]] = None) -> None:
+        """
+        Initialize a MetricsEngine.
+
+        Per capita series are only available if populations are given.
+        """
+        self.dates = dates
+        self.locations = locations
+        self.location_indices = {location: i for i, location in enumerate(locations)}
+        self.cases = cases
+        self.populations = None if populations is None else \
+            numpy.array([populations.get(location, 0) for location in locations])
+        self.cache = {}
+
+    def series_names(self) -> List[str]:
+        """
+        Return the names of all series available.
+        """
+        names = list(SERIES)
+        if self.populations is not None:
+            names.extend(f'{name} per {PER_CAPITA_BASE:,}' for name in PER_CAPITA_SERIES)
+        return names
+
+    def get_all(self, name: str) -> numpy.ndarray:
+        """
+        Return the series of the given name for all locations.
+
+        Raise KeyError if the series is not available.
+        """
+        if name not in self.cache:
+            if name in SERIES:
+                self.cache[name] = SERIES[name](self.cases)
+            elif self.populations is not None and name.endswith(f' per {PER_CAPITA_BASE:,}'):
+                base_name = name[:-len(f' per {PER_CAPITA_BASE:,}')]
+                if base_name not in PER_CAPITA_SERIES:
+                    raise KeyError(name)
+                self.cache[name] = per_capita(self.get_all(base_name), self.populations)
+            else:
+                raise KeyError(name)
+            self.cache[name].flags.writeable = False
+        return self.cache[name]
+
+    def get(self, location: str, name: str, start: Optional[datetime.date] = None,
+            end: Optional[datetime.date] = None) -> Tuple[List[datetime.date], numpy.ndarray]:
+        """
+        Return the dates and the values of the given series of the given location from start to
+        end (inclusive).
+
+        Raise KeyError if the location or the series is not available.
+        """
+        window = date_slice(self.dates, start, end)
+        row = self.get_all(name)[self.location_indices[location]]
+        return self.dates[window].astype(object).tolist(), row[window]
+
+    def get_many(self, locations: List[str], name: str, start: Optional[datetime.date] = None,
+                 end: Optional[datetime.date] = None) \
+            -> Tuple[List[datetime.date], numpy.ndarray]:
+        """
+        Return the dates and the values of the given series of the given locations from start to
+        end (inclusive), shape (locations, dates). The values are sliced in one operation.
+
+        Raise KeyError if a location or the series is not available.
+        """
+        window = date_slice(self.dates, start, end)
+        rows = [self.location_indices[location] for location in locations]
+        return self.dates[window].astype(object).tolist(), self.get_all(name)[rows, window]
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod()
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports'  : ['__future__', 'datetime', 'math', 'typing', 'numpy', 'dataset'],
+        'allowed-io'     : [],
+        'max-line-length': 100,
+        'disable'        : ['R1705', 'C0200', 'E9989', 'E9997']
+    })
@@ -0,0 +1,96 @@
+"""
+This module contains the styling of our plots, shared by the plot canvas of our window
+(gui_plot.PlotCanvas) and the headless plot exporter (export_plots.py).
+
+It only depends on matplotlib, so it could be used without Qt.
+"""
+# Python built-ins
+from typing import Dict, List, Tuple
+
+# Matplotlib
+import matplotlib
+import matplotlib.axes
+import matplotlib.style
+
+matplotlib.style.use('fast')
+
+# =================================================================================================
+# Constants
+# =================================================================================================
+
+# The default line color, style, and marker of our plots.
+DEFAULT_COVID_LINE_COLOR = '#385587'
+DEFAULT_CLOSURE_LINE_COLOR = '#FFBF37'
+DEFAULT_LINE_STYLE = 'solid'
+DEFAULT_DATA_MARKER = '.'
+
+# The series plotted on the covid cases axes by default, see metrics.SERIES.
+DEFAULT_COVID_LABEL = 'Cumulative cases'
+
+# The colormap of overlaid countries, and the number of distinct colors it has.
+OVERLAY_COLORMAP = 'tab20'
+OVERLAY_COLORS = 20
+
+# Overlaid closure statuses are spread within this distance of their tick, so they do not hide
+# each other.
+OVERLAY_CLOSURE_SPREAD = 0.3
+
+# The keyword arguments used to create our figures.
+FIGURE_KWARGS: Dict = {'tight_layout': True, 'linewidth': 1}
+
+# The y ticks of the closure status plot, see data.ClosureStatus.
+CLOSURE_TICKS = [0, 1, 2, 3]
+CLOSURE_TICK_LABELS = ['Academic Break', 'Fully Open', 'Partially Open', 'Closed']
+
+
+# =================================================================================================
+# Functions
+# =================================================================================================
+
+def init_axes(covid_axes: matplotlib.axes.Axes, closure_axes: matplotlib.axes.Axes,
+              covid_label: str = DEFAULT_COVID_LABEL) -> None:
+    """
+    Initialize the covid cases axes and the closure status axes, including titles and labels.
+    covid_label is the label of the y-axis of the covid cases axes, the name of the series plotted.
+    """
+    # Setting labels and title
+    covid_axes.set_title('COVID-19 Cases')
+    covid_axes.set_xlabel('Dates')
+    covid_axes.set_ylabel(covid_label)
+
+    closure_axes.set_yticks(ticks=CLOSURE_TICKS, minor=False)
+    closure_axes.set_yticklabels(labels=CLOSURE_TICK_LABELS, minor=False)
+
+    for text in covid_axes.get_xticklabels():
+        text.set_rotation(40.0)
+    for text in closure_axes.get_xticklabels():
+        text.set_rotation(40.0)
+
+    closure_axes.set_title('School Closure Status')
+    closure_axes.set_xlabel('Dates')
+
+
+def overlay_colors(count: int) -> List[Tuple[float, float, float, float]]:
+    """
+    Return the colors of count overlaid countries. Colors repeat after OVERLAY_COLORS countries.
+
+    >>> len(set(overlay_colors(25)))
+    20
+    """
+    colormap = matplotlib.colormaps[OVERLAY_COLORMAP]
+    return [colormap(i % OVERLAY_COLORS) for i in range(count)]
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod()
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports'  : ['typing', 'matplotlib', 'matplotlib.axes', 'matplotlib.style'],
+        'allowed-io'     : [],
+        'max-line-length': 100,
+        'disable'        : ['R1705', 'C0200', 'E9989', 'E9997']
+    })
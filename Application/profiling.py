@@ -0,0 +1,248 @@
+"""
+This module contains Profiler, which records what our program does while it is slow, so a user
+who finds initializing or panning slow could send us the files.
+
+A profiler wraps some functions (hooks), like data.init_data and MainWindow.update_plot, with
+cProfile, and samples their stacks with a background thread while they run. When it stops, it
+writes into its directory, for every hook that was called:
+    - HOOK.pstats, the cProfile statistics, which could be read by pstats or snakeviz,
+    - HOOK.collapsed, the sampled stacks, one "frame;frame;frame count" line per stack, which could
+      be read by flamegraph.pl or speedscope.
+
+The hooks are only replaced while a profiler runs, so there is no overhead at all otherwise. A hook
+called inside another hook (like PlotCanvas.draw inside MainWindow.update_plot) is recorded as part
+of the outer hook.
+
+Profiling is started from the View menu, or by running main.py with the environment variable
+CSC110_PROFILE=1 (and optionally CSC110_PROFILE_DIR=directory).
+"""
+# Future features
+from __future__ import annotations
+
+# Python built-ins
+import collections
+import cProfile
+import datetime
+import functools
+import logging
+import os
+import sys
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# The environment variables that start profiling when our program starts, and set its directory.
+PROFILE_ENVIRONMENT_VARIABLE = 'CSC110_PROFILE'
+PROFILE_DIR_ENVIRONMENT_VARIABLE = 'CSC110_PROFILE_DIR'
+
+# The directory of the profiles, one subdirectory is created for every run of a profiler.
+DEFAULT_PROFILE_DIR = 'profiles'
+
+# Seconds between two samples of the stacks
+SAMPLE_INTERVAL = 0.005
+
+# A function to profile: (the module or class that has it, its name, the name of the hook).
+Target = Tuple[Any, str, str]
+
+
+class Profiler:
+    """
+    A profiler of the given hooks, see the module docstring.
+
+    Instance Attributes:
+        - directory: The directory that the profiles are written into.
+        - targets: The functions to profile.
+        - originals: A dict mapping the names of hooks to their original functions, and whether
+          they were defined on the module or class itself (rather than inherited).
+        - profiles: A dict mapping the names of hooks to their cProfile profiles.
+        - calls: A Counter of the number of calls of every hook.
+        - stacks: A Counter of the sampled stacks of every hook, see collapse_stack.
+        - active_hooks: A dict mapping the identifiers of threads to the hooks they are running.
+        - is_running: Whether the hooks are replaced.
+        - sampler: The thread that samples the stacks, or None if it is not running.
+        - stop_event: The event that stops the sampler.
+
+    Representation Invariants:
+        - self.is_running == (self.sampler is not None)
+    """
+    directory: str
+    targets: List[Target]
+    originals: Dict[str, Tuple[Callable, bool]]
+    profiles: Dict[str, cProfile.Profile]
+    calls: collections.Counter
+    stacks: collections.Counter
+    active_hooks: Dict[int, str]
+    is_running: bool
+    sampler: Optional[threading.Thread]
+    stop_event: threading.Event
+
+    def __init__(self, targets: List[Target], directory: str = DEFAULT_PROFILE_DIR) -> None:
+        """
+        Initialize a Profiler of the given functions, which writes into a new subdirectory of the
+        given directory.
+        """
+        self.directory = os.path.join(directory, datetime.datetime.now().strftime('%Y%m%d-%H%M%S'))
+        self.targets = targets
+        self.originals = {}
+        self.profiles = {hook: cProfile.Profile() for _, _, hook in targets}
+        self.calls = collections.Counter()
+        self.stacks = collections.Counter()
+        self.active_hooks = {}
+        self.is_running = False
+        self.sampler = None
+        self.stop_event = threading.Event()
+
+    def start(self) -> None:
+        """
+        Replace the hooks with their profiled versions, and start sampling.
+
+        Note:
+            - Callbacks connected to a hook before it was replaced (like bound methods connected
+              to signals) keep calling the original function, so they should be connected again.
+        """
+        if self.is_running:
+            return
+        for owner, name, hook in self.targets:
+            function = getattr(owner, name)
+            self.originals[hook] = (function, name in vars(owner))
+            setattr(owner, name, self.wrap(hook, function))
+        self.stop_event.clear()
+        self.sampler = threading.Thread(target=self.sample, name='Profiler sampler', daemon=True)
+        self.sampler.start()
+        self.is_running = True
+        logging.info(f'Started profiling {", ".join(self.originals)}')
+
+    def stop(self) -> List[str]:
+        """
+        Restore the hooks, stop sampling, and write the profiles of the hooks that were called.
+        Return the paths of the files written.
+        """
+        if not self.is_running:
+            return []
+        for owner, name, hook in self.targets:
+            function, is_own = self.originals.pop(hook)
+            if is_own:
+                setattr(owner, name, function)
+            else:
+                delattr(owner, name)
+        self.stop_event.set()
+        self.sampler.join()
+        self.sampler = None
+        self.is_running = False
+        return self.write()
+
+    def wrap(self, hook: str, function: Callable) -> Callable:
+        """Return the profiled version of the given function of the given hook."""
+
+        @functools.wraps(function)
+        def profiled(*args: Any, **kwargs: Any) -> Any:
+            """The profiled version of a hook, see Profiler.call."""
+            if threading.get_ident() in self.active_hooks:
+                # Called inside another hook, which records it already.
+                return function(*args, **kwargs)
+            return self.call(hook, function, args, kwargs)
+
+        return profiled
+
+    def call(self, hook: str, function: Callable, args: tuple, kwargs: dict) -> Any:
+        """
+        Call the given function of the given hook, profiled. The sampler stops walking a stack at
+        the frame of this method.
+
+        Preconditions:
+            - This thread is not running another hook.
+        """
+        thread_id = threading.get_ident()
+        self.active_hooks[thread_id] = hook
+        self.calls[hook] += 1
+        profile = self.profiles[hook]
+        try:
+            profile.enable()
+        except ValueError:
+            # Since Python 3.12, only one profiler could be active at a time in all threads.
+            profile = None
+        try:
+            return function(*args, **kwargs)
+        finally:
+            if profile is not None:
+                profile.disable()
+            del self.active_hooks[thread_id]
+
+    def sample(self) -> None:
+        """Sample the stacks of the threads running hooks until stop_event is set."""
+        call_code = Profiler.call.__code__
+        while not self.stop_event.wait(SAMPLE_INTERVAL):
+            frames = sys._current_frames()
+            for thread_id, hook in list(self.active_hooks.items()):
+                if thread_id in frames:
+                    self.stacks[collapse_stack(hook, frames[thread_id], call_code)] += 1
+
+    def write(self) -> List[str]:
+        """
+        Write the profiles and the sampled stacks of the hooks that were called into directory.
+        Return the paths of the files written.
+        """
+        paths = []
+        os.makedirs(self.directory, exist_ok=True)
+        for hook in self.calls:
+            path = os.path.join(self.directory, f'{hook}.pstats')
+            try:
+                self.profiles[hook].dump_stats(path)
+                paths.append(path)
+            except TypeError:
+                # The profile has no statistics, it could not be enabled (see call).
+                pass
+
+            stacks = [(stack, count) for stack, count in self.stacks.items()
+                      if stack.split(';', 1)[0] == hook]
+            if stacks != []:
+                path = os.path.join(self.directory, f'{hook}.collapsed')
+                with open(path, 'w') as file:
+                    file.writelines(f'{stack} {count}\n' for stack, count in sorted(stacks))
+                paths.append(path)
+        logging.info(f'Wrote the profiles of {sum(self.calls.values())} calls into '
+                     f'{self.directory}')
+        return paths
+
+
+# =================================================================================================
+# Functions
+# =================================================================================================
+
+def collapse_stack(hook: str, frame: Any, call_code: Any) -> str:
+    """
+    Return the stack of the given (innermost) frame, from the outermost frame below the frame of
+    call_code to the innermost, as "hook;function (file:line);...".
+    """
+    names = []
+    while frame is not None and frame.f_code is not call_code:
+        code = frame.f_code
+        names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+        frame = frame.f_back
+    names.append(hook)
+    return ';'.join(reversed(names))
+
+
+def profile_directory_from_environment() -> Optional[str]:
+    """
+    Return the directory of the profiles if profiling is started by the environment variables,
+    otherwise None.
+    """
+    if os.environ.get(PROFILE_ENVIRONMENT_VARIABLE, '0') in ('', '0'):
+        return None
+    return os.environ.get(PROFILE_DIR_ENVIRONMENT_VARIABLE, DEFAULT_PROFILE_DIR)
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod()
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports'  : ['__future__', 'collections', 'cProfile', 'datetime', 'functools',
+                            'logging', 'os', 'sys', 'threading', 'typing'],
+        'allowed-io'     : ['Profiler.write'],
+        'max-line-length': 100,
+        'disable'        : ['R1705', 'C0200', 'E9989', 'E9997', 'W0212']
+    })
@@ -8,12 +8,23 @@ from __future__ import annotations
 import hashlib
 import json
 import logging
+import mmap
 import os
-from typing import Any, Dict, Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 # Requests library
 import requests
 
+# xxhash is optional, the xxh3 identifiers are only supported when it is installed
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
 # =================================================================================================
 # Constants
 # =================================================================================================
@@ -31,10 +42,42 @@ MARKERS_ICON_RESOURCE_NAMES = ['m00.webp', 'm01.webp', 'm02.webp', 'm03.webp', '
                                'm30.webp', 'm31.webp', 'm32.webp', 'm33.webp', 'm34.webp',
                                'm35.webp', 'm36.webp']
 
-# MD5 Checksum Settings, it will be updated by the config file
+# Checksum Settings, it will be updated by the config file
 BUFFER_SIZE = 65536
+# Size of the blocks hashed in parallel by tree identifiers, it will be updated by the config file
+TREE_BLOCK_SIZE = 8388608
+# Files at least this large are hashed through mmap instead of a read buffer
+MMAP_THRESHOLD = 1048576
 # Number of attempts to re-download file if failed, it will be updated by the config file
 RETRY_COUNT = 3
+# Number of resources downloaded at the same time, it will be updated by the config file
+DOWNLOAD_WORKERS = 4
+# Seconds to wait for the server before giving up a download attempt
+DOWNLOAD_TIMEOUT = 30
+# Suffix of the temporary file that holds a partially downloaded resource
+PARTIAL_SUFFIX = '.part'
+# The verification manifest that caches the identifiers of local files,
+# it will be updated by the config file
+MANIFEST_PATH = 'resources/verification_manifest.json'
+# Whether to always hash the files instead of trusting the manifest,
+# it will be updated by the config file
+DEEP_VERIFICATION = False
+
+# Hash algorithms that could be used in identifiers, mapping names to hash object constructors.
+# An identifier is written as "<algorithm>:<hex digest>", or "<algorithm>-tree:<hex digest>" for a
+# tree hash (see TreeHash). An identifier without any algorithm is an MD5 hash.
+HASH_ALGORITHMS: Dict[str, Callable[[], Any]] = {
+    'md5'    : hashlib.md5,
+    'sha1'   : hashlib.sha1,
+    'sha256' : hashlib.sha256,
+    'blake2b': hashlib.blake2b,
+    'blake2s': hashlib.blake2s
+}
+if xxhash is not None:
+    HASH_ALGORITHMS['xxh3'] = xxhash.xxh3_64
+    HASH_ALGORITHMS['xxh128'] = xxhash.xxh3_128
+DEFAULT_HASH_ALGORITHM = 'md5'
+TREE_SUFFIX = '-tree'
 
 
 # =================================================================================================
@@ -47,8 +90,12 @@ class Config:
 
     >>> config = Config('config.json')
     >>> config['setting'] == \
-    {'font_family': 'Calibri', 'alternative_font_family': 'Helvetica', 'font_size': 14}
+    {'font_family': 'Calibri', 'alternative_font_family': 'Helvetica', 'font_size': 14,
+    ... 'fast_startup': True, 'metric_datasets': config['setting']['metric_datasets'],
+    ... 'init_timings_path': 'resources/init_data_timings.json'}
     True
+    >>> [dataset['metric'] for dataset in config['setting']['metric_datasets']]
+    ['Deaths', 'Recovered', 'Confirmed', 'Deaths']
     """
 
     file_path: str
@@ -76,6 +123,7 @@ class Resource:
         - local_path: The path of this resource.
         - remote_path: The remote direct url of this resource.
         - identifier_expected: The str expected identifier of this resource.
+            - It may be tagged with a hash algorithm, see HASH_ALGORITHMS.
         - identifier_actual: The actual str identifier of this resource.
             - This could be None.
         - is_init: Whether this resource was initialized before.
@@ -105,6 +153,9 @@ class Resource:
     def reset(self):
         """
         Reset this resource to its raw state (Before initialization).
+
+        The identifier will be generated again on the next check, which is cheap if the local file
+        is unchanged since it was recorded in the verification manifest.
         """
         self.is_init = False
         self.identifier_actual = None
@@ -119,45 +170,102 @@ class Resource:
             except FileNotFoundError:
                 logging.error('File %s not found!' % self.local_path)
                 return False
+            except ValueError as e:
+                logging.error('Cannot verify %s: %s' % (self.local_path, e))
+                return False
         return self.identifier_expected == self.identifier_actual
 
-    def generate_identifier(self) -> None:
+    def generate_identifier(self, deep: Optional[bool] = None) -> None:
         """
-        Generate the MD5 hash of this resource and update self.identifier_expected to the
-        generated MD5 hash.
+        Generate the hash of this resource with the algorithm of self.identifier_expected and
+        update self.identifier_actual to the generated identifier.
 
-        It may raise FileNotFoundError if the local file doesn't exist.
+        If the size, modification time, and inode of the local file are the same as those recorded
+        in the verification manifest, the recorded identifier is trusted and the file is not read.
+        If deep is True, the file is always hashed. If deep is None, DEEP_VERIFICATION is used.
+
+        It may raise FileNotFoundError if the local file doesn't exist, and ValueError if the
+        algorithm of self.identifier_expected is not supported.
         """
-        md5 = hashlib.md5()
+        if deep is None:
+            deep = DEEP_VERIFICATION
 
-        with open(self.local_path, 'rb') as file:
-            data = file.read(BUFFER_SIZE)
-            while data:
-                md5.update(data)
-                data = file.read(BUFFER_SIZE)
+        tag, _ = split_identifier(self.identifier_expected)
+        file_stat = get_stat_key(self.local_path)
+        entry = MANIFEST.get(self.local_path)
+        if not deep and entry is not None and entry['stat'] == file_stat \
+                and 'identifier' in entry and split_identifier(entry['identifier'])[0] == tag:
+            self.identifier_actual = entry['identifier']
+            return
 
-        self.identifier_actual = md5.hexdigest()
+        self.identifier_actual = compute_identifier(self.local_path, tag)
+        record_manifest_entry(self.local_path, file_stat, self.identifier_actual)
 
-    def download(self) -> bool:
+    def download(self, session: Optional[requests.Session] = None) -> bool:
         """
         Try to download the resource specified by remote_path to local_path.
-        Return False and print an error message if failed to connect to remote_path.
+        Return False and print an error message if failed to connect to remote_path, or if the
+        algorithm of identifier_expected is not supported.
+
+        The body is streamed into a temporary file next to local_path while its hash is
+        updated chunk by chunk, so self.identifier_actual is known as soon as the download ends
+        without reading the file again. The temporary file is renamed to local_path only after
+        the whole body is received. If a temporary file is left by an interrupted download, we
+        ask the server for the remaining bytes only (HTTP Range).
 
         Note:
             - This function will create any directories missing.
+            - If session is None, the shared session returned by get_session() is used.
         """
         logging.info('Downloading %s!' % self.name)
+        if session is None:
+            session = get_session()
+        partial_path = self.local_path + PARTIAL_SUFFIX
+        tag, _ = split_identifier(self.identifier_expected)
+        try:
+            hash_object = new_hash(tag)
+        except ValueError as e:
+            logging.error('Cannot verify %s: %s' % (self.local_path, e))
+            return False
+        headers = {}
         try:
-            remote_resource = requests.get(self.remote_path)
             os.makedirs(self.local_dir_path, exist_ok=True)
 
-            with open(self.local_path, 'wb') as local_resource:
-                local_resource.write(remote_resource.content)
-                return True
-
-        except (requests.exceptions.ConnectionError, requests.exceptions.ConnectTimeout):
+            # Resume from the bytes we already have
+            if os.path.exists(partial_path):
+                headers['Range'] = 'bytes=%u-' % hash_file(partial_path, hash_object)
+
+            with session.get(self.remote_path, headers=headers, stream=True,
+                             timeout=DOWNLOAD_TIMEOUT) as remote_resource:
+                if 'Range' in headers and remote_resource.status_code == 416:
+                    # The server has nothing after our offset, so the partial file is complete.
+                    mode = None
+                elif 'Range' in headers and remote_resource.status_code == 206:
+                    mode = 'ab'
+                else:
+                    # The server ignored our Range header, so start over.
+                    remote_resource.raise_for_status()
+                    hash_object = new_hash(tag)
+                    mode = 'wb'
+
+                if mode is not None:
+                    with open(partial_path, mode) as local_resource:
+                        for data in remote_resource.iter_content(BUFFER_SIZE):
+                            hash_object.update(data)
+                            local_resource.write(data)
+
+            os.replace(partial_path, self.local_path)
+            self.identifier_actual = join_identifier(tag, hash_object.hexdigest())
+            record_manifest_entry(self.local_path, get_stat_key(self.local_path),
+                                  self.identifier_actual)
+            return True
+
+        except requests.exceptions.RequestException:
             logging.error('Failed to connect to %s!' % self.remote_path)
             return False
+        except OSError:
+            logging.error('Failed to write %s!' % self.local_path)
+            return False
 
     def to_dict(self) -> Dict:
         """
@@ -196,6 +304,78 @@ class Resource:
         return self.name
 
 
+class TreeHash:
+    """
+    A hash object that splits the data into blocks of TREE_BLOCK_SIZE bytes, hashes every block
+    separately, and then hashes the concatenation of the digests of all blocks.
+
+    Blocks are independent, so when a large chunk of data is given to update(), all complete blocks
+    in it are hashed in parallel by a thread pool (hashlib releases the GIL). This makes verifying
+    a large file several times faster than a single serial pass.
+
+    Instance Attributes:
+        - algorithm: The name of the algorithm in HASH_ALGORITHMS used for blocks and the root.
+        - block_size: The number of bytes in every block except the last one.
+        - block_digests: The digests of all complete blocks so far.
+        - pending: The data of the current incomplete block.
+    """
+    algorithm: str
+    block_size: int
+    block_digests: List[bytes]
+    pending: bytearray
+
+    def __init__(self, algorithm: str) -> None:
+        """Initialize a TreeHash object"""
+        self.algorithm = algorithm
+        self.block_size = TREE_BLOCK_SIZE
+        self.block_digests = []
+        self.pending = bytearray()
+
+    def hash_block(self, block: Any) -> bytes:
+        """Return the digest of a single block."""
+        hash_object = HASH_ALGORITHMS[self.algorithm]()
+        hash_object.update(block)
+        return hash_object.digest()
+
+    def update(self, data: Any) -> None:
+        """
+        Update this hash object with data, which is any bytes-like object.
+        """
+        with memoryview(data) as view:
+            offset = 0
+            # Complete the pending block first
+            if self.pending:
+                offset = min(self.block_size - len(self.pending), len(view))
+                self.pending.extend(view[:offset])
+                if len(self.pending) == self.block_size:
+                    self.block_digests.append(self.hash_block(self.pending))
+                    self.pending = bytearray()
+
+            end = offset + (len(view) - offset) // self.block_size * self.block_size
+            blocks = [view[i:i + self.block_size] for i in range(offset, end, self.block_size)]
+            if len(blocks) > 1:
+                with ThreadPoolExecutor() as executor:
+                    self.block_digests.extend(executor.map(self.hash_block, blocks))
+            else:
+                self.block_digests.extend(self.hash_block(block) for block in blocks)
+            # Release the views now, otherwise the underlying mmap could not be closed.
+            for block in blocks:
+                block.release()
+
+            self.pending.extend(view[end:])
+
+    def hexdigest(self) -> str:
+        """
+        Return the hex digest of the data so far.
+        """
+        digests = self.block_digests
+        if self.pending:
+            digests = digests + [self.hash_block(self.pending)]
+        root = HASH_ALGORITHMS[self.algorithm]()
+        root.update(b''.join(digests))
+        return root.hexdigest()
+
+
 class FailedToDownloadResourceException(Exception):
     """An exception raised when we failed to download the specified resource"""
 
@@ -210,33 +390,71 @@ class FailedToDownloadResourceException(Exception):
 
 RESOURCES_DICT: Dict[str, Resource] = {}
 
+# The verification manifest loaded from MANIFEST_PATH.
+# It maps the local path of a file to its stat key (size, mtime_ns, inode) and its identifier.
+MANIFEST: Dict[str, Dict] = {}
+MANIFEST_LOCK = threading.Lock()
+# True if MANIFEST has entries that are not saved to MANIFEST_PATH yet, see save_manifest.
+IS_MANIFEST_CHANGED = False
+
+# The session shared by all downloads, so that connections to the same host are reused.
+# It is created by get_session() when the first download starts.
+SESSION: Optional[requests.Session] = None
+
 
 # =================================================================================================
 # Functions
 # =================================================================================================
 
-def init_resources() -> None:
+def init_resources(resource_names: Optional[Iterable[str]] = None) -> None:
     """
     Download and check all resources needed.
 
+    If resource_names is not None, only the resources with these preferred names are checked.
+
+    Resources are checked and downloaded concurrently by at most DOWNLOAD_WORKERS threads, all of
+    them sharing the connection pool of get_session().
+
     For each of the resources, the maximum number of attempts to download is specified by
     constants RETRY_COUNT.
 
     Raise FailedToDownloadResourceException if failed to download any resources.
     """
-    for resource_name in RESOURCES_DICT:
-        resource = RESOURCES_DICT[resource_name]
-        if resource.is_init:
-            continue
-        is_complete = init_resource(resource)
+    if resource_names is None:
+        resource_names = RESOURCES_DICT.keys()
+    resource_names = [name for name in resource_names if not RESOURCES_DICT[name].is_init]
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as executor:
+        results = list(executor.map(lambda name: init_resource(RESOURCES_DICT[name]),
+                                    resource_names))
+
+    for resource_name, is_complete in zip(resource_names, results):
         if not is_complete:
             logging.error('Failed to completely download resource %s'
-                          ' %u times! Aborting...' % (resource.name, RETRY_COUNT))
+                          ' %u times! Aborting...' % (RESOURCES_DICT[resource_name].name,
+                                                      RETRY_COUNT))
             raise FailedToDownloadResourceException(resource_name)
 
+    save_manifest()
     logging.info('Successfully initialized all resources!')
 
 
+def get_session() -> requests.Session:
+    """
+    Return the session shared by all downloads, creating it if needed.
+
+    Its connection pool is large enough for DOWNLOAD_WORKERS concurrent downloads.
+    """
+    global SESSION
+    if SESSION is None:
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=DOWNLOAD_WORKERS,
+                                                pool_maxsize=DOWNLOAD_WORKERS)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        SESSION = session
+    return SESSION
+
+
 def init_resource(resource: Resource) -> bool:
     """
     Return True if the given resource is successfully initialized.
@@ -250,7 +468,6 @@ def init_resource(resource: Resource) -> bool:
     else:
         for i in range(RETRY_COUNT):
             if resource.download():
-                resource.generate_identifier()
                 if resource.is_complete():
                     return True
             logging.error('Failed to download %s %u times! Retrying...' % (resource.name, i + 1))
@@ -259,17 +476,138 @@ def init_resource(resource: Resource) -> bool:
 
 def register_resources(resource_config: Dict) -> None:
     """
-    Register all resources needed.
+    Register all resources needed, and then verify them with verify_resources().
     """
     global BUFFER_SIZE
     BUFFER_SIZE = resource_config['buffer_size']
     global RETRY_COUNT
     RETRY_COUNT = resource_config['retry_count']
+    global DOWNLOAD_WORKERS
+    DOWNLOAD_WORKERS = resource_config['download_workers']
+    global MANIFEST_PATH
+    MANIFEST_PATH = resource_config['manifest_path']
+    global DEEP_VERIFICATION
+    DEEP_VERIFICATION = resource_config['deep_verification']
+    global TREE_BLOCK_SIZE
+    TREE_BLOCK_SIZE = resource_config['tree_block_size']
 
     resources = resource_config['resources']
     for raw_resource in resources:
         RESOURCES_DICT[raw_resource['preferred_name']] = Resource.from_dict(raw_resource)
 
+    load_manifest()
+    verify_resources()
+
+
+def verify_resources(deep: Optional[bool] = None) -> Dict[str, float]:
+    """
+    Generate the identifiers of all registered resources concurrently, and return a dict mapping
+    the preferred names of the resources to the seconds spent on generating their identifiers.
+
+    hashlib releases the GIL while hashing, so the total time is bounded by the largest resource
+    instead of the sum of all resources. Resources that already have an identifier are skipped.
+    Unchanged files are not hashed at all unless deep is True, see Resource.generate_identifier.
+
+    Note:
+        - Later calls to Resource.is_complete() reuse the generated identifiers.
+        - Missing resources are not an error here, they will be downloaded by init_resource().
+        - Resources whose identifiers have unsupported algorithms are only logged as unverifiable,
+          init_resource() fails on them later.
+    """
+    def verify(resource: Resource) -> float:
+        """Generate the identifier of resource and return the seconds elapsed."""
+        start = time.perf_counter()
+        try:
+            resource.generate_identifier(deep)
+        except FileNotFoundError:
+            logging.warning('File %s not found!' % resource.local_path)
+        except ValueError as e:
+            logging.error('Cannot verify %s: %s' % (resource.local_path, e))
+        return time.perf_counter() - start
+
+    resources = [r for r in RESOURCES_DICT.values() if r.identifier_actual is None]
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor() as executor:
+        timings = dict(zip((r.preferred_name for r in resources),
+                           executor.map(verify, resources)))
+    seconds_elapsed = time.perf_counter() - start_time
+    save_manifest()
+
+    for name, seconds in sorted(timings.items(), key=lambda item: item[1], reverse=True):
+        logging.debug('Verified %s in %.4f seconds.' % (name, seconds))
+    logging.info('Verified %u resources in %.4f seconds (%.4f seconds in total per file).'
+                 % (len(timings), seconds_elapsed, sum(timings.values())))
+    return timings
+
+
+def get_stat_key(local_path: str) -> List[int]:
+    """
+    Return the [size, mtime_ns, inode] of the given file, which identifies a version of the file
+    in the verification manifest.
+
+    It may raise FileNotFoundError if the file doesn't exist.
+    """
+    file_stat = os.stat(local_path)
+    return [file_stat.st_size, file_stat.st_mtime_ns, file_stat.st_ino]
+
+
+def record_manifest_entry(local_path: str, stat_key: List[int], identifier: str) -> None:
+    """
+    Record the identifier of the given file in the verification manifest.
+
+    Note:
+        - The manifest is only written to disk by save_manifest().
+    """
+    global IS_MANIFEST_CHANGED
+    entry = {'stat': stat_key, 'identifier': identifier}
+    with MANIFEST_LOCK:
+        if MANIFEST.get(local_path) != entry:
+            MANIFEST[local_path] = entry
+            IS_MANIFEST_CHANGED = True
+
+
+def load_manifest() -> None:
+    """
+    Load the verification manifest from MANIFEST_PATH.
+
+    A missing or corrupted manifest is treated as an empty one, so every file will be hashed.
+    """
+    global IS_MANIFEST_CHANGED
+    IS_MANIFEST_CHANGED = False
+    MANIFEST.clear()
+    try:
+        with open(MANIFEST_PATH, 'rb') as file:
+            MANIFEST.update(json.loads(file.read()))
+    except FileNotFoundError:
+        logging.info('Verification manifest not found, all resources will be hashed.')
+    except ValueError:
+        logging.warning('Verification manifest is corrupted, all resources will be hashed.')
+
+
+def save_manifest() -> None:
+    """
+    Write the verification manifest to MANIFEST_PATH, if an entry was added or changed since it
+    was last loaded or saved.
+
+    The manifest is written into a temporary file first and then renamed, so a crash while saving
+    never leaves a half-written manifest.
+    """
+    global IS_MANIFEST_CHANGED
+    with MANIFEST_LOCK:
+        if not IS_MANIFEST_CHANGED:
+            return
+        content = json.dumps(MANIFEST, indent=4)
+        IS_MANIFEST_CHANGED = False
+    try:
+        os.makedirs(os.path.dirname(MANIFEST_PATH) or '.', exist_ok=True)
+        with open(MANIFEST_PATH + PARTIAL_SUFFIX, 'w') as file:
+            file.write(content)
+        os.replace(MANIFEST_PATH + PARTIAL_SUFFIX, MANIFEST_PATH)
+    except OSError:
+        logging.error('Failed to save the verification manifest to %s!' % MANIFEST_PATH)
+        with MANIFEST_LOCK:
+            IS_MANIFEST_CHANGED = True
+
 
 def md5_hash(local_path: str) -> str:
     """
@@ -277,14 +615,132 @@ def md5_hash(local_path: str) -> str:
     This is a helper function.
     """
     md5 = hashlib.md5()
+    hash_file(local_path, md5)
+    return md5.hexdigest()
+
+
+def split_identifier(identifier: str) -> Tuple[str, str]:
+    """
+    Return the tag (algorithm) and the hex digest of the given identifier.
+    The tag of an untagged MD5 identifier is an empty string.
+
+    >>> split_identifier('blake2b-tree:0a1b')
+    ('blake2b-tree', '0a1b')
+    >>> split_identifier('b517594dac2b00c95ad8cf0058d1c42c')
+    ('', 'b517594dac2b00c95ad8cf0058d1c42c')
+    """
+    if ':' in identifier:
+        tag, digest = identifier.split(':', 1)
+        return tag, digest
+    return '', identifier
+
+
+def join_identifier(tag: str, digest: str) -> str:
+    """
+    Return the identifier made from the given tag and hex digest, the inverse of split_identifier.
+
+    >>> join_identifier('sha256', '0a1b')
+    'sha256:0a1b'
+    >>> join_identifier('', '0a1b')
+    '0a1b'
+    """
+    return f'{tag}:{digest}' if tag != '' else digest
+
+
+def new_hash(tag: str) -> Any:
+    """
+    Return a new hash object for the given identifier tag.
+
+    An empty tag means DEFAULT_HASH_ALGORITHM. Raise ValueError if the algorithm is not supported,
+    for example xxh3 without the xxhash library installed.
+    """
+    algorithm = tag if tag != '' else DEFAULT_HASH_ALGORITHM
+    is_tree = algorithm.endswith(TREE_SUFFIX)
+    if is_tree:
+        algorithm = algorithm[:-len(TREE_SUFFIX)]
+    if algorithm not in HASH_ALGORITHMS:
+        raise ValueError(f'Unsupported hash algorithm {algorithm}!')
+    return TreeHash(algorithm) if is_tree else HASH_ALGORITHMS[algorithm]()
+
 
+def compute_identifier(local_path: str, tag: str = '') -> str:
+    """
+    Return the identifier of the specified file for the given tag, which could be written into
+    config.json.
+
+    It may raise FileNotFoundError if the file doesn't exist.
+    """
+    hash_object = new_hash(tag)
+    hash_file(local_path, hash_object)
+    return join_identifier(tag, hash_object.hexdigest())
+
+
+# =================================================================================================
+# File I/O
+# =================================================================================================
+
+def hash_file(local_path: str, hash_object: Any) -> int:
+    """
+    Update hash_object (a hashlib hash object or a TreeHash) with the content of the specified file,
+    and return the number of bytes hashed.
+
+    Files of at least MMAP_THRESHOLD bytes are memory-mapped and hashed in a single call, so that no
+    bytes objects are created at all. Smaller files are read with readinto into one reused buffer
+    of BUFFER_SIZE bytes.
+
+    It may raise FileNotFoundError if the file doesn't exist.
+    """
+    if os.path.getsize(local_path) >= MMAP_THRESHOLD:
+        with map_file(local_path) as mapped:
+            hash_object.update(mapped)
+            return len(mapped)
+
+    buffer = bytearray(BUFFER_SIZE)
+    view = memoryview(buffer)
+    total = 0
+    with open(local_path, 'rb', buffering=0) as file:
+        size = file.readinto(buffer)
+        while size:
+            hash_object.update(view[:size])
+            total += size
+            size = file.readinto(buffer)
+    return total
+
+
+@contextmanager
+def map_file(local_path: str) -> Iterator[Any]:
+    """
+    A context manager that maps the specified file into memory read-only and yields the mmap
+    object, which supports the buffer protocol, slicing, find, and readline without copying the
+    whole file.
+
+    An empty file yields an empty bytes object, because empty files cannot be mapped.
+
+    It may raise FileNotFoundError if the file doesn't exist.
+    """
     with open(local_path, 'rb') as file:
-        data = file.read(BUFFER_SIZE)
-        while data:
-            md5.update(data)
-            data = file.read(BUFFER_SIZE)
+        if os.fstat(file.fileno()).st_size == 0:
+            yield b''
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
 
-    return md5.hexdigest()
+
+@contextmanager
+def open_lines(local_path: str, encoding: str = 'utf-8') -> Iterator[Iterator[str]]:
+    """
+    A context manager that yields an iterator over the lines of the specified text file, read
+    from a memory-mapped view of the file.
+
+    The iterator could be passed to csv.reader directly.
+
+    It may raise FileNotFoundError if the file doesn't exist.
+    """
+    with map_file(local_path) as mapped:
+        if not mapped:
+            yield iter(())
+        else:
+            yield (line.decode(encoding) for line in iter(mapped.readline, b''))
 
 
 if __name__ == '__main__':
@@ -299,8 +755,12 @@ if __name__ == '__main__':
     import python_ta
 
     python_ta.check_all(config={
-        'extra-imports'  : ['__future__', 'hashlib', 'json', 'logging', 'os', 'typing', 'requests'],
-        'allowed-io'     : ['__init__', 'md5_hash', 'download', 'generate_identifier'],
+        'extra-imports'  : ['__future__', 'hashlib', 'json', 'logging', 'mmap', 'os', 'threading',
+                            'time', 'concurrent.futures', 'contextlib', 'typing', 'requests',
+                            'xxhash'],
+        'allowed-io'     : ['__init__', 'md5_hash', 'download', 'generate_identifier',
+                            'load_manifest', 'save_manifest', 'hash_file', 'map_file',
+                            'open_lines'],
         'max-line-length': 100,
         'disable'        : ['R1705', 'C0200', 'E9989', 'E9997']
     })
@@ -0,0 +1,457 @@
+"""
+A local HTTP server that serves the same covid cases and school closures as our GUI.
+
+Data are loaded once through data.init_data into a dataset.Dataset, and every request is answered
+from its in-memory arrays. Responses are streamed with chunked transfer encoding as JSON (default),
+CSV, or Arrow (only if pyarrow is installed), chosen by the format query parameter or the Accept
+header. Every response carries an ETag keyed on the identifiers of our data sets, so dashboards may
+revalidate with If-None-Match and get 304 Not Modified.
+
+With --database, requests are answered by indexed SELECTs on a database.CaseDatabase instead. It's
+built from our data sets the first time (and whenever their identifiers change), so later starts
+read no CSV file at all.
+
+Endpoints:
+    GET /countries
+    GET /cases?country=&province=&start=&end=&format=json|csv|arrow
+        - Without a country, the cases of the whole world.
+    GET /closures?country=&start=&end=&format=json|csv|arrow
+        - Without a country, the most common status of all countries.
+        - Statuses are the values of data.ClosureStatus.
+
+Usage:
+    python server.py [--host 127.0.0.1] [--port 8110] [--database cases.db]
+"""
+# Python built-ins
+import argparse
+import asyncio
+import datetime
+import hashlib
+import json
+import logging
+import sys
+import time
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlsplit
+
+# NumPy
+import numpy
+
+# Our modules
+import data
+import settings
+from database import CaseDatabase
+from dataset import Dataset
+from resource_manager import Config, register_resources
+
+# Arrow is optional
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:
+    pyarrow = None
+
+# Number of values written in one chunk of a streamed response
+CHUNK_VALUES = 4096
+
+# Maximum size of the request line and headers
+MAX_HEADER_SIZE = 16384
+
+# Seconds to wait for the next request on a kept-alive connection
+KEEP_ALIVE_TIMEOUT = 15
+
+CONTENT_TYPES = {
+    'json' : 'application/json',
+    'csv'  : 'text/csv; charset=utf-8',
+    'arrow': 'application/vnd.apache.arrow.stream'
+}
+
+REASONS = {
+    200: 'OK',
+    304: 'Not Modified',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    406: 'Not Acceptable',
+    431: 'Request Header Fields Too Large'
+}
+
+
+class HTTPError(Exception):
+    """
+    An error that is answered with the given HTTP status code.
+
+    Instance Attributes:
+        - status: The HTTP status code.
+    """
+    status: int
+
+    def __init__(self, status: int, message: str) -> None:
+        """Initialize an HTTPError object"""
+        super().__init__(message)
+        self.status = status
+
+
+class Series:
+    """
+    A dated series to be written into a response.
+
+    Instance Attributes:
+        - name: The name of the values, like cases or status.
+        - meta: Other fields of a JSON response, like the country.
+        - dates: The dates of the series.
+        - values: The values of the series.
+    """
+    name: str
+    meta: Dict[str, str]
+    dates: numpy.ndarray
+    values: numpy.ndarray
+
+    def __init__(self, name: str, meta: Dict[str, str], dates: numpy.ndarray,
+                 values: numpy.ndarray) -> None:
+        """Initialize a Series object"""
+        self.name = name
+        self.meta = meta
+        self.dates = dates
+        self.values = values
+
+
+class QueryServer:
+    """
+    An asyncio HTTP/1.1 server over a Dataset or a CaseDatabase.
+
+    Instance Attributes:
+        - dataset: The dataset (or the database) to be queried.
+        - etag_key: The part of ETags shared by all responses, computed from the identifiers of the
+          data sets.
+        - requests_served: The number of requests served so far.
+    """
+    dataset: Union[Dataset, CaseDatabase]
+    etag_key: str
+    requests_served: int
+
+    def __init__(self, dataset: Union[Dataset, CaseDatabase], identifiers: List[str]) -> None:
+        """Initialize a QueryServer object"""
+        self.dataset = dataset
+        self.etag_key = hashlib.md5('\n'.join(identifiers).encode('utf-8')).hexdigest()[:16]
+        self.requests_served = 0
+
+    async def handle_connection(self, reader: asyncio.StreamReader,
+                                writer: asyncio.StreamWriter) -> None:
+        """
+        Serve the requests of one connection until the client closes it or asks to close it.
+        """
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'),
+                                                  KEEP_ALIVE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self.write_error(writer, HTTPError(431, 'Headers are too large'), False)
+                    break
+                keep_alive = await self.handle_request(head, writer)
+                self.requests_served += 1
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    async def handle_request(self, head: bytes, writer: asyncio.StreamWriter) -> bool:
+        """
+        Answer the request with the given request line and headers. Return whether the connection
+        should be kept alive.
+        """
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, version = lines[0].split(' ')
+        except ValueError:
+            await self.write_error(writer, HTTPError(400, 'Malformed request line'), False)
+            return False
+        headers = {}
+        for line in lines[1:]:
+            if ':' in line:
+                key, value = line.split(':', 1)
+                headers[key.strip().lower()] = value.strip()
+        connection = headers.get('connection', '').lower()
+        keep_alive = connection == 'keep-alive' if version == 'HTTP/1.0' \
+            else connection != 'close'
+
+        try:
+            if method not in ('GET', 'HEAD'):
+                raise HTTPError(405, f'Method {method} is not allowed')
+            url = urlsplit(target)
+            query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            response_format = choose_format(query.get('format'), headers.get('accept', ''))
+            etag = f'"{self.etag_key}-{response_format}"'
+            if etag in headers.get('if-none-match', ''):
+                self.write_head(writer, 304, {'ETag': etag}, keep_alive)
+                await writer.drain()
+                return keep_alive
+            series = self.route(url.path, query)
+        except HTTPError as e:
+            await self.write_error(writer, e, keep_alive)
+            return keep_alive
+
+        self.write_head(writer, 200, {'Content-Type'     : CONTENT_TYPES[response_format],
+                                      'Transfer-Encoding': 'chunked',
+                                      'ETag'             : etag,
+                                      'Cache-Control'    : 'no-cache'}, keep_alive)
+        if method == 'GET':
+            for chunk in ENCODERS[response_format](series):
+                writer.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+                await writer.drain()
+            writer.write(b'0\r\n\r\n')
+        await writer.drain()
+        return keep_alive
+
+    def route(self, path: str, query: Dict[str, str]) -> Series:
+        """
+        Return the series that answers the given path and query.
+        """
+        start, end = parse_date(query.get('start')), parse_date(query.get('end'))
+        country = query.get('country', '')
+        try:
+            if path == '/countries':
+                countries = numpy.array(self.dataset.countries)
+                return Series('country', {}, numpy.zeros(0, dtype='datetime64[D]'), countries)
+            elif path == '/cases' and country == '':
+                return Series('cases', {'country': ''},
+                              *self.dataset.global_total_cases(start, end))
+            elif path == '/cases' and query.get('province', '') != '':
+                province = query['province']
+                return Series('cases', {'country': country, 'province': province},
+                              *self.dataset.province_cases(country, province, start, end))
+            elif path == '/cases':
+                return Series('cases', {'country': country},
+                              *self.dataset.cases(country, start, end))
+            elif path == '/closures' and country == '':
+                return Series('status', {'country': ''},
+                              *self.dataset.global_closures(start, end))
+            elif path == '/closures':
+                return Series('status', {'country': country},
+                              *self.dataset.closures(country, start, end))
+        except KeyError as e:
+            raise HTTPError(404, f'Unknown location {e}') from e
+        raise HTTPError(404, f'Unknown path {path}')
+
+    @staticmethod
+    def write_head(writer: asyncio.StreamWriter, status: int, headers: Dict[str, str],
+                   keep_alive: bool) -> None:
+        """
+        Write the status line and the headers of a response.
+        """
+        headers = dict(headers)
+        headers['Connection'] = 'keep-alive' if keep_alive else 'close'
+        lines = [f'HTTP/1.1 {status} {REASONS[status]}']
+        lines.extend(f'{key}: {value}' for key, value in headers.items())
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+
+    async def write_error(self, writer: asyncio.StreamWriter, error: HTTPError,
+                          keep_alive: bool) -> None:
+        """
+        Write an error response with a JSON body.
+        """
+        body = json.dumps({'error': str(error)}).encode('utf-8')
+        self.write_head(writer, error.status, {'Content-Type'  : CONTENT_TYPES['json'],
+                                               'Content-Length': str(len(body))}, keep_alive)
+        writer.write(body)
+        await writer.drain()
+
+
+# =================================================================================================
+# Encoders
+# =================================================================================================
+
+def encode_json(series: Series) -> Iterator[bytes]:
+    """
+    Encode the series as a JSON object in chunks.
+    The list of countries is encoded as a JSON array.
+
+    >>> s = Series('cases', {'country': 'Canada'}, \
+    numpy.array(['2021-01-01'], dtype='datetime64[D]'), numpy.array([5]))
+    >>> b''.join(encode_json(s))
+    b'{"country": "Canada", "dates": ["2021-01-01"], "cases": [5]}'
+    """
+    if series.name == 'country':
+        yield json.dumps(series.values.tolist()).encode('utf-8')
+        return
+    meta = json.dumps(series.meta)
+    yield f'{meta[:-1]}{", " if series.meta else ""}"dates": ['.encode('utf-8')
+    dates = numpy.datetime_as_string(series.dates)
+    for i in range(0, len(dates), CHUNK_VALUES):
+        prefix = ', ' if i > 0 else ''
+        yield (prefix + json.dumps(dates[i:i + CHUNK_VALUES].tolist())[1:-1]).encode('utf-8')
+    yield f'], "{series.name}": ['.encode('utf-8')
+    for i in range(0, len(series.values), CHUNK_VALUES):
+        prefix = ', ' if i > 0 else ''
+        yield (prefix + json.dumps(series.values[i:i + CHUNK_VALUES].tolist())[1:-1]) \
+            .encode('utf-8')
+    yield b']}'
+
+
+def encode_csv(series: Series) -> Iterator[bytes]:
+    """
+    Encode the series as CSV rows in chunks.
+
+    >>> s = Series('cases', {'country': 'Canada'}, \
+    numpy.array(['2021-01-01'], dtype='datetime64[D]'), numpy.array([5]))
+    >>> b''.join(encode_csv(s))
+    b'date,cases\\r\\n2021-01-01,5\\r\\n'
+    """
+    if series.name == 'country':
+        yield ('country\r\n' + ''.join(f'"{c}"\r\n' for c in series.values)).encode('utf-8')
+        return
+    yield f'date,{series.name}\r\n'.encode('utf-8')
+    dates = numpy.datetime_as_string(series.dates)
+    for i in range(0, len(dates), CHUNK_VALUES):
+        rows = zip(dates[i:i + CHUNK_VALUES], series.values[i:i + CHUNK_VALUES].tolist())
+        yield ''.join(f'{d},{v}\r\n' for d, v in rows).encode('utf-8')
+
+
+def encode_arrow(series: Series) -> Iterator[bytes]:
+    """
+    Encode the series as an Arrow IPC stream of record batches.
+    """
+    if series.name == 'country':
+        table = pyarrow.table({'country': series.values.tolist()})
+    else:
+        table = pyarrow.table({'date'     : pyarrow.array(series.dates),
+                               series.name: pyarrow.array(series.values)})
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, table.schema) as ipc_writer:
+        for batch in table.to_batches(max_chunksize=CHUNK_VALUES):
+            ipc_writer.write_batch(batch)
+    yield sink.getvalue().to_pybytes()
+
+
+ENCODERS = {
+    'json' : encode_json,
+    'csv'  : encode_csv,
+    'arrow': encode_arrow
+}
+
+
+# =================================================================================================
+# Functions
+# =================================================================================================
+
+def choose_format(requested: Optional[str], accept: str) -> str:
+    """
+    Return the format of a response from the format query parameter or the Accept header.
+
+    >>> choose_format(None, 'text/csv')
+    'csv'
+    >>> choose_format('json', 'text/csv')
+    'json'
+    """
+    if requested is None:
+        requested = 'json'
+        for name, content_type in CONTENT_TYPES.items():
+            if content_type.split(';')[0] in accept:
+                requested = name
+                break
+    if requested not in CONTENT_TYPES:
+        raise HTTPError(406, f'Unknown format {requested}')
+    if requested == 'arrow' and pyarrow is None:
+        raise HTTPError(406, 'Arrow responses need pyarrow to be installed')
+    return requested
+
+
+def parse_date(text: Optional[str]) -> Optional[datetime.date]:
+    """
+    Parse an ISO date of a query. An empty or missing date means no bound.
+
+    >>> parse_date('2021-01-01')
+    datetime.date(2021, 1, 1)
+    """
+    if text is None or text == '':
+        return None
+    try:
+        return datetime.date.fromisoformat(text)
+    except ValueError as e:
+        raise HTTPError(400, f'Invalid date {text}') from e
+
+
+def load_dataset() -> Tuple[Optional[Dataset], List[str]]:
+    """
+    Load our data sets through data.init_data, and return a tuple of the Dataset (None if data could
+    not be initialized) and the identifiers of the data sets.
+    """
+    data.init_data()
+    if 'Failed to' in data.progress_description:
+        logging.critical(data.progress_description)
+        return None, []
+    identifiers = [data.RESOURCES_DICT[name].identifier_expected
+                   for name in (data.COVID19_RESOURCE_NAME, data.SCHOOL_CLOSURE_RESOURCE_NAME)]
+    return Dataset.from_data(), identifiers
+
+
+def load_database(path: str) -> Tuple[Optional[CaseDatabase], List[str]]:
+    """
+    Open the database at the given path, and return a tuple of the database (None if it could not
+    be built) and the identifiers of the data sets.
+
+    If the database was not built from the expected data sets (see Resource.identifier_expected),
+    it's built again from load_dataset. Otherwise, no data set is read.
+    """
+    identifiers = [data.RESOURCES_DICT[name].identifier_expected
+                   for name in (data.COVID19_RESOURCE_NAME, data.SCHOOL_CLOSURE_RESOURCE_NAME)]
+    database = CaseDatabase(path)
+    if database.identifiers() != identifiers:
+        logging.info(f'Building the database {path}...')
+        dataset, identifiers = load_dataset()
+        if dataset is None:
+            database.close()
+            return None, []
+        database.store(dataset, identifiers)
+    return database, identifiers
+
+
+async def serve(server: QueryServer, host: str, port: int) -> None:
+    """
+    Serve forever on the given host and port.
+    """
+    listener = await asyncio.start_server(server.handle_connection, host, port,
+                                          limit=MAX_HEADER_SIZE)
+    logging.info(f'Serving on http://{host}:{port}/')
+    async with listener:
+        await listener.serve_forever()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    The entry of the server. Return the exit code.
+    """
+    parser = argparse.ArgumentParser(description='Serve our data sets over HTTP.')
+    parser.add_argument('--host', default='127.0.0.1', help='the address to listen on')
+    parser.add_argument('--port', type=int, default=8110, help='the port to listen on')
+    parser.add_argument('--database',
+                        help='answer requests from this SQLite database, built if needed')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(stream=sys.stdout, level=settings.LOG_LEVEL, format=settings.LOG_FORMAT)
+
+    config = Config('config.json')
+    settings.init_setting(config['setting'])
+    register_resources(config['resource'])
+
+    timestamp1 = time.time()
+    if args.database is None:
+        dataset, identifiers = load_dataset()
+    else:
+        dataset, identifiers = load_database(args.database)
+    if dataset is None:
+        return 1
+    logging.info(f'Loaded the dataset in {round(time.time() - timestamp1, 3)} seconds!')
+
+    try:
+        asyncio.run(serve(QueryServer(dataset, identifiers), args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -29,6 +29,25 @@ FONT_FAMILY = 'Calibri'
 ALT_FONT_FAMILY = 'Helvetica'
 FONT_SIZE = 14
 
+# =================================================================================================
+# Startup
+# =================================================================================================
+
+# Whether to show the main window before importing matplotlib and creating the plot
+FAST_STARTUP = True
+
+# =================================================================================================
+# Data
+# =================================================================================================
+
+# The optional JHU time series files of more metrics, see metric_cube.py. Every data set is a dict
+# with a 'metric' and a 'local_path'. Files that do not exist are skipped.
+METRIC_DATASETS: List[Dict[str, str]] = []
+
+# The JSON file that data.init_data writes the timings of its stages into, or an empty string to
+# not write them. See instrumentation.py.
+INIT_TIMINGS_PATH = 'resources/init_data_timings.json'
+
 # =================================================================================================
 # Logger
 # =================================================================================================
@@ -47,6 +66,12 @@ def init_setting(setting_config: Dict) -> None:
     ALT_FONT_FAMILY = setting_config['alternative_font_family']
     global FONT_SIZE
     FONT_SIZE = setting_config['font_size']
+    global FAST_STARTUP
+    FAST_STARTUP = setting_config['fast_startup']
+    global METRIC_DATASETS
+    METRIC_DATASETS = setting_config['metric_datasets']
+    global INIT_TIMINGS_PATH
+    INIT_TIMINGS_PATH = setting_config['init_timings_path']
 
 
 if __name__ == '__main__':
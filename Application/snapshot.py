@@ -0,0 +1,231 @@
+"""
+This module contains DataSnapshot, the immutable view of our data sets that the main window reads.
+
+A snapshot is built completely before anything reads it, and it never changes afterwards. So a new
+snapshot could be built in a background thread while the main window keeps reading the current
+one, and then replace it with a single assignment, and a reader never sees a half-built snapshot.
+No lock is needed: a reader holds on to the snapshot it started with until it finishes.
+
+Every snapshot has a version, greater than the versions of all snapshots built before it, so a
+snapshot that finished building late (for example, a reload started before a re-initialization)
+can be told apart from the one it would replace.
+"""
+# Future features
+from __future__ import annotations
+
+# Python built-ins
+import copy
+import datetime
+import itertools
+from typing import Dict, List, Optional
+
+# NumPy
+import numpy
+
+# Our modules
+import data
+import metrics
+from dataset import MISSING_STATUS, Dataset, read_new_covid_cases
+from metric_cube import CONFIRMED, MetricCube, load_available
+
+# A dict mapping the values of closure statuses to their enums.
+CLOSURE_STATUSES = {status.value: status for status in data.ClosureStatus}
+
+# The versions of snapshots. next() on it is atomic, so snapshots may be built in many threads.
+VERSIONS = itertools.count(1)
+
+
+class DataSnapshot:
+    """
+    An immutable snapshot of our data sets: the covid cases and their derived series, and the
+    closure timelines of all countries and the world.
+
+    Instance Attributes:
+        - version: The version of this snapshot, see VERSIONS.
+        - dataset: The covid cases and school closures, see dataset.Dataset.
+        - metrics_engine: The derived series of the confirmed cases of all countries and the world.
+        - metric_cube: The other JHU time series (see metric_cube.py), or None if none is loaded.
+        - metric_engines: A dict mapping metrics to the derived series of all countries and the
+          world with that metric. The confirmed cases map to metrics_engine.
+        - country_names: The sorted names of all countries with covid cases.
+        - country_timelines: A dict mapping the names of countries to their closure timelines.
+        - global_timeline: The closure timeline of the world.
+        - min_date and max_date: The first and the last date with both covid cases and closure
+          statuses, the default date range of our main window.
+
+    Representation Invariants:
+        - Nothing changes the attributes of a snapshot (or the objects they refer to) after it is
+          built, except the caches of the engines, which are only used by one thread.
+        - CONFIRMED in self.metric_engines
+    """
+    version: int
+    dataset: Dataset
+    metrics_engine: metrics.MetricsEngine
+    metric_cube: Optional[MetricCube]
+    metric_engines: Dict[str, metrics.MetricsEngine]
+    country_names: List[str]
+    country_timelines: Dict[str, data.ClosureTimeline]
+    global_timeline: data.ClosureTimeline
+    min_date: datetime.date
+    max_date: datetime.date
+
+    def __init__(self, dataset: Dataset, cube: Optional[MetricCube] = None) -> None:
+        """
+        Initialize a DataSnapshot of the given dataset and (optionally) the given cube of other
+        metrics. The confirmed cases always come from dataset.
+        """
+        self.dataset = dataset
+        self.metrics_engine = metrics.MetricsEngine(
+                dataset.dates, dataset.countries + [metrics.GLOBAL_LOCATION],
+                numpy.vstack([dataset.country_cases, dataset.global_cases]))
+        self.metric_cube = cube
+        self.metric_engines = {CONFIRMED: self.metrics_engine}
+        for metric in ([] if cube is None else cube.metrics):
+            if metric != CONFIRMED:
+                countries, totals = cube.country_totals(metric)
+                self.metric_engines[metric] = metrics.MetricsEngine(
+                        cube.dates, countries + [metrics.GLOBAL_LOCATION],
+                        numpy.vstack([totals, totals.sum(axis=0)]))
+        self.country_names = list(dataset.countries)
+        self.country_timelines = {
+            country: statuses_to_timeline(dataset.closure_dates,
+                                          dataset.closure_statuses[index])
+            for country, index in dataset.closure_country_indices.items()
+        }
+        self.global_timeline = statuses_to_timeline(dataset.closure_dates,
+                                                    dataset.global_closure_statuses)
+        self.min_date, self.max_date = dataset.date_range()
+        # The version is taken last, so a snapshot that finishes later has a greater version.
+        self.version = next(VERSIONS)
+
+    @classmethod
+    def from_data(cls, metric_datasets: Optional[List[Dict[str, str]]] = None) -> DataSnapshot:
+        """
+        Build a DataSnapshot from the records already read by data.init_data, and the given
+        data sets of other metrics (see settings.METRIC_DATASETS) whose files exist.
+
+        Note:
+            - This function should only be called after data are initialized.
+        """
+        return cls(Dataset.from_data(), load_available(metric_datasets or []))
+
+    @classmethod
+    def load(cls, covid_path: str, closure_path: str,
+             metric_datasets: Optional[List[Dict[str, str]]] = None) -> DataSnapshot:
+        """
+        Load a DataSnapshot from the given data sets, without reading or changing the module-level
+        constants of data.py, so it is safe to call from any thread.
+        """
+        return cls(Dataset.load(covid_path, closure_path), load_available(metric_datasets or []))
+
+    def extended(self, covid_path: str) -> Optional[DataSnapshot]:
+        """
+        Return a new snapshot with the dates added to the given covid cases data set after the
+        dates of this snapshot, or this snapshot if no date was added.
+
+        Only the new columns of the file are read and summed, instead of loading a snapshot of all
+        dates again with load, and the closure timelines and the other metrics are shared, since
+        only the covid cases changed. It does not read or change the module-level constants of
+        data.py, so it is safe to call from any thread.
+
+        Return None if the data set changed in another way, like its locations or its earlier
+        dates. Then it should be loaded again.
+        """
+        dataset = self.dataset
+        new_cases = read_new_covid_cases(covid_path, dataset.dates, dataset.locations)
+        if new_cases is None:
+            return None
+        dates, location_cases = new_cases
+        if len(dates) == 0:
+            return self
+
+        snapshot = copy.copy(self)
+        snapshot.dataset = dataset.extended(dates, location_cases)
+        snapshot.metrics_engine = metrics.MetricsEngine(
+                snapshot.dataset.dates, self.metrics_engine.locations,
+                numpy.vstack([snapshot.dataset.country_cases, snapshot.dataset.global_cases]))
+        snapshot.metric_engines = {**self.metric_engines, CONFIRMED: snapshot.metrics_engine}
+        snapshot.min_date, snapshot.max_date = snapshot.dataset.date_range()
+        snapshot.version = next(VERSIONS)
+        return snapshot
+
+    def metric_names(self) -> List[str]:
+        """
+        Return the names of all metrics of this snapshot, the confirmed cases first.
+        """
+        return list(self.metric_engines)
+
+    def engine(self, metric: str) -> metrics.MetricsEngine:
+        """
+        Return the engine of the given metric, or of the confirmed cases if this snapshot does not
+        have the metric.
+        """
+        return self.metric_engines.get(metric, self.metrics_engine)
+
+    def series_label(self, series_name: str, metric: str) -> str:
+        """
+        Return the label of the given series of the given metric, like "Daily new cases (Deaths)".
+        The confirmed cases are labelled by the series name alone.
+        """
+        if metric not in self.metric_engines or metric == CONFIRMED:
+            return series_name
+        return f'{series_name} ({metric})'
+
+    def closure_timeline(self, location: str) -> data.ClosureTimeline:
+        """
+        Return the closure timeline of the given country, or of the world if location is
+        metrics.GLOBAL_LOCATION. A country without closure statuses has an empty timeline.
+        """
+        if location == metrics.GLOBAL_LOCATION:
+            return self.global_timeline
+        return self.country_timelines.get(location, data.ClosureTimeline())
+
+
+def statuses_to_timeline(dates: numpy.ndarray, statuses: numpy.ndarray,
+                         timeline: Optional[data.ClosureTimeline] = None) \
+        -> data.ClosureTimeline:
+    """
+    Return the closure timeline of the given statuses on the given dates (see
+    dataset.Dataset.closure_statuses), appended to timeline if it is given.
+
+    Runs are found with NumPy, so only one Python object is created for every run of the same
+    status instead of every day.
+
+    >>> dates = numpy.array(['2020-03-01', '2020-03-02', '2020-03-04'], dtype='datetime64[D]')
+    >>> timeline = statuses_to_timeline(dates, numpy.array([3, 3, 3], dtype=numpy.int8))
+    >>> [(str(s), str(e)) for s, e in zip(timeline.starts, timeline.ends)]
+    [('2020-03-01', '2020-03-02'), ('2020-03-04', '2020-03-04')]
+    """
+    if timeline is None:
+        timeline = data.ClosureTimeline()
+    if len(dates) == 0:
+        return timeline
+
+    # A run ends where the status changes or where days are missing
+    breaks = numpy.flatnonzero((statuses[1:] != statuses[:-1])
+                               | (numpy.diff(dates) != numpy.timedelta64(1, 'D'))) + 1
+    starts = numpy.concatenate([[0], breaks])
+    ends = numpy.concatenate([breaks, [len(dates)]]) - 1
+    days = dates.astype(datetime.date)
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        if statuses[start] != MISSING_STATUS:
+            timeline.starts.append(days[start])
+            timeline.ends.append(days[end])
+            timeline.statuses.append(CLOSURE_STATUSES[int(statuses[start])])
+    return timeline
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod()
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports'  : ['__future__', 'copy', 'datetime', 'itertools', 'typing', 'numpy',
+                            'data', 'metrics', 'dataset', 'metric_cube'],
+        'allowed-io'     : [],
+        'max-line-length': 100,
+        'disable'        : ['R1705', 'C0200', 'E9989', 'E9997']
+    })
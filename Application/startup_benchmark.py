@@ -0,0 +1,117 @@
+"""
+A startup benchmark of our program.
+
+It runs main.py several times under python -X importtime on an offscreen Qt platform, and reports
+    - the time from process start to the first paint of the main window,
+    - the time from process start to the creation of the plot,
+    - and the modules that took the longest to import before the first paint.
+
+Usage:
+    python startup_benchmark.py [--runs 5] [--mode fast|full|both] [--json output.json]
+"""
+# Python built-ins
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+# The directory of main.py and config.json
+APPLICATION_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Startup stages reported by main.report_startup_timing, in order.
+STAGES = ['first_paint', 'plot_ready']
+
+# Number of slowest imports to report
+TOP_IMPORTS = 10
+
+
+def run_once(is_fast_startup: bool) -> Tuple[Dict[str, float], Dict[str, float]]:
+    """
+    Run main.py once and return a tuple of two dicts:
+        - the seconds from process start to each startup stage,
+        - the cumulative seconds spent on each top-level import before the first paint.
+    """
+    env = dict(os.environ)
+    env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    env['CSC110_FAST_STARTUP'] = '1' if is_fast_startup else '0'
+    env['CSC110_STARTUP_TIMESTAMP'] = repr(time.time())
+    process = subprocess.run([sys.executable, '-X', 'importtime', 'main.py'],
+                             cwd=APPLICATION_DIR, env=env, capture_output=True, text=True,
+                             timeout=120, check=False)
+
+    timings: Dict[str, float] = {}
+    imports: Dict[str, float] = {}
+    for line in process.stderr.splitlines():
+        if line.startswith('startup timing: '):
+            stage, seconds = line[len('startup timing: '):].split()
+            timings[stage] = float(seconds)
+        elif line.startswith('import time:') and 'first_paint' not in timings:
+            # import time: self [us] | cumulative | imported package
+            columns = line[len('import time:'):].split('|')
+            name = columns[2].rstrip()
+            # Nested imports are indented, we only report the top-level ones.
+            if columns[1].strip().isdigit() and name == ' ' + name.strip():
+                imports[name.strip()] = int(columns[1]) / 1e6
+
+    if any(stage not in timings for stage in STAGES):
+        raise RuntimeError(f'main.py did not report all startup stages:\n{process.stderr[-2000:]}')
+    return timings, imports
+
+
+def run_benchmark(is_fast_startup: bool, runs: int) -> Dict:
+    """
+    Run main.py runs times and return a summary of the median timings.
+    """
+    all_timings: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+    all_imports: Dict[str, List[float]] = {}
+    for _ in range(runs):
+        timings, imports = run_once(is_fast_startup)
+        for stage in STAGES:
+            all_timings[stage].append(timings[stage])
+        for name, seconds in imports.items():
+            all_imports.setdefault(name, []).append(seconds)
+
+    median_imports = {name: statistics.median(seconds) for name, seconds in all_imports.items()}
+    slowest_imports = sorted(median_imports.items(), key=lambda item: item[1], reverse=True)
+    return {
+        'mode'                     : 'fast' if is_fast_startup else 'full',
+        'runs'                     : runs,
+        'stages'                   : {stage: statistics.median(all_timings[stage])
+                                      for stage in STAGES},
+        'imports_before_first_paint': sum(median_imports.values()),
+        'slowest_imports'          : dict(slowest_imports[:TOP_IMPORTS])
+    }
+
+
+def print_summary(summary: Dict) -> None:
+    """
+    Print a summary returned by run_benchmark.
+    """
+    print(f'Startup mode: {summary["mode"]} (median of {summary["runs"]} runs)')
+    for stage, seconds in summary['stages'].items():
+        print(f'    {stage:<12}{seconds:>10.3f} s')
+    print(f'    Imports before first paint: {summary["imports_before_first_paint"]:.3f} s')
+    for name, seconds in summary['slowest_imports'].items():
+        print(f'        {name:<40}{seconds:>10.3f} s')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the startup of our program.')
+    parser.add_argument('--runs', type=int, default=5, help='number of runs of each mode')
+    parser.add_argument('--mode', choices=['fast', 'full', 'both'], default='both',
+                        help='fast startup, full (eager) startup, or both')
+    parser.add_argument('--json', help='write the results into this JSON file')
+    args = parser.parse_args()
+
+    modes = {'fast': [True], 'full': [False], 'both': [True, False]}[args.mode]
+    results = [run_benchmark(mode, args.runs) for mode in modes]
+    for result in results:
+        print_summary(result)
+
+    if args.json is not None:
+        with open(args.json, 'w') as file:
+            json.dump(results, file, indent=4)